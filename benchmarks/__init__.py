@@ -0,0 +1 @@
+"""Benchmarks for agent-sessions against generated session corpora."""
@@ -0,0 +1,461 @@
+"""Synthetic multi-provider session corpus.
+
+Writes session stores in the on-disk layouts of every supported agent:
+
+* Claude Code: ``projects/<encoded-cwd>/<uuid>.jsonl`` with large tool
+  results and progress lines between the conversation records;
+* Codex: dated ``sessions/YYYY/MM/DD/rollout-*.jsonl`` files with
+  function-call output and event records;
+* Pi: ``--<encoded-cwd>--/<ts>_<uuid>.jsonl`` files whose entries form a tree
+  (some messages branch off an earlier entry);
+* OpenCode: an ``opencode/opencode.db`` with session, message and part tables.
+
+Everything is derived from ``CorpusSpec.seed``, so a spec always produces the
+same corpus.  File modification times match each session's last activity.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from agent_sessions.models import RunnerType
+from agent_sessions.providers.claude_code import encode_project_path
+from agent_sessions.providers.pi import _encode_directory_name
+
+# Sessions end at most this far before the corpus' reference time.
+_SPAN = timedelta(days=60)
+_REFERENCE_TIME = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+_WORDS = (
+    "build test deploy refactor module function class error trace cache index "
+    "session parser request response file directory commit branch review patch "
+    "config schema query thread buffer stream token offset value record"
+).split()
+
+_PROJECTS = 8
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Size parameters of a generated corpus (per provider)."""
+
+    sessions: int = 50
+    messages: int = 40
+    record_bytes: int = 4096
+    seed: int = 0
+
+
+@dataclass
+class Corpus:
+    """A generated corpus and how to point agent-sessions at it."""
+
+    root: Path
+    spec: CorpusSpec
+    session_ids: dict[RunnerType, list[str]] = field(default_factory=dict)
+
+    @property
+    def env(self) -> dict[str, str]:
+        """Environment variables that make every provider read this corpus."""
+        return {
+            "CLAUDE_HOME": str(self.root / "claude"),
+            "CODEX_HOME": str(self.root / "codex"),
+            "PI_SESSIONS_DIR": str(self.root / "pi"),
+            "XDG_DATA_HOME": str(self.root / "xdg-data"),
+        }
+
+
+class _Writer:
+    def __init__(self, spec: CorpusSpec) -> None:
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        # A large block of prose to slice record payloads from.
+        self._prose = " ".join(self.rng.choice(_WORDS) for _ in range(20_000))
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def text(self, size: int) -> str:
+        size = max(1, size)
+        while len(self._prose) < size:
+            self._prose += " " + self._prose
+        start = self.rng.randrange(0, len(self._prose) - size + 1)
+        return self._prose[start : start + size]
+
+    def prompt(self) -> str:
+        return "Please " + " ".join(self.rng.choice(_WORDS) for _ in range(12))
+
+    def cwd(self) -> str:
+        return f"/home/bench/project{self.rng.randrange(_PROJECTS)}"
+
+    def timeline(self) -> list[datetime]:
+        """Timestamps of one session's records, oldest first."""
+        end = _REFERENCE_TIME - self.rng.random() * _SPAN
+        step = timedelta(seconds=self.rng.randint(5, 90))
+        return [end - step * (self.spec.messages - i) for i in range(self.spec.messages + 1)]
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _millis(moment: datetime) -> int:
+    return int(moment.timestamp() * 1000)
+
+
+def _write_jsonl(path: Path, records: list[dict], mtime: datetime) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.utime(path, (mtime.timestamp(), mtime.timestamp()))
+
+
+def _claude_session(w: _Writer, root: Path) -> str:
+    session_id = w.uuid()
+    cwd = w.cwd()
+    times = w.timeline()
+    records: list[dict] = [{"type": "summary", "summary": w.prompt(), "leafId": session_id}]
+    parent = None
+
+    def add(record_type: str, message: dict, moment: datetime) -> None:
+        nonlocal parent
+        record_uuid = w.uuid()
+        records.append(
+            {
+                "parentUuid": parent,
+                "cwd": cwd,
+                "sessionId": session_id,
+                "type": record_type,
+                "message": message,
+                "uuid": record_uuid,
+                "timestamp": _iso(moment),
+            }
+        )
+        parent = record_uuid
+
+    for i, moment in enumerate(times[:-1]):
+        kind = i % 4
+        if kind == 0:
+            add("user", {"role": "user", "content": w.prompt()}, moment)
+        elif kind == 1:
+            tool_id = "toolu_" + w.uuid().replace("-", "")
+            add(
+                "assistant",
+                {
+                    "role": "assistant",
+                    "content": [
+                        {"type": "thinking", "thinking": w.text(200)},
+                        {"type": "text", "text": w.text(300)},
+                        {"type": "tool_use", "id": tool_id, "name": "Read", "input": {}},
+                    ],
+                },
+                moment,
+            )
+        elif kind == 2:
+            add(
+                "user",
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": "toolu_x",
+                            "content": w.text(w.spec.record_bytes),
+                        }
+                    ],
+                },
+                moment,
+            )
+        else:
+            records.append(
+                {
+                    "type": "progress",
+                    "data": {"output": w.text(w.spec.record_bytes // 2)},
+                    "timestamp": _iso(moment),
+                }
+            )
+            add("assistant", {"role": "assistant", "content": w.text(400)}, moment)
+
+    path = root / "projects" / encode_project_path(cwd) / f"{session_id}.jsonl"
+    _write_jsonl(path, records, times[-1])
+    return session_id
+
+
+def _codex_session(w: _Writer, root: Path) -> str:
+    session_id = w.uuid()
+    times = w.timeline()
+    start = times[0]
+    records: list[dict] = [
+        {
+            "timestamp": _iso(start),
+            "type": "session_meta",
+            "payload": {"id": session_id, "cwd": w.cwd(), "cli_version": "0.50.0"},
+        },
+        {
+            "timestamp": _iso(start),
+            "type": "response_item",
+            "payload": {
+                "type": "message",
+                "role": "user",
+                "content": [
+                    {
+                        "type": "input_text",
+                        "text": "<environment_context>...</environment_context>",
+                    }
+                ],
+            },
+        },
+    ]
+
+    def item(moment: datetime, payload: dict) -> None:
+        records.append({"timestamp": _iso(moment), "type": "response_item", "payload": payload})
+
+    for i, moment in enumerate(times[1:]):
+        kind = i % 4
+        if kind == 0:
+            item(
+                moment,
+                {
+                    "type": "message",
+                    "role": "user",
+                    "content": [{"type": "input_text", "text": w.prompt()}],
+                },
+            )
+        elif kind == 1:
+            item(
+                moment,
+                {"type": "function_call", "name": "shell", "arguments": "{}", "call_id": "c"},
+            )
+        elif kind == 2:
+            item(
+                moment,
+                {
+                    "type": "function_call_output",
+                    "call_id": "c",
+                    "output": w.text(w.spec.record_bytes),
+                },
+            )
+            records.append(
+                {
+                    "timestamp": _iso(moment),
+                    "type": "event_msg",
+                    "payload": {"type": "token_count", "info": None},
+                }
+            )
+        else:
+            item(
+                moment,
+                {
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": w.text(400)}],
+                },
+            )
+
+    stamp = start.strftime("%Y-%m-%dT%H-%M-%S")
+    path = (
+        root
+        / "sessions"
+        / start.strftime("%Y")
+        / start.strftime("%m")
+        / start.strftime("%d")
+        / f"rollout-{stamp}-{session_id}.jsonl"
+    )
+    _write_jsonl(path, records, times[-1])
+    return session_id
+
+
+def _pi_session(w: _Writer, root: Path) -> str:
+    session_id = w.uuid()
+    cwd = w.cwd()
+    times = w.timeline()
+    records: list[dict] = [
+        {
+            "type": "session",
+            "version": 3,
+            "id": session_id,
+            "timestamp": _iso(times[0]),
+            "cwd": cwd,
+        }
+    ]
+    entry_ids: list[str] = []
+    model_id = w.uuid()[:8]
+    records.append(
+        {
+            "type": "model_change",
+            "id": model_id,
+            "parentId": None,
+            "timestamp": _iso(times[0]),
+            "provider": "anthropic",
+            "modelId": "bench-model",
+        }
+    )
+    entry_ids.append(model_id)
+
+    for i, moment in enumerate(times[1:]):
+        entry_id = w.uuid()[:8]
+        # Mostly a linear conversation, with the occasional branch off an
+        # earlier entry as when a user edits a previous prompt.
+        if len(entry_ids) > 4 and w.rng.random() < 0.05:
+            parent = w.rng.choice(entry_ids[:-2])
+        else:
+            parent = entry_ids[-1]
+        kind = i % 3
+        if kind == 0:
+            message = {"role": "user", "content": [{"type": "text", "text": w.prompt()}]}
+        elif kind == 1:
+            message = {
+                "role": "assistant",
+                "content": [
+                    {"type": "thinking", "thinking": w.text(200)},
+                    {"type": "text", "text": w.text(400)},
+                    {"type": "toolCall", "id": "call", "name": "bash", "arguments": {}},
+                ],
+            }
+        else:
+            message = {
+                "role": "toolResult",
+                "toolCallId": "call",
+                "content": [{"type": "text", "text": w.text(w.spec.record_bytes)}],
+            }
+        records.append(
+            {
+                "type": "message",
+                "id": entry_id,
+                "parentId": parent,
+                "timestamp": _iso(moment),
+                "message": message,
+            }
+        )
+        entry_ids.append(entry_id)
+
+    stamp = times[0].strftime("%Y-%m-%dT%H-%M-%S-000Z")
+    path = root / _encode_directory_name(cwd) / f"{stamp}_{session_id}.jsonl"
+    _write_jsonl(path, records, times[-1])
+    return session_id
+
+
+_OPENCODE_SCHEMA = """
+CREATE TABLE session (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    parent_id TEXT,
+    slug TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    title TEXT NOT NULL,
+    version TEXT NOT NULL,
+    share_url TEXT,
+    summary_additions INTEGER,
+    summary_deletions INTEGER,
+    summary_files INTEGER,
+    summary_diffs TEXT,
+    revert TEXT,
+    permission TEXT,
+    time_created INTEGER NOT NULL,
+    time_updated INTEGER NOT NULL,
+    time_compacting INTEGER,
+    time_archived INTEGER
+);
+CREATE TABLE message (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    time_created INTEGER NOT NULL,
+    time_updated INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE part (
+    id TEXT PRIMARY KEY,
+    message_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    time_created INTEGER NOT NULL,
+    time_updated INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX message_session_idx ON message (session_id);
+CREATE INDEX part_message_idx ON part (message_id);
+CREATE INDEX part_session_idx ON part (session_id);
+"""
+
+
+def _opencode_session(w: _Writer, conn: sqlite3.Connection) -> str:
+    session_id = "ses_" + w.uuid().replace("-", "")[:24]
+    times = w.timeline()
+    conn.execute(
+        "INSERT INTO session (id, project_id, slug, directory, title, version, "
+        "time_created, time_updated) VALUES (?, 'proj', 'bench', ?, ?, '1.2.5', ?, ?)",
+        (session_id, w.cwd(), w.prompt()[:60], _millis(times[0]), _millis(times[-1])),
+    )
+    messages = []
+    parts = []
+    for i, moment in enumerate(times[1:]):
+        message_id = f"msg_{session_id[4:]}_{i:05d}"
+        millis = _millis(moment)
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append((message_id, session_id, millis, millis, json.dumps({"role": role})))
+        if role == "user":
+            blocks = [{"type": "text", "text": w.prompt()}]
+        else:
+            blocks = [
+                {"type": "reasoning", "text": w.text(200)},
+                {"type": "text", "text": w.text(400)},
+                {
+                    "type": "tool",
+                    "tool": "bash",
+                    "state": {"status": "completed", "output": w.text(w.spec.record_bytes)},
+                },
+            ]
+        for j, block in enumerate(blocks):
+            parts.append(
+                (f"prt_{message_id[4:]}_{j}", message_id, session_id, millis + j, millis + j)
+                + (json.dumps(block),)
+            )
+    conn.executemany(
+        "INSERT INTO message (id, session_id, time_created, time_updated, data) "
+        "VALUES (?, ?, ?, ?, ?)",
+        messages,
+    )
+    conn.executemany(
+        "INSERT INTO part (id, message_id, session_id, time_created, time_updated, data) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        parts,
+    )
+    return session_id
+
+
+def generate_corpus(root: Path, spec: CorpusSpec | None = None) -> Corpus:
+    """Write a corpus described by ``spec`` below ``root`` (which must be empty)."""
+    spec = spec or CorpusSpec()
+    root.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(root=root, spec=spec)
+    w = _Writer(spec)
+
+    claude_root = root / "claude"
+    codex_root = root / "codex"
+    pi_root = root / "pi"
+    corpus.session_ids[RunnerType.CLAUDE_CODE] = [
+        _claude_session(w, claude_root) for _ in range(spec.sessions)
+    ]
+    corpus.session_ids[RunnerType.CODEX] = [
+        _codex_session(w, codex_root) for _ in range(spec.sessions)
+    ]
+    corpus.session_ids[RunnerType.PI] = [_pi_session(w, pi_root) for _ in range(spec.sessions)]
+
+    db_path = root / "xdg-data" / "opencode" / "opencode.db"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(_OPENCODE_SCHEMA)
+        with conn:
+            corpus.session_ids[RunnerType.OPENCODE] = [
+                _opencode_session(w, conn) for _ in range(spec.sessions)
+            ]
+    finally:
+        conn.close()
+    return corpus
@@ -0,0 +1,191 @@
+"""Time discovery and detail loading on a generated corpus.
+
+Usage::
+
+    python -m benchmarks.run                      # compare with baseline.json
+    python -m benchmarks.run --sessions 500 --record-bytes 65536
+    python -m benchmarks.run --save-baseline      # record new baselines
+
+Every operation is timed *cold* (empty agent-sessions cache database and
+in-process caches; the OS page cache is not dropped) and *warm* (the median of
+``--repeat`` further calls).  Results are compared with the baseline stored
+for the same corpus parameters, and the exit status is 1 when an operation is
+slower than ``--tolerance`` times its baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from pathlib import Path
+
+import agent_sessions
+from agent_sessions.jsonl import JSON_BACKEND
+from agent_sessions.models import RunnerType
+from agent_sessions.providers import claude_code, codex, opencode, pi
+from agent_sessions.running import clear_process_snapshot
+from benchmarks.corpus import Corpus, CorpusSpec, generate_corpus
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Differences below this many seconds are noise, whatever the ratio.
+_NOISE_FLOOR = 0.002
+
+_DETAILS: dict[RunnerType, Callable] = {
+    RunnerType.CLAUDE_CODE: claude_code.get_claude_session_detail,
+    RunnerType.CODEX: codex.get_codex_session_detail,
+    RunnerType.PI: pi.get_pi_session_detail,
+    RunnerType.OPENCODE: opencode.get_opencode_session_detail,
+}
+
+
+def operations(corpus: Corpus) -> dict[str, Callable[[], object]]:
+    """Return the benchmarked calls by name."""
+    ops: dict[str, Callable[[], object]] = {
+        "discover_sessions": agent_sessions.discover_sessions,
+        "list_claude_sessions": claude_code.list_claude_sessions,
+        "list_codex_sessions": codex.list_codex_sessions,
+        "list_pi_sessions": pi.list_pi_sessions,
+        "list_opencode_sessions": opencode.list_opencode_sessions,
+    }
+    for runner_type, get_detail in _DETAILS.items():
+        ids = corpus.session_ids[runner_type]
+        session_id = ids[len(ids) // 2]
+        ops[get_detail.__name__] = lambda f=get_detail, s=session_id: f(s)
+    return ops
+
+
+def _reset_caches(cache_dir: Path) -> None:
+    """Point the cache at an empty directory and drop in-process state."""
+    os.environ["AGENT_SESSIONS_CACHE_DIR"] = str(cache_dir)
+    clear_process_snapshot()
+    for module in (claude_code, codex, pi):
+        module._detail_states.clear()
+
+
+def _timed(op: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    op()
+    return time.perf_counter() - start
+
+
+def run(corpus: Corpus, repeat: int, scratch: Path) -> dict[str, dict[str, float]]:
+    """Time every operation cold and warm; returns seconds per operation."""
+    os.environ.update(corpus.env)
+    os.environ.pop("AGENT_SESSIONS_NO_CACHE", None)
+    results: dict[str, dict[str, float]] = {}
+    for name, op in operations(corpus).items():
+        _reset_caches(scratch / name)
+        cold = _timed(op)
+        warm = statistics.median(_timed(op) for _ in range(max(1, repeat)))
+        results[name] = {"cold": cold, "warm": warm}
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Return a description of every timing slower than ``tolerance`` x baseline."""
+    regressions = []
+    for name, timings in results.items():
+        for phase, seconds in timings.items():
+            reference = baseline.get(name, {}).get(phase)
+            if reference is None:
+                continue
+            if seconds > reference * tolerance and seconds - reference > _NOISE_FLOOR:
+                regressions.append(
+                    f"{name} ({phase}): {seconds * 1000:.1f} ms, "
+                    f"baseline {reference * 1000:.1f} ms ({seconds / reference:.2f}x)"
+                )
+    return regressions
+
+
+def _load_baselines(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_baseline(path: Path, spec: CorpusSpec, results: dict[str, dict[str, float]]) -> None:
+    entries = [b for b in _load_baselines(path) if b["spec"] != asdict(spec)]
+    entries.append(
+        {
+            "spec": asdict(spec),
+            "python": platform.python_version(),
+            "json_backend": JSON_BACKEND,
+            "results": {
+                name: {phase: round(s, 6) for phase, s in timings.items()}
+                for name, timings in results.items()
+            },
+        }
+    )
+    path.write_text(json.dumps(entries, indent=2) + "\n", encoding="utf-8")
+
+
+def _print_table(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]]
+) -> None:
+    print(f"{'operation':<30} {'cold ms':>10} {'warm ms':>10} {'base cold':>10} {'base warm':>10}")
+    for name, timings in results.items():
+        base = baseline.get(name, {})
+        row = [timings["cold"], timings["warm"], base.get("cold"), base.get("warm")]
+        cells = [f"{v * 1000:>10.1f}" if v is not None else f"{'-':>10}" for v in row]
+        print(f"{name:<30} " + " ".join(cells))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = CorpusSpec()
+    parser.add_argument("--sessions", type=int, default=defaults.sessions)
+    parser.add_argument("--messages", type=int, default=defaults.messages)
+    parser.add_argument("--record-bytes", type=int, default=defaults.record_bytes)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5, help="warm calls per operation")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--corpus-dir", type=Path, help="keep the corpus in this directory")
+    args = parser.parse_args(argv)
+
+    spec = CorpusSpec(
+        sessions=args.sessions,
+        messages=args.messages,
+        record_bytes=args.record_bytes,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory(prefix="agent-sessions-bench-") as tmp:
+        scratch = Path(tmp)
+        corpus = generate_corpus(args.corpus_dir or scratch / "corpus", spec)
+        results = run(corpus, args.repeat, scratch / "cache")
+
+    baseline = next(
+        (b["results"] for b in _load_baselines(args.baseline) if b["spec"] == asdict(spec)),
+        {},
+    )
+    _print_table(results, baseline)
+
+    if args.save_baseline:
+        _save_baseline(args.baseline, spec, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not baseline:
+        print("No baseline for these corpus parameters.")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,49 @@
 """agent-sessions: Discover and inspect local AI coding agent sessions."""
 
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import queue
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from agent_sessions import deadline, metrics, scanning
+from agent_sessions.catalog import Catalog
+from agent_sessions.metrics import CallStats, Counters, collect_stats
 from agent_sessions.models import (
+    ChangeKind,
+    DiscoveryComplete,
     RunnerType,
+    SearchHit,
+    SessionChange,
     SessionDetail,
+    SessionList,
     SessionMessage,
+    SessionMessagePage,
     SessionSummary,
 )
 from agent_sessions.providers.claude_code import (
     list_claude_sessions,
     get_claude_session_detail,
+    get_claude_session_messages,
 )
 from agent_sessions.providers.codex import (
     list_codex_sessions,
     get_codex_session_detail,
+    get_codex_session_messages,
 )
 from agent_sessions.providers.opencode import (
     list_opencode_sessions,
     get_opencode_session_detail,
+    get_opencode_session_messages,
 )
 from agent_sessions.providers.pi import (
     list_pi_sessions,
     get_pi_session_detail,
+    get_pi_session_messages,
 )
 from agent_sessions.running import (
     is_claude_session_running,
@@ -28,13 +51,27 @@ from agent_sessions.running import (
     is_opencode_session_running,
     is_pi_session_running,
 )
+from agent_sessions.query import SessionQuery
+from agent_sessions.search import search_sessions
+from agent_sessions.watch import follow_session, watch_sessions
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on provider threads used by discover_sessions.
+MAX_DISCOVERY_WORKERS = 4
+
+# Under a time budget, providers stop this long (at most a tenth of the
+# budget) before the deadline so that their partial results are in by then.
+_PROVIDER_MARGIN_SECONDS = 0.02
 
 
 def discover_sessions(
     directory: str | None = None,
     runner_type: RunnerType | None = None,
     limit: int = 50,
-) -> list[SessionSummary]:
+    timeout_ms: int | None = None,
+    query: SessionQuery | None = None,
+) -> SessionList:
     """Discover agent sessions from Claude Code, Codex, OpenCode, and Pi.
 
     Scans the local machine for recent and running agent sessions.
@@ -43,23 +80,246 @@ def discover_sessions(
         directory: Filter to sessions for this project directory.
         runner_type: Filter to a specific agent type.
         limit: Maximum sessions to return.
+        query: Further conditions, which each provider applies while
+            reading its storage rather than after listing everything.
+        timeout_ms: Return within this many milliseconds with whatever the
+            providers found by then; ``incomplete`` on the result says what
+            was left out.  Providers still busy at the deadline are abandoned
+            (they stop at their next check) and return nothing.
 
     Returns:
         List of session summaries, sorted by last_activity descending.
     """
-    sessions: list[SessionSummary] = []
+    providers = _listing_providers(runner_type, query)
+    until = _deadline(timeout_ms)
+    incomplete: dict[RunnerType, list[str]] = {p: [] for p, _ in providers}
+
+    # Providers are I/O bound and independent, so scan them concurrently.  A
+    # failing provider is logged and skipped rather than failing discovery.
+    results: list[list[SessionSummary]] = []
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(len(providers), MAX_DISCOVERY_WORKERS)),
+        thread_name_prefix="agent-sessions",
+    )
+    try:
+        futures = [
+            (
+                provider_type,
+                # Each provider runs in a copy of the caller's context so that
+                # metrics.collect_stats() sees its work.
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _list_provider,
+                    provider_type,
+                    list_sessions,
+                    until,
+                    incomplete[provider_type],
+                    directory=directory,
+                    limit=limit,
+                    query=query,
+                ),
+            )
+            for provider_type, list_sessions in providers
+        ]
+        done, _ = wait(
+            [future for _, future in futures],
+            timeout=None if until is None else max(0.0, until - time.monotonic()),
+        )
+        unfinished = set()
+        for provider_type, future in futures:
+            if future not in done:
+                unfinished.add(provider_type)
+                continue
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                _log_provider_failure(provider_type, exc)
+    finally:
+        executor.shutdown(wait=until is None, cancel_futures=True)
+
+    return SessionList(_merge_results(results, limit), _incomplete(incomplete, unfinished))
+
+
+def _deadline(timeout_ms: int | None) -> float | None:
+    return None if timeout_ms is None else time.monotonic() + timeout_ms / 1000
+
+
+def _list_provider(
+    provider_type: RunnerType,
+    list_sessions: Callable[..., list[SessionSummary]],
+    until: float | None,
+    incomplete: list[str],
+    **kwargs,
+) -> list[SessionSummary]:
+    """Run a provider's list function, under the budget ending at ``until``."""
+    if until is None:
+        return metrics.call_provider(provider_type.value, list_sessions, **kwargs)
+    budget = max(0.0, until - time.monotonic())
+    provider_until = until - min(_PROVIDER_MARGIN_SECONDS, budget / 10)
+    with deadline.budget(provider_until, incomplete):
+        return metrics.call_provider(provider_type.value, list_sessions, **kwargs)
+
+
+def _incomplete(
+    incomplete: dict[RunnerType, list[str]], unfinished: set[RunnerType]
+) -> dict[RunnerType, list[str]]:
+    """Return the providers that ran out of time, with a copy of what they skipped."""
+    return {
+        provider_type: list(locations)
+        for provider_type, locations in incomplete.items()
+        if locations or provider_type in unfinished
+    }
+
+
+def discover_sessions_iter(
+    directory: str | None = None,
+    runner_type: RunnerType | None = None,
+    limit: int = 50,
+    ordered: bool = False,
+    timeout_ms: int | None = None,
+    query: SessionQuery | None = None,
+) -> Iterator[SessionSummary | DiscoveryComplete]:
+    """Yield session summaries as soon as they are parsed, then the result.
+
+    Providers run concurrently as in ``discover_sessions``; each summary is
+    yielded the moment a provider has parsed it, so the first rows arrive
+    long before the scan finishes.  The last item is a ``DiscoveryComplete``
+    holding exactly what ``discover_sessions`` would return.
+
+    The streamed summaries are provisional: providers parse a few sessions
+    beyond ``limit`` to rank them, so some may be missing from the final
+    result.
+
+    Args:
+        directory: Filter to sessions for this project directory.
+        runner_type: Filter to a specific agent type.
+        limit: Maximum sessions in the final result.
+        ordered: Yield summaries in approximate recency order (by file
+            mtime, or OpenCode's update time) across providers, and at most
+            ``limit`` of them.  A summary is then held back until every
+            provider has produced something older or finished.
+        timeout_ms: Finish within this many milliseconds, as in
+            ``discover_sessions``.
+        query: Further conditions, as in ``discover_sessions``.
+
+    Yields:
+        ``SessionSummary`` objects, then one ``DiscoveryComplete``.
+    """
+    providers = _listing_providers(runner_type, query)
+    until = _deadline(timeout_ms)
+    incomplete: dict[RunnerType, list[str]] = {p: [] for p, _ in providers}
+    events: queue.SimpleQueue = queue.SimpleQueue()
+
+    def run(provider_type: RunnerType, list_sessions: Callable[..., list[SessionSummary]]) -> None:
+        scanning.summary_sink.set(
+            lambda summary, mtime: events.put((provider_type, mtime, summary))
+        )
+        try:
+            result = _list_provider(
+                provider_type,
+                list_sessions,
+                until,
+                incomplete[provider_type],
+                directory=directory,
+                limit=limit,
+                query=query,
+            )
+        except Exception as exc:
+            events.put((provider_type, None, exc))
+        else:
+            events.put((provider_type, None, result))
 
-    if runner_type is None or runner_type == RunnerType.CLAUDE_CODE:
-        sessions.extend(list_claude_sessions(directory=directory, limit=limit))
-    if runner_type is None or runner_type == RunnerType.CODEX:
-        sessions.extend(list_codex_sessions(directory=directory, limit=limit))
-    if runner_type is None or runner_type == RunnerType.OPENCODE:
-        sessions.extend(list_opencode_sessions(directory=directory, limit=limit))
-    if runner_type is None or runner_type == RunnerType.PI:
-        sessions.extend(list_pi_sessions(directory=directory, limit=limit))
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(len(providers), MAX_DISCOVERY_WORKERS)),
+        thread_name_prefix="agent-sessions",
+    )
+    try:
+        for provider_type, list_sessions in providers:
+            executor.submit(contextvars.copy_context().run, run, provider_type, list_sessions)
 
-    sessions.sort(key=lambda s: s.last_activity, reverse=True)
-    return sessions[:limit]
+        results: list[list[SessionSummary]] = []
+        failed: list[RunnerType] = []
+        # For ordered output: held-back summaries as a heap of (-mtime, seq,
+        # summary), and the mtime of the last summary of each running
+        # provider (every later one is older).
+        held: list[tuple[float, int, SessionSummary]] = []
+        watermarks = {provider_type: math.inf for provider_type, _ in providers}
+        sequence = itertools.count()
+        yielded = 0
+        unfinished: set[RunnerType] = set()
+
+        while watermarks:
+            try:
+                provider_type, mtime, item = events.get(
+                    timeout=None if until is None else max(0.0, until - time.monotonic())
+                )
+            except queue.Empty:
+                # Out of time: give up on the providers still running.
+                unfinished = set(watermarks)
+                watermarks.clear()
+            else:
+                if mtime is not None:
+                    if not ordered:
+                        yield item
+                        continue
+                    watermarks[provider_type] = mtime
+                    heapq.heappush(held, (-mtime, next(sequence), item))
+                else:
+                    del watermarks[provider_type]
+                    if isinstance(item, Exception):
+                        _log_provider_failure(provider_type, item)
+                        failed.append(provider_type)
+                    else:
+                        results.append(item)
+            horizon = max(watermarks.values(), default=-math.inf)
+            while held and -held[0][0] >= horizon and yielded < limit:
+                yield heapq.heappop(held)[2]
+                yielded += 1
+    finally:
+        # Closing the generator early does not wait for the providers.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    yield DiscoveryComplete(
+        sessions=_merge_results(results, limit),
+        failed=failed,
+        incomplete=_incomplete(incomplete, unfinished),
+    )
+
+
+def _listing_providers(
+    runner_type: RunnerType | None,
+    query: SessionQuery | None = None,
+) -> list[tuple[RunnerType, Callable[..., list[SessionSummary]]]]:
+    """Return the list function of every provider selected by ``runner_type``.
+
+    Providers that ``query`` excludes are not run at all.
+
+    Looked up at call time so the module-level names can be patched.
+    """
+    return [
+        (provider_type, list_sessions)
+        for provider_type, list_sessions in (
+            (RunnerType.CLAUDE_CODE, list_claude_sessions),
+            (RunnerType.CODEX, list_codex_sessions),
+            (RunnerType.OPENCODE, list_opencode_sessions),
+            (RunnerType.PI, list_pi_sessions),
+        )
+        if (runner_type is None or runner_type == provider_type)
+        and (query is None or query.includes(provider_type))
+    ]
+
+
+def _log_provider_failure(provider_type: RunnerType, exc: BaseException) -> None:
+    logger.warning(
+        "Session provider failed",
+        extra={"runner_type": provider_type.value, "error": str(exc)},
+    )
+
+
+def _merge_results(results: list[list[SessionSummary]], limit: int) -> list[SessionSummary]:
+    # Each provider returns its sessions sorted by last_activity descending.
+    merged = heapq.merge(*results, key=lambda s: s.last_activity, reverse=True)
+    return list(itertools.islice(merged, max(limit, 0)))
 
 
 def get_session_detail(
@@ -77,35 +337,104 @@ def get_session_detail(
     Returns:
         Session detail with messages, or None if not found.
     """
-    if runner_type == RunnerType.CLAUDE_CODE:
-        return get_claude_session_detail(session_id, limit=limit)
-    if runner_type == RunnerType.CODEX:
-        return get_codex_session_detail(session_id, limit=limit)
-    if runner_type == RunnerType.OPENCODE:
-        return get_opencode_session_detail(session_id, limit=limit)
-    if runner_type == RunnerType.PI:
-        return get_pi_session_detail(session_id, limit=limit)
-    return None
+    get_detail = {
+        RunnerType.CLAUDE_CODE: get_claude_session_detail,
+        RunnerType.CODEX: get_codex_session_detail,
+        RunnerType.OPENCODE: get_opencode_session_detail,
+        RunnerType.PI: get_pi_session_detail,
+    }.get(runner_type)
+    if get_detail is None:
+        return None
+    return metrics.call_provider(runner_type.value, get_detail, session_id, limit=limit)
 
 
+def get_session_messages(
+    session_id: str,
+    runner_type: RunnerType,
+    offset: int = 0,
+    limit: int = 50,
+) -> SessionMessagePage | None:
+    """Load one page of a session's message history.
+
+    Pages are read without parsing the rest of the session, so this suits
+    transcript views that scroll through long sessions.
+
+    Args:
+        session_id: The session UUID.
+        runner_type: Which agent created the session.
+        offset: Index of the first message; negative values count from the
+            end (``offset=-limit`` is the last page).
+        limit: Maximum messages to return.
+
+    Returns:
+        The page, or None if not found.
+    """
+    get_messages = {
+        RunnerType.CLAUDE_CODE: get_claude_session_messages,
+        RunnerType.CODEX: get_codex_session_messages,
+        RunnerType.OPENCODE: get_opencode_session_messages,
+        RunnerType.PI: get_pi_session_messages,
+    }.get(runner_type)
+    if get_messages is None:
+        return None
+    return metrics.call_provider(
+        runner_type.value, get_messages, session_id, offset=offset, limit=limit
+    )
+
+
+from agent_sessions.aio import (  # noqa: E402  (needs the functions above)
+    adiscover_sessions,
+    afollow_session,
+    aget_session_detail,
+    aget_session_messages,
+    awatch_sessions,
+)
+
 __all__ = [
     # Main API
     "discover_sessions",
+    "discover_sessions_iter",
     "get_session_detail",
+    "get_session_messages",
+    "search_sessions",
+    "watch_sessions",
+    "follow_session",
+    "Catalog",
+    # asyncio API
+    "adiscover_sessions",
+    "aget_session_detail",
+    "aget_session_messages",
+    "awatch_sessions",
+    "afollow_session",
+    # Instrumentation
+    "collect_stats",
+    "CallStats",
+    "Counters",
     # Models
+    "ChangeKind",
+    "DiscoveryComplete",
     "RunnerType",
+    "SearchHit",
+    "SessionChange",
     "SessionDetail",
+    "SessionList",
     "SessionMessage",
+    "SessionMessagePage",
+    "SessionQuery",
     "SessionSummary",
     # Per-provider
     "list_claude_sessions",
     "get_claude_session_detail",
+    "get_claude_session_messages",
     "list_codex_sessions",
     "get_codex_session_detail",
+    "get_codex_session_messages",
     "list_opencode_sessions",
     "get_opencode_session_detail",
+    "get_opencode_session_messages",
     "list_pi_sessions",
     "get_pi_session_detail",
+    "get_pi_session_messages",
     # Process detection
     "is_claude_session_running",
     "is_codex_session_running",
@@ -0,0 +1,217 @@
+"""asyncio API for embedding agent-sessions in event-loop based applications.
+
+The synchronous API reads files, queries SQLite and may run ``ps``, all of
+which would block an event loop.  The coroutines here run that work in worker
+threads, at most ``max_concurrency`` at a time per call, and detect running
+sessions either from ``/proc`` (off-loop) or through
+``asyncio.create_subprocess_exec``, so the loop is never blocked.
+
+Cancelling a coroutine returns control immediately; worker threads that are
+already reading a file finish in the background and their results are
+discarded.  A ``ps`` subprocess is killed on cancellation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import TypeVar
+
+import agent_sessions
+from agent_sessions import metrics, running
+from agent_sessions.models import (
+    RunnerType,
+    SessionChange,
+    SessionDetail,
+    SessionMessage,
+    SessionMessagePage,
+    SessionSummary,
+)
+from agent_sessions.query import SessionQuery
+from agent_sessions.running import ProcessSnapshot
+from agent_sessions.watch import SessionWatcher, open_session_follower
+
+T = TypeVar("T")
+
+# Seconds to wait for ``ps``, as in the synchronous fallback.
+_PS_TIMEOUT = 5.0
+
+
+async def _aread_ps() -> list[running.ProcessInfo]:
+    """Read command lines from ``ps aux`` without blocking the loop."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ps",
+            "aux",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except (FileNotFoundError, PermissionError):
+        return []
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), _PS_TIMEOUT)
+    except TimeoutError:
+        _kill(process)
+        return []
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+    if process.returncode != 0:
+        return []
+    return running.parse_ps(stdout.decode("utf-8", "replace"))
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def aget_process_snapshot(max_age: float | None = None) -> ProcessSnapshot:
+    """Async counterpart of ``running.get_process_snapshot``.
+
+    The snapshot is shared with the synchronous API, so provider calls made
+    afterwards (within ``AGENT_SESSIONS_PROCESS_TTL``) reuse it.
+    """
+    snapshot = running.cached_snapshot(max_age)
+    if snapshot is not None:
+        return snapshot
+    start = time.perf_counter()
+    processes = await asyncio.to_thread(running.read_proc)
+    if processes is None:
+        processes = await _aread_ps()
+    metrics.record_process_scan(time.perf_counter() - start)
+    return running.install_snapshot(processes)
+
+
+async def _run(semaphore: asyncio.Semaphore, func: Callable[..., T], *args, **kwargs) -> T:
+    async with semaphore:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def adiscover_sessions(
+    directory: str | None = None,
+    runner_type: RunnerType | None = None,
+    limit: int = 50,
+    max_concurrency: int | None = None,
+    query: SessionQuery | None = None,
+) -> list[SessionSummary]:
+    """Async version of ``discover_sessions``.
+
+    Args:
+        directory: Filter to sessions for this project directory.
+        runner_type: Filter to a specific agent type.
+        limit: Maximum sessions to return.
+        max_concurrency: Maximum providers scanned at once; defaults to
+            ``MAX_DISCOVERY_WORKERS``.
+        query: Further conditions, as in ``discover_sessions``.
+
+    Returns:
+        List of session summaries, sorted by last_activity descending.
+    """
+    if max_concurrency is None:
+        max_concurrency = agent_sessions.MAX_DISCOVERY_WORKERS
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    providers = agent_sessions._listing_providers(runner_type, query)
+
+    await aget_process_snapshot()
+    # Cancelling this coroutine cancels every pending provider call.
+    outcomes = await asyncio.gather(
+        *(
+            _run(
+                semaphore,
+                metrics.call_provider,
+                provider_type.value,
+                list_sessions,
+                directory=directory,
+                limit=limit,
+                query=query,
+            )
+            for provider_type, list_sessions in providers
+        ),
+        return_exceptions=True,
+    )
+
+    results: list[list[SessionSummary]] = []
+    for (provider_type, _), outcome in zip(providers, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, BaseException):
+            agent_sessions._log_provider_failure(provider_type, outcome)
+            continue
+        results.append(outcome)
+    return agent_sessions._merge_results(results, limit)
+
+
+async def aget_session_detail(
+    session_id: str,
+    runner_type: RunnerType,
+    limit: int = 100,
+) -> SessionDetail | None:
+    """Async version of ``get_session_detail``."""
+    await aget_process_snapshot()
+    return await asyncio.to_thread(
+        agent_sessions.get_session_detail, session_id, runner_type, limit=limit
+    )
+
+
+async def aget_session_messages(
+    session_id: str,
+    runner_type: RunnerType,
+    offset: int = 0,
+    limit: int = 50,
+) -> SessionMessagePage | None:
+    """Async version of ``get_session_messages``."""
+    return await asyncio.to_thread(
+        agent_sessions.get_session_messages,
+        session_id,
+        runner_type,
+        offset=offset,
+        limit=limit,
+    )
+
+
+async def awatch_sessions(
+    directory: str | None = None,
+    runner_type: RunnerType | None = None,
+    interval: float = 1.0,
+    debounce: float = 0.25,
+) -> AsyncIterator[SessionChange]:
+    """Async version of ``watch_sessions``.
+
+    Waiting for events happens in a worker thread, ``interval`` seconds at a
+    time, so cancelling the consumer stops the watch within ``interval``.
+    """
+    watcher = await asyncio.to_thread(SessionWatcher, directory, runner_type, interval, debounce)
+    try:
+        while True:
+            for change in await asyncio.to_thread(watcher.poll, interval):
+                yield change
+    finally:
+        watcher.close()
+
+
+async def afollow_session(
+    session_id: str,
+    runner_type: RunnerType,
+    start: int | None = None,
+    interval: float = 1.0,
+) -> AsyncIterator[SessionMessage]:
+    """Async version of ``follow_session``."""
+    follower = await asyncio.to_thread(
+        open_session_follower, session_id, runner_type, start, interval
+    )
+    if follower is None:
+        return
+    try:
+        while True:
+            messages = await asyncio.to_thread(follower.poll, interval)
+            if messages is None:
+                return
+            for message in messages:
+                yield message
+    finally:
+        follower.close()
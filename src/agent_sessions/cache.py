@@ -0,0 +1,423 @@
+"""Persistent on-disk cache for parsed session summaries.
+
+Parsing JSONL transcripts is the dominant cost of discovery.  Parsed summaries
+are stored in a small SQLite database keyed by the identity of the source file
+``(path, size, mtime_ns, inode)``, so files that have not changed since the
+last scan are answered from the cache without being opened.
+
+The cache lives at ``$AGENT_SESSIONS_CACHE_DIR/cache.db`` (defaulting to
+``$XDG_CACHE_HOME/agent-sessions`` or ``~/.cache/agent-sessions``) and can be
+disabled entirely by setting ``AGENT_SESSIONS_NO_CACHE=1``.
+
+When a file has grown since it was cached, the stored parser state and byte
+checkpoint are used to parse only the appended records (see
+``agent_sessions.jsonl``).  Every row records the parser version of the
+provider that wrote it, so bumping a provider's ``_PARSER_VERSION``
+invalidates its entries.  The database runs in WAL mode with a busy timeout,
+which makes it safe to share between processes.  Any SQLite error degrades
+the cache to a no-op rather than failing discovery.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import NamedTuple, Protocol
+
+from agent_sessions import metrics
+from agent_sessions.jsonl import Checkpoint, parse_incremental
+from agent_sessions.models import RunnerType, SessionSummary
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "cache.db"
+
+# Bump when the table layout changes; older databases are rebuilt.
+SCHEMA_VERSION = 5
+
+
+def cache_directory() -> Path | None:
+    """Resolve the cache directory, or None when caching is disabled."""
+    if os.environ.get("AGENT_SESSIONS_NO_CACHE", "").strip() not in ("", "0"):
+        return None
+    value = os.environ.get("AGENT_SESSIONS_CACHE_DIR")
+    if value:
+        return Path(value).expanduser()
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache:
+        return Path(xdg_cache) / "agent-sessions"
+    return Path.home() / ".cache" / "agent-sessions"
+
+
+def cache_db_path() -> Path | None:
+    cache_dir = cache_directory()
+    if cache_dir is None:
+        return None
+    return cache_dir / DB_FILENAME
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS summary (
+            provider TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            offset INTEGER NOT NULL DEFAULT 0,
+            signature BLOB,
+            state TEXT,
+            PRIMARY KEY (provider, path)
+        )
+        """)
+    # Session ID -> file index used by ``agent_sessions.locator``.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_location (
+            provider TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            PRIMARY KEY (provider, session_id)
+        )
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS session_location_directory
+        ON session_location (provider, directory)
+        """)
+    # Per-file message offsets used by ``agent_sessions.message_index``.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS message_index (
+            provider TEXT NOT NULL,
+            path TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            signature BLOB NOT NULL,
+            positions BLOB NOT NULL,
+            PRIMARY KEY (provider, path)
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS indexed_dir (
+            provider TEXT NOT NULL,
+            path TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            PRIMARY KEY (provider, path)
+        )
+        """)
+    # Full-text index of message text used by ``agent_sessions.search``.  A
+    # source is a session file, or an OpenCode session (``offset`` then holds
+    # its ``time_updated``).
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_source (
+            provider TEXT NOT NULL,
+            source TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            session_id TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            signature BLOB NOT NULL,
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (provider, source)
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_message (
+            rowid INTEGER PRIMARY KEY,
+            provider TEXT NOT NULL,
+            source TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            timestamp TEXT,
+            content TEXT NOT NULL
+        )
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS search_message_source ON search_message (provider, source)
+        """)
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_text USING fts5(
+                content,
+                content = 'search_message',
+                content_rowid = 'rowid',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: everything but search still works.
+        return
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_message_insert AFTER INSERT ON search_message
+        BEGIN
+            INSERT INTO search_text (rowid, content) VALUES (new.rowid, new.content);
+        END
+        """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_message_delete AFTER DELETE ON search_message
+        BEGIN
+            INSERT INTO search_text (search_text, rowid, content)
+            VALUES ('delete', old.rowid, old.content);
+        END
+        """)
+
+
+def connect_cache() -> sqlite3.Connection | None:
+    """Open the cache database, creating or migrating it as needed.
+
+    Returns None when caching is disabled or the database cannot be opened.
+    """
+    db_path = cache_db_path()
+    if db_path is None:
+        return None
+
+    try:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = metrics.trace_queries(
+            sqlite3.connect(str(db_path), timeout=5.0, isolation_level=None)
+        )
+    except (OSError, sqlite3.Error) as exc:
+        logger.debug("Session cache unavailable", extra={"error": str(exc)})
+        return None
+
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        (user_version,) = conn.execute("PRAGMA user_version").fetchone()
+        if user_version != SCHEMA_VERSION:
+            conn.execute("BEGIN IMMEDIATE")
+            # Re-check under the write lock in case another process migrated.
+            (user_version,) = conn.execute("PRAGMA user_version").fetchone()
+            if user_version != SCHEMA_VERSION:
+                # Virtual tables first: dropping one drops its shadow tables.
+                tables = conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    "ORDER BY sql LIKE 'CREATE VIRTUAL TABLE%' DESC"
+                ).fetchall()
+                for (table,) in tables:
+                    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+                create_schema(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+    except sqlite3.Error as exc:
+        logger.debug("Failed to initialise session cache", extra={"error": str(exc)})
+        conn.close()
+        return None
+    return conn
+
+
+class CacheEntry(NamedTuple):
+    """A cached summary row."""
+
+    size: int
+    mtime_ns: int
+    inode: int
+    version: int
+    data: dict | None
+    checkpoint: Checkpoint | None
+    state: dict | None
+
+    def is_fresh(self, st: os.stat_result, version: int) -> bool:
+        """Return True if the entry describes the file exactly as it is now."""
+        return (self.size, self.mtime_ns, self.inode, self.version) == (
+            st.st_size,
+            st.st_mtime_ns,
+            st.st_ino,
+            version,
+        )
+
+
+class SummaryCache:
+    """Stat-keyed cache of session summaries for one provider.
+
+    Use as a context manager around a listing pass.  Lookups are served from
+    a single connection and new entries are written in one transaction when
+    the context exits.
+
+    Args:
+        provider: Cache namespace, normally the provider's runner type value.
+        version: Parser version; entries written by another version are misses.
+    """
+
+    def __init__(self, provider: str, version: int) -> None:
+        self.provider = provider
+        self.version = version
+        self._conn: sqlite3.Connection | None = None
+        self._pending: list[tuple] = []
+
+    def __enter__(self) -> SummaryCache:
+        self._conn = connect_cache()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def get(self, path: Path) -> CacheEntry | None:
+        """Return the cached entry for ``path`` written by this parser version.
+
+        ``data`` is either a dict of summary fields (without ``is_running``) or
+        None when the file is known not to contain a usable session.
+        """
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, version, data, offset, signature, state "
+                "FROM summary WHERE provider = ? AND path = ? AND version = ?",
+                (self.provider, str(path), self.version),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        size, mtime_ns, inode, version, data, offset, signature, state = row
+        try:
+            data = json.loads(data)
+            state = json.loads(state) if state else None
+        except (json.JSONDecodeError, TypeError):
+            return None
+        checkpoint = None
+        if state is not None and signature is not None:
+            checkpoint = Checkpoint(inode=inode, offset=offset, signature=bytes(signature))
+        return CacheEntry(size, mtime_ns, inode, version, data, checkpoint, state)
+
+    def put(
+        self,
+        path: Path,
+        st: os.stat_result,
+        data: dict | None,
+        checkpoint: Checkpoint | None = None,
+        state: dict | None = None,
+    ) -> None:
+        """Queue a summary (or a negative result) for ``path``.
+
+        ``checkpoint`` and ``state`` allow a later lookup to resume parsing
+        from where this one stopped.
+        """
+        if self._conn is None:
+            return
+        self._pending.append(
+            (
+                self.provider,
+                str(path),
+                st.st_size,
+                st.st_mtime_ns,
+                st.st_ino,
+                self.version,
+                json.dumps(data),
+                checkpoint.offset if checkpoint else 0,
+                checkpoint.signature if checkpoint else None,
+                json.dumps(state) if state is not None else None,
+            )
+        )
+
+    def flush(self) -> None:
+        """Write queued entries in a single transaction."""
+        if self._conn is None or not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summary "
+                "(provider, path, size, mtime_ns, inode, version, data, "
+                "offset, signature, state) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                pending,
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            logger.debug("Failed to write session cache", extra={"error": str(exc)})
+            try:
+                self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+
+class SummaryState(Protocol):
+    """Incremental summary parser state, as implemented by each JSONL provider.
+
+    States are dataclasses so they can be stored in the cache.
+    """
+
+    def feed(self, record: dict) -> None: ...
+
+    def to_summary(
+        self, session_file: Path, running_sessions: set[str]
+    ) -> SessionSummary | None: ...
+
+
+def cached_summary(
+    cache: SummaryCache,
+    session_file: Path,
+    running_sessions: set[str],
+    state_type: type[SummaryState],
+    st: os.stat_result | None = None,
+) -> SessionSummary | None:
+    """Return the summary for ``session_file``, parsing as little as possible.
+
+    Unchanged files are answered from the cache without being opened.  Files
+    that grew since they were cached are parsed from the stored checkpoint.
+    ``is_running`` is never cached; it is recomputed from ``running_sessions``.
+    Pass ``st`` when the file was already stat'ed while scanning.
+    """
+    if st is None:
+        metrics.record_stat()
+        try:
+            st = session_file.stat()
+        except OSError:
+            return None
+
+    entry = cache.get(session_file)
+    fresh = entry is not None and entry.is_fresh(st, cache.version)
+    metrics.record_cache(fresh)
+    if fresh:
+        if entry.data is None:
+            return None
+        # Written by model_dump of a validated summary: no need to validate again.
+        return SessionSummary.model_construct(
+            **{
+                **entry.data,
+                "runner_type": RunnerType(entry.data["runner_type"]),
+                "is_running": entry.data["id"] in running_sessions,
+            }
+        )
+
+    resume = None
+    if entry is not None and entry.checkpoint is not None:
+        try:
+            resume = (entry.checkpoint, state_type(**entry.state))
+        except TypeError:
+            resume = None
+
+    try:
+        checkpoint, state, result = parse_incremental(session_file, state_type, resume)
+        summary = result.to_summary(session_file, running_sessions)
+    except Exception as exc:
+        logger.warning(
+            "Failed to parse session file",
+            extra={"session_file": str(session_file), "error": str(exc)},
+        )
+        return None
+
+    data = None
+    if summary is not None:
+        data = summary.model_dump(mode="json", exclude={"is_running"})
+    cache.put(session_file, st, data, checkpoint, dataclasses.asdict(state))
+    return summary
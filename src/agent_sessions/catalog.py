@@ -0,0 +1,684 @@
+"""A local SQLite catalog of every session and its messages.
+
+Tools that repeatedly ask for the same sessions (dashboards, CLIs, reports)
+can keep them in one catalog database instead of re-deriving them from each
+provider's store.  ``Catalog.sync`` brings it up to date incrementally:
+
+* session files are read from the checkpoint of the previous sync, so only
+  appended messages are parsed; rewritten files are ingested again and
+  deleted files are dropped;
+* OpenCode sessions are ingested again when their ``time_updated`` changes.
+
+Summaries come from the same (cached) parsers as ``discover_sessions`` and
+messages from the detail parsers, so a message's ``position`` is its offset
+for ``get_session_messages``.  Reads are plain SQL on one open connection.
+Whether a session is running is never stored; it is looked up in the
+process table when sessions are read.
+
+The catalog schema is meant for ad-hoc queries::
+
+    session (runner_type, id, directory, first_prompt, last_prompt,
+             last_activity, activity, message_count, source)
+    message (runner_type, session_id, position, role, content, thinking,
+             timestamp)
+
+``activity`` is ``last_activity`` in epoch seconds and ``source`` the session
+file (or the OpenCode database).  The ``sync_source`` table is bookkeeping.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple
+
+from agent_sessions import metrics
+from agent_sessions.cache import SummaryCache, cache_directory, cached_summary
+from agent_sessions.jsonl import Checkpoint
+from agent_sessions.message_index import extend_positions
+from agent_sessions.models import (
+    MessageRecord,
+    RunnerType,
+    SessionDetail,
+    SessionMessage,
+    SessionSummary,
+)
+from agent_sessions.path_utils import normalize_directory_path
+from agent_sessions.providers import opencode
+from agent_sessions.query import SessionQuery
+from agent_sessions.running import find_running_opencode_sessions
+from agent_sessions.scanning import Candidate, parse_timestamp
+from agent_sessions.session_files import FileProvider, file_providers
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "catalog.db"
+
+# Bump when the table layout changes; older catalogs are rebuilt.
+SCHEMA_VERSION = 1
+
+# Bump when the ingested data changes; older sources are ingested again.
+_CATALOG_VERSION = 1
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session (
+            runner_type TEXT NOT NULL,
+            id TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            first_prompt TEXT,
+            last_prompt TEXT,
+            last_activity TEXT NOT NULL,
+            activity REAL,
+            message_count INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            PRIMARY KEY (runner_type, id)
+        )
+        """)
+    conn.execute("CREATE INDEX IF NOT EXISTS session_last_activity ON session (last_activity)")
+    conn.execute("CREATE INDEX IF NOT EXISTS session_directory ON session (directory)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS message (
+            runner_type TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            thinking TEXT,
+            timestamp TEXT,
+            PRIMARY KEY (runner_type, session_id, position)
+        )
+        """)
+    # What has been ingested from each source: a session file, or an
+    # OpenCode session (``changed`` then holds its ``time_updated``).
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_source (
+            runner_type TEXT NOT NULL,
+            source TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            session_id TEXT NOT NULL,
+            changed INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            signature BLOB NOT NULL,
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (runner_type, source)
+        )
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS sync_source_session ON sync_source (runner_type, session_id)
+        """)
+
+
+class _Source(NamedTuple):
+    """A ``sync_source`` row."""
+
+    version: int
+    session_id: str
+    changed: int
+    inode: int
+    offset: int
+    signature: bytes
+    messages: int
+
+
+_SOURCE_COLUMNS = "version, session_id, changed, inode, offset, signature, messages"
+
+# Parsed sessions are written once about this many messages are pending, each
+# batch in its own short transaction so other processes can sync meanwhile.
+_BATCH_MESSAGES = 2000
+
+
+class _Update(NamedTuple):
+    """A parsed source, to be written over ``previous``.
+
+    ``summary`` is None when the source no longer holds a session.
+    """
+
+    source: str
+    previous: _Source | None
+    location: str
+    entry: _Source | None
+    summary: SessionSummary | None
+    records: list[MessageRecord]
+    start: int
+    append: bool
+
+
+def _synced_sources(conn: sqlite3.Connection, runner_type: str) -> dict[str, _Source]:
+    rows = conn.execute(
+        f"SELECT source, {_SOURCE_COLUMNS} FROM sync_source WHERE runner_type = ?",
+        (runner_type,),
+    ).fetchall()
+    return {row[0]: _Source(*row[1:]) for row in rows}
+
+
+def _store(
+    conn: sqlite3.Connection,
+    source: str,
+    location: str,
+    entry: _Source,
+    summary: SessionSummary,
+    records: list[MessageRecord],
+    start: int,
+    append: bool,
+) -> None:
+    """Store a session's summary, its ``records`` from ``start`` and ``entry``.
+
+    ``location`` is the file (or database) the session was read from.
+    """
+    runner_type = summary.runner_type.value
+    if not append:
+        conn.execute(
+            "DELETE FROM message WHERE runner_type = ? AND session_id = ?",
+            (runner_type, summary.id),
+        )
+    conn.executemany(
+        "INSERT OR REPLACE INTO message "
+        "(runner_type, session_id, position, role, content, thinking, timestamp) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                runner_type,
+                summary.id,
+                position,
+                record.role,
+                record.content,
+                record.thinking,
+                record.timestamp if isinstance(record.timestamp, str) else None,
+            )
+            for position, record in enumerate(records, start)
+        ],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO session "
+        "(runner_type, id, directory, first_prompt, last_prompt, last_activity, activity, "
+        "message_count, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            runner_type,
+            summary.id,
+            summary.directory,
+            summary.first_prompt,
+            summary.last_prompt,
+            summary.last_activity,
+            parse_timestamp(summary.last_activity),
+            summary.message_count,
+            location,
+        ),
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO sync_source "
+        "(runner_type, source, version, session_id, changed, inode, offset, signature, "
+        "messages) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (runner_type, source, *entry),
+    )
+
+
+def _forget(conn: sqlite3.Connection, runner_type: str, source: str, entry: _Source) -> None:
+    """Drop a source, and its session unless another source has taken it over."""
+    conn.execute(
+        "DELETE FROM sync_source WHERE runner_type = ? AND source = ?", (runner_type, source)
+    )
+    taken = conn.execute(
+        "SELECT 1 FROM sync_source WHERE runner_type = ? AND session_id = ?",
+        (runner_type, entry.session_id),
+    ).fetchone()
+    if taken is None:
+        conn.execute(
+            "DELETE FROM session WHERE runner_type = ? AND id = ?", (runner_type, entry.session_id)
+        )
+        conn.execute(
+            "DELETE FROM message WHERE runner_type = ? AND session_id = ?",
+            (runner_type, entry.session_id),
+        )
+
+
+def _write(conn: sqlite3.Connection, runner_type: str, updates: list[_Update]) -> None:
+    """Apply ``updates`` in one transaction.
+
+    A source whose row changed since it was parsed (another process synced it
+    meanwhile) is left alone; the next sync catches up with it.
+    """
+    if not updates:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for update in updates:
+            row = conn.execute(
+                f"SELECT {_SOURCE_COLUMNS} FROM sync_source WHERE runner_type = ? AND source = ?",
+                (runner_type, update.source),
+            ).fetchone()
+            if (_Source(*row) if row is not None else None) != update.previous:
+                continue
+            previous = update.previous
+            if previous is not None and (
+                update.summary is None or previous.session_id != update.summary.id
+            ):
+                _forget(conn, runner_type, update.source, previous)
+            if update.summary is not None:
+                _store(
+                    conn,
+                    update.source,
+                    update.location,
+                    update.entry,
+                    update.summary,
+                    update.records,
+                    update.start,
+                    update.append,
+                )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class _Batch:
+    """Collects updates and writes them whenever enough messages are pending."""
+
+    def __init__(self, conn: sqlite3.Connection, runner_type: str) -> None:
+        self._conn = conn
+        self._runner_type = runner_type
+        self._updates: list[_Update] = []
+        self._messages = 0
+
+    def add(self, update: _Update) -> None:
+        self._updates.append(update)
+        self._messages += len(update.records)
+        if self._messages >= _BATCH_MESSAGES:
+            self.flush()
+
+    def flush(self) -> None:
+        updates, self._updates, self._messages = self._updates, [], 0
+        _write(self._conn, self._runner_type, updates)
+
+
+def _ingest_file(
+    cache: SummaryCache,
+    provider: FileProvider,
+    candidate: Candidate,
+    previous: _Source | None,
+) -> _Update | None:
+    """Parse what changed in ``candidate``, or return None if it is unchanged."""
+    path = candidate.path
+    st = candidate.stat
+    version = provider.version * 1000 + _CATALOG_VERSION
+    synced = previous if previous is not None and previous.version == version else None
+    if synced is not None and (synced.inode, synced.changed, synced.offset) == (
+        st.st_ino,
+        st.st_mtime_ns,
+        st.st_size,
+    ):
+        return None
+
+    summary = cached_summary(cache, path, set(), provider.summary_state, st)
+    if summary is None:
+        if previous is None:
+            return None
+        return _Update(str(path), previous, str(path), None, None, [], 0, False)
+
+    resume = None
+    if synced is not None and synced.session_id == summary.id:
+        # Placeholder positions: ``extend_positions`` keeps them only if it resumes.
+        checkpoint = Checkpoint(synced.inode, synced.offset, synced.signature)
+        resume = (checkpoint, array("q", [0]) * synced.messages)
+    records: list[MessageRecord] = []
+    checkpoint, positions, _ = extend_positions(path, provider.detail_state(), resume, records)
+    resumed = resume is not None and len(positions) == synced.messages + len(records)
+
+    start = synced.messages if resumed else 0
+    entry = _Source(
+        version,
+        summary.id,
+        st.st_mtime_ns,
+        checkpoint.inode,
+        checkpoint.offset,
+        checkpoint.signature,
+        start + len(records),
+    )
+    return _Update(str(path), previous, str(path), entry, summary, records, start, resumed)
+
+
+def _forget_missing(
+    conn: sqlite3.Connection, runner_type: str, synced: dict[str, _Source], seen: set[str]
+) -> None:
+    """Drop the synced sources that are not in ``seen`` any more."""
+    gone = [
+        _Update(source, entry, source, None, None, [], 0, False)
+        for source, entry in synced.items()
+        if source not in seen
+    ]
+    _write(conn, runner_type, gone)
+
+
+def _sync_files(conn: sqlite3.Connection, provider: FileProvider) -> None:
+    name = provider.runner_type.value
+    candidates = provider.session_files()
+    synced = _synced_sources(conn, name)
+    batch = _Batch(conn, name)
+    with SummaryCache(name, provider.version) as cache:
+        for candidate in candidates:
+            try:
+                update = _ingest_file(cache, provider, candidate, synced.get(str(candidate.path)))
+            except OSError:
+                continue
+            if update is not None:
+                batch.add(update)
+    batch.flush()
+    _forget_missing(conn, name, synced, {str(c.path) for c in candidates})
+
+
+def _sync_opencode(conn: sqlite3.Connection) -> None:
+    name = RunnerType.OPENCODE.value
+    db_path = opencode.opencode_db_path()
+    synced = _synced_sources(conn, name)
+    sessions: dict[str, int] = {}
+    if db_path.exists():
+        source_conn = metrics.trace_queries(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True))
+        source_conn.row_factory = sqlite3.Row
+        try:
+            sessions = dict(
+                source_conn.execute(
+                    "SELECT id, time_updated FROM session WHERE parent_id IS NULL"
+                ).fetchall()
+            )
+            changed = [
+                session_id
+                for session_id, time_updated in sessions.items()
+                if session_id not in synced
+                or (synced[session_id].version, synced[session_id].changed)
+                != (_CATALOG_VERSION, time_updated)
+            ]
+            summaries = []
+            if changed:
+                summaries = opencode.read_sessions(
+                    source_conn,
+                    db_path,
+                    ["parent_id IS NULL", "id IN (SELECT value FROM json_each(?))"],
+                    [json.dumps(changed)],
+                    0,
+                    None,
+                    set(),
+                )
+            batch = _Batch(conn, name)
+            for summary in summaries:
+                records = opencode.message_range(source_conn, summary.id, 0, -1)
+                entry = _Source(
+                    _CATALOG_VERSION,
+                    summary.id,
+                    sessions[summary.id],
+                    0,
+                    0,
+                    b"",
+                    len(records),
+                )
+                batch.add(
+                    _Update(
+                        summary.id,
+                        synced.get(summary.id),
+                        str(db_path),
+                        entry,
+                        summary,
+                        records,
+                        0,
+                        False,
+                    )
+                )
+            batch.flush()
+        finally:
+            source_conn.close()
+    _forget_missing(conn, name, synced, set(sessions))
+
+
+def _running_sessions(runner_types: list[RunnerType]) -> set[str]:
+    """Return ``"<runner_type> <id>"`` for every running session of ``runner_types``."""
+    finders: dict[RunnerType, Callable[..., set[str]]] = {
+        provider.runner_type: provider.running_sessions for provider in file_providers()
+    }
+    finders[RunnerType.OPENCODE] = find_running_opencode_sessions
+    running: set[str] = set()
+    for runner_type in runner_types:
+        ids = finders[runner_type]()
+        running.update(f"{runner_type.value} {session_id}" for session_id in ids)
+    return running
+
+
+def _lower(value: str | None) -> str | None:
+    # SQLite's lower() only folds ASCII; match SessionQuery.matches instead.
+    return value.lower() if isinstance(value, str) else None
+
+
+def _default_path() -> Path:
+    cache_dir = cache_directory()
+    if cache_dir is None:
+        raise ValueError("Catalog needs a path when the session cache is disabled")
+    return cache_dir / DB_FILENAME
+
+
+class Catalog:
+    """A catalog database of the sessions of every provider.
+
+    Open it once and keep it: reads are served from a single connection.
+    Call ``sync`` whenever the catalog should catch up with the providers.
+    The database is safe to share between processes; a ``Catalog`` object
+    may be shared between threads.
+
+    Args:
+        path: Database file; defaults to ``catalog.db`` in the cache
+            directory (see ``agent_sessions.cache``).
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path).expanduser() if path is not None else _default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        try:
+            self._conn.create_function("py_lower", 1, _lower, deterministic=True)
+            self._migrate()
+        except BaseException:
+            self._conn.close()
+            raise
+
+    def _migrate(self) -> None:
+        conn = self._conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        (user_version,) = conn.execute("PRAGMA user_version").fetchone()
+        if user_version == SCHEMA_VERSION:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another process migrated.
+            (user_version,) = conn.execute("PRAGMA user_version").fetchone()
+            if user_version != SCHEMA_VERSION:
+                for table in ("session", "message", "sync_source"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                create_schema(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __enter__(self) -> Catalog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def sync(self, runner_type: RunnerType | None = None) -> None:
+        """Ingest what changed in the providers' stores since the last sync.
+
+        A provider that fails is logged and skipped; the others are synced.
+
+        Args:
+            runner_type: Only sync this agent type.
+        """
+        syncers: list[tuple[RunnerType, Callable[[], None]]] = [
+            (p.runner_type, lambda p=p: _sync_files(self._conn, p)) for p in file_providers()
+        ]
+        syncers.append((RunnerType.OPENCODE, lambda: _sync_opencode(self._conn)))
+        with self._lock:
+            for provider_type, sync in syncers:
+                if runner_type is not None and runner_type != provider_type:
+                    continue
+                try:
+                    metrics.call_provider(provider_type.value, sync)
+                except Exception as exc:
+                    logger.warning(
+                        "Failed to sync session catalog",
+                        extra={"runner_type": provider_type.value, "error": str(exc)},
+                    )
+
+    def execute(self, sql: str, params: tuple | list | dict = ()) -> list[tuple]:
+        """Run an ad-hoc query on the catalog and return all its rows."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def discover_sessions(
+        self,
+        directory: str | None = None,
+        runner_type: RunnerType | None = None,
+        limit: int = 50,
+        query: SessionQuery | None = None,
+    ) -> list[SessionSummary]:
+        """Return sessions from the catalog, like ``agent_sessions.discover_sessions``.
+
+        Args:
+            directory: Filter to sessions for this project directory.
+            runner_type: Filter to a specific agent type.
+            limit: Maximum sessions to return.
+            query: Further conditions, evaluated in SQL.
+
+        Returns:
+            List of session summaries, sorted by last_activity descending.
+        """
+        runner_types = [
+            t
+            for t in RunnerType
+            if (runner_type is None or t == runner_type) and (query is None or query.includes(t))
+        ]
+        if not runner_types or limit <= 0:
+            return []
+        running = _running_sessions(runner_types)
+
+        conditions = ["runner_type IN (SELECT value FROM json_each(?))"]
+        params: list = [json.dumps([t.value for t in runner_types])]
+        if directory:
+            conditions.append("directory IN (?, ?)")
+            params.extend([directory, normalize_directory_path(directory)])
+        if query is not None:
+            if query.root is not None:
+                prefix = query.root.rstrip("/") + "/"
+                conditions.append("(directory = ? OR substr(directory, 1, ?) = ?)")
+                params.extend([query.root, len(prefix), prefix])
+            if query.since_ts is not None:
+                conditions.append("(activity IS NULL OR activity >= ?)")
+                params.append(query.since_ts)
+            if query.until_ts is not None:
+                conditions.append("(activity IS NULL OR activity <= ?)")
+                params.append(query.until_ts)
+            if query.running:
+                conditions.append("runner_type || ' ' || id IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(sorted(running)))
+            if query.min_messages > 0:
+                conditions.append("message_count >= ?")
+                params.append(query.min_messages)
+            if query.prompt:
+                conditions.append(
+                    "(instr(py_lower(first_prompt), ?) OR instr(py_lower(last_prompt), ?))"
+                )
+                params.extend([query.prompt.lower()] * 2)
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT runner_type, id, directory, first_prompt, last_prompt, last_activity, "
+                f"message_count FROM session WHERE {' AND '.join(conditions)} "
+                "ORDER BY last_activity DESC LIMIT ?",
+                params,
+            ).fetchall()
+        return [
+            SessionSummary.model_construct(
+                id=session_id,
+                runner_type=RunnerType(runner),
+                directory=session_directory,
+                first_prompt=first_prompt,
+                last_prompt=last_prompt,
+                last_activity=last_activity,
+                message_count=message_count,
+                is_running=f"{runner} {session_id}" in running,
+            )
+            for (
+                runner,
+                session_id,
+                session_directory,
+                first_prompt,
+                last_prompt,
+                last_activity,
+                message_count,
+            ) in rows
+        ]
+
+    def get_session_detail(
+        self,
+        session_id: str,
+        runner_type: RunnerType,
+        limit: int = 100,
+    ) -> SessionDetail | None:
+        """Return a session and its last ``limit`` messages from the catalog.
+
+        Args:
+            session_id: The session UUID.
+            runner_type: Which agent created the session.
+            limit: Maximum messages to return; 0 or less returns them all.
+
+        Returns:
+            Session detail with messages, or None if the session is not in
+            the catalog.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT directory, first_prompt, last_prompt, last_activity FROM session "
+                "WHERE runner_type = ? AND id = ?",
+                (runner_type.value, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self._conn.execute(
+                "SELECT role, content, thinking, timestamp FROM ("
+                "  SELECT position, role, content, thinking, timestamp FROM message"
+                "  WHERE runner_type = ? AND session_id = ? ORDER BY position DESC LIMIT ?"
+                ") ORDER BY position",
+                (runner_type.value, session_id, limit if limit > 0 else -1),
+            ).fetchall()
+        directory, first_prompt, last_prompt, last_activity = row
+        return SessionDetail(
+            id=session_id,
+            runner_type=runner_type,
+            directory=directory,
+            first_prompt=first_prompt,
+            last_prompt=last_prompt,
+            last_activity=last_activity,
+            message_count=len(messages),
+            is_running=f"{runner_type.value} {session_id}" in _running_sessions([runner_type]),
+            messages=[
+                SessionMessage.model_construct(
+                    role=role, content=content, thinking=thinking, timestamp=timestamp
+                )
+                for role, content, thinking, timestamp in messages
+            ],
+        )
@@ -0,0 +1,99 @@
+"""Time budgets for discovery.
+
+``discover_sessions(timeout_ms=...)`` and the ``list_*`` functions can be
+given a budget.  The deadline is kept in a context variable, like the
+counters in ``metrics``, and the slow steps check it as they go:
+
+* listing stops before the next project directory or date partition;
+* parsing stops before the next session file;
+* OpenCode queries are interrupted by an SQLite progress handler, and waits
+  for a locked database end at the deadline;
+* ``ps`` is killed at the deadline.
+
+Whatever was gathered by then is returned, and each step that was cut short
+records where in the ``incomplete`` mapping of the result.  Outside a budget
+every check is a single context-variable lookup.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from agent_sessions.models import RunnerType, SessionList, SessionSummary
+
+# Progress handler granularity, in SQLite virtual machine instructions.
+_PROGRESS_INSTRUCTIONS = 1000
+
+
+@dataclass
+class _Budget:
+    deadline: float  # time.monotonic()
+    incomplete: list[str]
+
+
+_budget: ContextVar[_Budget | None] = ContextVar("agent_sessions_budget", default=None)
+
+
+@contextmanager
+def budget(deadline: float, incomplete: list[str]) -> Iterator[None]:
+    """Run one provider's work inside the block until ``deadline``.
+
+    Args:
+        deadline: A ``time.monotonic()`` value.
+        incomplete: Receives the locations the provider did not finish.
+    """
+    token = _budget.set(_Budget(deadline, incomplete))
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+
+def expired() -> bool:
+    """Return True if the current budget has run out."""
+    current = _budget.get()
+    return current is not None and time.monotonic() >= current.deadline
+
+
+def remaining(default: float) -> float:
+    """Seconds left in the current budget, at most ``default``."""
+    current = _budget.get()
+    if current is None:
+        return default
+    return max(0.0, min(default, current.deadline - time.monotonic()))
+
+
+def mark_incomplete(*locations: str) -> None:
+    """Record that the current provider did not finish scanning ``locations``."""
+    current = _budget.get()
+    if current is None:
+        return
+    marked = current.incomplete
+    marked.extend(location for location in locations if location not in marked)
+
+
+def interrupt_when_expired(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Abort statements on ``conn`` (with ``OperationalError``) at the deadline."""
+    current = _budget.get()
+    if current is not None:
+        deadline = current.deadline
+        conn.set_progress_handler(lambda: time.monotonic() >= deadline, _PROGRESS_INSTRUCTIONS)
+    return conn
+
+
+def run_with_timeout(
+    timeout_ms: int,
+    runner_type: RunnerType,
+    list_sessions: Callable[..., list[SessionSummary]],
+    **kwargs,
+) -> SessionList:
+    """Call a ``list_*`` function under a budget of ``timeout_ms``."""
+    incomplete: list[str] = []
+    with budget(time.monotonic() + timeout_ms / 1000, incomplete):
+        sessions = list_sessions(**kwargs)
+    return SessionList(sessions, {runner_type: incomplete} if incomplete else {})
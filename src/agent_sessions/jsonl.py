@@ -0,0 +1,468 @@
+"""Incremental reading of append-only JSONL session files.
+
+Claude Code, Codex and Pi only ever append to their session files.  Instead of
+re-reading a live transcript from byte 0 on every poll, parsers keep a
+``Checkpoint`` (the byte offset just past the last complete line) together with
+their running parse state, and resume from there on the next call.
+
+A final line without a trailing newline may still be in the middle of being
+written.  It is never included in the checkpoint; if it already decodes as
+JSON it is applied to a copy of the state so the caller sees it, and it is
+read again on the next call.
+
+Most lines of a transcript are records the parsers ignore (progress events,
+tool output, reasoning), and some of them are megabytes long.  A parse state
+may define ``accepts(line: bytes) -> bool`` to skip decoding such lines; the
+``peek_type`` helpers classify a line from its raw bytes.  A skipped record
+can still be the latest one carrying a ``timestamp``, so after each pass the
+last skipped lines are decoded (newest first) until one is found and its
+timestamp is fed to the state as ``{"timestamp": ...}``.
+
+Detail views only show the last few messages of a session.  For large files
+that have not been parsed yet, ``parse_tail`` reads the file backwards in
+blocks and stops once it has enough messages, taking ``first_prompt`` and
+``directory`` from a bounded read of the head instead.
+
+Decoding goes through ``loads``, which uses orjson or msgspec when installed
+and the standard library otherwise.  ``AGENT_SESSIONS_JSON`` (``orjson``,
+``msgspec`` or ``json``) forces a backend.  Input a fast backend rejects is
+retried with the standard library, so every backend accepts and produces
+exactly what ``json.loads`` would (e.g. ``NaN`` or integers beyond 64 bits).
+"""
+
+from __future__ import annotations
+
+import copy
+import dataclasses
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Generic, Protocol, TypeVar
+
+from agent_sessions import metrics
+
+# Number of bytes before the checkpoint offset that must still match for the
+# checkpoint to be trusted.  Guards against files rewritten in place.
+SIGNATURE_BYTES = 64
+
+
+def _select_backend() -> tuple[str, Callable[[bytes | str], Any] | None]:
+    """Pick the fastest available JSON decoder, honouring AGENT_SESSIONS_JSON."""
+    requested = os.environ.get("AGENT_SESSIONS_JSON", "").strip().lower()
+    if requested == "json":
+        return "json", None
+    if requested in ("", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            pass
+        else:
+            return "orjson", orjson.loads
+    if requested in ("", "msgspec"):
+        try:
+            import msgspec
+        except ImportError:
+            pass
+        else:
+            return "msgspec", msgspec.json.Decoder().decode
+    return "json", None
+
+
+JSON_BACKEND, _fast_loads = _select_backend()
+
+# Fast backends may turn integers wider than 64 bits into floats; documents
+# with such long digit runs are left to the standard library.
+_LONG_DIGITS = re.compile(rb"\d{19}")
+_LONG_DIGITS_STR = re.compile(r"\d{19}")
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode a JSON document with the selected backend.
+
+    Raises:
+        ValueError: ``data`` is not valid JSON (``json.JSONDecodeError``).
+    """
+    if _fast_loads is not None:
+        long_digits = _LONG_DIGITS_STR if isinstance(data, str) else _LONG_DIGITS
+        try:
+            if long_digits.search(data) is None:
+                return _fast_loads(data)
+        except Exception:
+            pass  # let the standard library decide, and raise its error
+    return json.loads(data)
+
+
+class ParseState(Protocol):
+    """Running state of a provider parser, fed one record at a time.
+
+    States may also define ``accepts(line: bytes) -> bool``; lines it rejects
+    are not decoded (see the module docstring).
+    """
+
+    def feed(self, record: dict) -> None: ...
+
+
+S = TypeVar("S", bound=ParseState)
+
+
+class DetailState(ParseState, Protocol):
+    """A detail parser state, as used by ``parse_tail``."""
+
+    first_prompt: str | None
+    last_prompt: str | None
+    last_activity: str | None
+    directory: str | None
+    messages: list
+
+
+D = TypeVar("D", bound=DetailState)
+
+# Files smaller than this are parsed from the start even for a tail read.
+TAIL_MIN_BYTES = 1024 * 1024
+
+# Give up on a tail read if the head has no prompt and directory by then.
+HEAD_MAX_BYTES = 256 * 1024
+
+TAIL_BLOCK_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Position in a session file up to which records have been consumed."""
+
+    inode: int
+    offset: int
+    signature: bytes
+
+    def matches(self, f: BinaryIO, st: os.stat_result) -> bool:
+        """Return True if ``f`` is still the file this checkpoint was taken on."""
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            return False
+        start = self.offset - len(self.signature)
+        f.seek(start)
+        return f.read(len(self.signature)) == self.signature
+
+
+# A JSON string, and a ``"key": <string or scalar>,`` member with no nesting.
+_STRING = rb'"(?:[^"\\]|\\.)*"'
+_FLAT_MEMBER = rb"\s*" + _STRING + rb"\s*:\s*(?:" + _STRING + rb"|[-+.\w]+)\s*,"
+_TYPE_MEMBER = rb'\s*"type"\s*:\s*"([^"\\]*)"'
+
+# ``"type"`` preceded only by flat members, so it is known to be top-level.
+_TYPE_RE = re.compile(rb"\s*\{(?:" + _FLAT_MEMBER + rb")*?" + _TYPE_MEMBER)
+# The same for the ``type`` of an object-valued ``"payload"`` that follows it.
+_PAYLOAD_TYPE_RE = re.compile(
+    rb"\s*\{(?:"
+    + _FLAT_MEMBER
+    + rb")*?"
+    + _TYPE_MEMBER
+    + rb"\s*,(?:"
+    + _FLAT_MEMBER
+    + rb')*?\s*"payload"\s*:\s*\{(?:'
+    + _FLAT_MEMBER
+    + rb")*?"
+    + _TYPE_MEMBER
+)
+
+
+def peek_type(line: bytes) -> str | None:
+    """Return the top-level ``type`` of a JSONL line without decoding it.
+
+    Only recognises lines where ``type`` comes before any nested value and
+    needs no unescaping; returns None whenever it cannot be sure, in which
+    case the caller should decode the line.
+    """
+    match = _TYPE_RE.match(line)
+    return match.group(1).decode("utf-8", "replace") if match else None
+
+
+def peek_payload_type(line: bytes) -> tuple[str, str] | None:
+    """Return ``(type, payload.type)`` of a Codex-style line, or None if unsure."""
+    match = _PAYLOAD_TYPE_RE.match(line)
+    if match is None:
+        return None
+    return match.group(1).decode("utf-8", "replace"), match.group(2).decode("utf-8", "replace")
+
+
+def decode_line(line: bytes) -> dict | None:
+    """Decode one JSONL line, returning None for blank, malformed or non-object lines."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    return record
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """Yield every decodable record in ``path`` from the start of the file."""
+    size = decoded = malformed = 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                size += len(line)
+                decoded += 1
+                record = decode_line(line)
+                if record is None:
+                    malformed += 1
+                    continue
+                yield record
+    finally:
+        metrics.record_read(size, decoded=decoded, malformed=malformed)
+
+
+def parse_incremental(
+    path: Path,
+    new_state: Callable[[], S],
+    resume: tuple[Checkpoint, S] | None = None,
+) -> tuple[Checkpoint, S, S]:
+    """Feed the records of ``path`` into a parse state, resuming if possible.
+
+    Args:
+        path: The JSONL file to read.
+        new_state: Factory for an empty parse state.
+        resume: A checkpoint and the state as it was at that checkpoint.  It is
+            ignored (and the file parsed from the start) if the file was
+            replaced, truncated or rewritten since.
+
+    Returns:
+        ``(checkpoint, state, result)``.  ``checkpoint`` and ``state`` should be
+        kept for the next call.  ``result`` is the state to report now; it
+        differs from ``state`` only when a trailing partial line already
+        decodes.  ``state`` must not be mutated by the caller.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if resume is not None and resume[0].matches(f, st):
+            checkpoint, state = resume
+            state = copy.copy(state)
+            offset = checkpoint.offset
+        else:
+            state = new_state()
+            offset = 0
+        f.seek(offset)
+        start = offset
+
+        accepts = getattr(state, "accepts", None)
+        # Lines skipped since the last decoded record with a timestamp.
+        skipped: list[tuple[int, int]] = []
+        tail: dict | None = None
+        decoded = skipped_count = malformed = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                tail = decode_line(line)
+                break
+            if accepts is not None and not accepts(line):
+                skipped.append((offset, len(line)))
+                skipped_count += 1
+                offset += len(line)
+                continue
+            offset += len(line)
+            decoded += 1
+            record = decode_line(line)
+            if record is not None:
+                state.feed(record)
+                if record.get("timestamp"):
+                    skipped.clear()
+            else:
+                malformed += 1
+
+        if skipped:
+            _feed_last_timestamp(f, skipped, state)
+
+        f.seek(max(0, offset - SIGNATURE_BYTES))
+        signature = f.read(offset - f.tell())
+
+    metrics.record_read(
+        offset - start, decoded=decoded, skipped=skipped_count, malformed=malformed
+    )
+
+    checkpoint = Checkpoint(inode=st.st_ino, offset=offset, signature=signature)
+    if tail is None:
+        return checkpoint, state, state
+    result = copy.copy(state)
+    result.feed(tail)
+    return checkpoint, state, result
+
+
+def _feed_last_timestamp(f: BinaryIO, skipped: list[tuple[int, int]], state: ParseState) -> None:
+    """Feed the newest timestamp among ``skipped`` lines, if any, to ``state``."""
+    for start, length in reversed(skipped):
+        f.seek(start)
+        record = decode_line(f.read(length))
+        if record is not None and record.get("timestamp"):
+            state.feed({"timestamp": record["timestamp"]})
+            return
+
+
+def _reverse_lines(f: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    """Yield the lines between byte offsets ``start`` and ``end``, last first.
+
+    ``start`` must be at the beginning of a line.  Lines are yielded without
+    their newline; blank lines are skipped.
+    """
+    pos = end
+    pending: list[bytes] = []  # pieces of the current line, last piece first
+    while pos > start:
+        size = min(TAIL_BLOCK_BYTES, pos - start)
+        pos -= size
+        f.seek(pos)
+        block = f.read(size)
+        hi = len(block)
+        newline = block.rfind(b"\n", 0, hi)
+        while newline != -1:
+            pending.append(block[newline + 1 : hi])
+            line = b"".join(reversed(pending))
+            if line.strip():
+                yield line
+            pending = []
+            hi = newline
+            newline = block.rfind(b"\n", 0, hi)
+        pending.append(block[:hi])
+    line = b"".join(reversed(pending))
+    if line.strip():
+        yield line
+
+
+def parse_tail(path: Path, new_state: Callable[[], D], limit: int) -> D | None:
+    """Parse only as much of a large file as needed for its last ``limit`` messages.
+
+    The head of the file is parsed forward until the state has both a
+    ``first_prompt`` and a ``directory``; the rest is read backwards until
+    ``limit`` messages, the last prompt and the last timestamp are known.
+    The result matches a full parse (with messages cut to the last ``limit``)
+    provided records only ever contribute to ``directory`` and
+    ``first_prompt`` the first time they are set.
+
+    Returns:
+        The state, or None if the file is smaller than ``TAIL_MIN_BYTES`` or
+        the head holds no prompt or directory within ``HEAD_MAX_BYTES``; the
+        caller should then parse the whole file.
+    """
+    with open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        if end < TAIL_MIN_BYTES:
+            metrics.record_read(0)
+            return None
+
+        head = new_state()
+        head_end = 0
+        tail_bytes = decoded = skipped = malformed = 0
+        for line in f:
+            if not line.endswith(b"\n") or head_end + len(line) > HEAD_MAX_BYTES:
+                metrics.record_read(head_end + len(line), decoded=decoded, malformed=malformed)
+                return None
+            head_end += len(line)
+            decoded += 1
+            record = decode_line(line)
+            if record is None:
+                malformed += 1
+            else:
+                head.feed(record)
+                if head.first_prompt is not None and head.directory is not None:
+                    break
+        else:
+            metrics.record_read(head_end, decoded=decoded, malformed=malformed)
+            return None
+
+        accepts = getattr(head, "accepts", None)
+        messages: list = []  # newest first
+        last_prompt: str | None = None
+        last_activity: str | None = None
+        for line in _reverse_lines(f, head_end, end):
+            tail_bytes += len(line) + 1
+            if accepts is not None and not accepts(line):
+                skipped += 1
+                if last_activity is not None:
+                    continue
+                record = decode_line(line)
+                if record is not None and record.get("timestamp"):
+                    last_activity = record["timestamp"]
+                continue
+            decoded += 1
+            record = decode_line(line)
+            if record is None:
+                malformed += 1
+                continue
+            single = copy.copy(head)
+            single.messages = []
+            single.last_prompt = None
+            single.last_activity = None
+            single.feed(record)
+            messages.extend(reversed(single.messages))
+            last_prompt = last_prompt or single.last_prompt
+            last_activity = last_activity or single.last_activity
+            if len(messages) >= limit and last_prompt and last_activity:
+                break
+        else:
+            # Reached the head: it holds the oldest messages.
+            messages.extend(reversed(head.messages))
+            last_prompt = last_prompt or head.last_prompt
+            last_activity = last_activity or head.last_activity
+
+    metrics.record_read(
+        head_end + tail_bytes, decoded=decoded, skipped=skipped, malformed=malformed
+    )
+    messages = messages[:limit]
+    messages.reverse()
+    return dataclasses.replace(
+        head, messages=messages, last_prompt=last_prompt, last_activity=last_activity
+    )
+
+
+class StateCache(Generic[S]):
+    """Small thread-safe LRU of per-file checkpoints and parse states.
+
+    Used by the detail loaders so that polling a live session only parses
+    what was appended since the previous call in this process.
+    """
+
+    def __init__(self, maxsize: int = 8) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[Checkpoint, S]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> tuple[Checkpoint, S] | None:
+        with self._lock:
+            entry = self._entries.get(str(path))
+            if entry is not None:
+                self._entries.move_to_end(str(path))
+            return entry
+
+    def put(self, path: Path, checkpoint: Checkpoint, state: S) -> None:
+        with self._lock:
+            self._entries[str(path)] = (checkpoint, state)
+            self._entries.move_to_end(str(path))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def parse_detail(path: Path, new_state: Callable[[], D], cache: StateCache[D], limit: int) -> D:
+    """Return the detail state of ``path`` for showing its last ``limit`` messages.
+
+    Files already in ``cache`` are parsed incrementally from their checkpoint.
+    Other large files are read with ``parse_tail`` when ``limit`` is positive,
+    and parsed in full (and cached) otherwise.
+    """
+    resume = cache.get(path)
+    metrics.record_cache(resume is not None)
+    if resume is None and limit > 0:
+        result = parse_tail(path, new_state, limit)
+        if result is not None:
+            return result
+    checkpoint, state, result = parse_incremental(path, new_state, resume)
+    cache.put(path, checkpoint, state)
+    return result
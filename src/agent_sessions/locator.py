@@ -0,0 +1,203 @@
+"""Session ID to file location index for the JSONL providers.
+
+Loading a session's detail used to walk every project directory (or the whole
+Codex tree) to find its file.  This module keeps a persistent ID -> path index
+in the cache database (see ``agent_sessions.cache``):
+
+* a hit is verified against the file on disk and returned directly;
+* on a miss, only directories whose mtime changed since they were last indexed
+  are listed again, so the lookup cost depends on the number of directories
+  that changed, not on the number of sessions.
+
+A directory containing a file whose ID could not be determined yet (for
+example a rollout whose header has not been written) is re-listed on the next
+miss, and so is a directory modified within timestamp granularity of being
+listed: a file created in the same tick would not change its mtime.  When
+the cache is disabled the index is rebuilt in memory per lookup.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from agent_sessions import metrics
+from agent_sessions.cache import connect_cache
+from agent_sessions.scanning import MTIME_SLACK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Recorded for directories that must be re-listed on the next miss.
+_INCOMPLETE = -1
+
+_MTIME_SLACK_NS = int(MTIME_SLACK_SECONDS * 1_000_000_000)
+
+
+def _lookup(conn: sqlite3.Connection, provider: str, session_id: str) -> Path | None:
+    row = conn.execute(
+        "SELECT path FROM session_location WHERE provider = ? AND session_id = ?",
+        (provider, session_id),
+    ).fetchone()
+    return Path(row[0]) if row else None
+
+
+def _refresh(
+    conn: sqlite3.Connection,
+    provider: str,
+    directories: Iterable[Path],
+    accept: Callable[[str], bool],
+    identify: Callable[[Path], str | None],
+) -> None:
+    """Re-list every directory whose mtime differs from the indexed one."""
+    indexed = dict(
+        conn.execute(
+            "SELECT path, mtime_ns FROM indexed_dir WHERE provider = ?",
+            (provider,),
+        ).fetchall()
+    )
+    seen: set[str] = set()
+
+    for directory in directories:
+        key = str(directory)
+        seen.add(key)
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except OSError:
+            continue
+        if indexed.get(key) == mtime_ns:
+            continue
+
+        locations: list[tuple[str, str, str, str]] = []
+        complete = True
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not accept(entry.name):
+                        continue
+                    session_file = Path(entry.path)
+                    session_id = identify(session_file)
+                    if session_id is None:
+                        complete = False
+                        continue
+                    locations.append((provider, session_id, str(session_file), key))
+        except OSError:
+            continue
+        if mtime_ns > time.time_ns() - _MTIME_SLACK_NS:
+            # A file created in the same timestamp tick would not change the
+            # mtime, so this listing may not be the last one for that mtime.
+            complete = False
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM session_location WHERE provider = ? AND directory = ?",
+                (provider, key),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_location "
+                "(provider, session_id, path, directory) VALUES (?, ?, ?, ?)",
+                locations,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_dir (provider, path, mtime_ns) VALUES (?, ?, ?)",
+                (provider, key, mtime_ns if complete else _INCOMPLETE),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Forget directories that no longer exist.
+    gone = [(provider, path) for path in indexed if path not in seen]
+    if gone:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("DELETE FROM session_location WHERE provider = ? AND directory = ?", gone)
+        conn.executemany("DELETE FROM indexed_dir WHERE provider = ? AND path = ?", gone)
+        conn.execute("COMMIT")
+
+
+def _scan(
+    session_id: str,
+    directories: Iterable[Path],
+    accept: Callable[[str], bool],
+    identify: Callable[[Path], str | None],
+) -> Path | None:
+    """Find ``session_id`` by listing every directory (no index available)."""
+    for directory in directories:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if accept(entry.name) and identify(Path(entry.path)) == session_id:
+                        return Path(entry.path)
+        except OSError:
+            continue
+    return None
+
+
+def locate_session_file(
+    provider: str,
+    session_id: str,
+    directories: Callable[[], Iterable[Path]],
+    accept: Callable[[str], bool],
+    identify: Callable[[Path], str | None],
+) -> Path | None:
+    """Return the file holding ``session_id``, using the persistent index.
+
+    Args:
+        provider: Index namespace, normally the provider's runner type value.
+        session_id: The session to find.
+        directories: Returns every directory that directly contains session
+            files.  Only called on an index miss.
+        accept: Predicate on file names that may hold sessions.
+        identify: Returns the session ID stored in a file, or None if it
+            cannot be determined (yet).
+    """
+
+    def verified(path: Path | None) -> Path | None:
+        if path is not None and path.is_file() and identify(path) == session_id:
+            return path
+        return None
+
+    conn = connect_cache()
+    if conn is None:
+        return _scan(session_id, directories(), accept, identify)
+
+    try:
+        found = verified(_lookup(conn, provider, session_id))
+        metrics.record_cache(found is not None)
+        if found is not None:
+            return found
+        _refresh(conn, provider, directories(), accept, identify)
+        return verified(_lookup(conn, provider, session_id))
+    except sqlite3.Error as exc:
+        logger.debug("Session location index unavailable", extra={"error": str(exc)})
+        return _scan(session_id, directories(), accept, identify)
+    finally:
+        conn.close()
+
+
+def subdirectories(root: Path, recursive: bool = False) -> list[Path]:
+    """Return the directories below ``root`` (including ``root`` if recursive)."""
+    if not recursive:
+        try:
+            return [Path(e.path) for e in os.scandir(root) if e.is_dir()]
+        except OSError:
+            return []
+
+    found = [root]
+    pending = [root]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        found.append(Path(entry.path))
+                        pending.append(Path(entry.path))
+        except OSError:
+            continue
+    return found
@@ -0,0 +1,239 @@
+"""Random-access paging through the messages of a JSONL session file.
+
+Transcript viewers page through thousands of messages, and re-parsing a large
+session for every page does not scale.  For each session file this module
+keeps the byte offset of every line that yields a message.  The index is
+stored in the cache database (see ``agent_sessions.cache``), built once and
+extended from its checkpoint when the file grows, so fetching any page seeks
+straight to its records and decodes only those.
+
+Whether a line yields a message is decided by feeding it to the provider's
+detail parser (a ``jsonl.DetailState``); message records must not depend on
+what came before them.  When the cache is disabled the index is rebuilt for
+every request.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import sqlite3
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+
+from agent_sessions import metrics
+from agent_sessions.cache import connect_cache
+from agent_sessions.jsonl import SIGNATURE_BYTES, Checkpoint, DetailState, decode_line
+from agent_sessions.models import MessageRecord, RunnerType, SessionMessage, SessionMessagePage
+
+logger = logging.getLogger(__name__)
+
+
+def _load(
+    conn: sqlite3.Connection, provider: str, path: Path, version: int
+) -> tuple[Checkpoint, array] | None:
+    row = conn.execute(
+        "SELECT inode, offset, signature, positions FROM message_index "
+        "WHERE provider = ? AND path = ? AND version = ?",
+        (provider, str(path), version),
+    ).fetchone()
+    if row is None:
+        return None
+    inode, offset, signature, blob = row
+    positions = array("q")
+    positions.frombytes(blob)
+    return Checkpoint(inode=inode, offset=offset, signature=bytes(signature)), positions
+
+
+def _store(
+    conn: sqlite3.Connection,
+    provider: str,
+    path: Path,
+    version: int,
+    checkpoint: Checkpoint,
+    positions: array,
+) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO message_index "
+        "(provider, path, version, inode, offset, signature, positions) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            provider,
+            str(path),
+            version,
+            checkpoint.inode,
+            checkpoint.offset,
+            checkpoint.signature,
+            positions.tobytes(),
+        ),
+    )
+
+
+def extend_positions(
+    path: Path,
+    probe: DetailState,
+    resume: tuple[Checkpoint, array] | None,
+    collect: list[MessageRecord] | None = None,
+) -> tuple[Checkpoint, array, array]:
+    """Index the lines of ``path`` past the checkpoint in ``resume``.
+
+    Lines are fed to ``probe``, a fresh detail state.  The messages of
+    complete lines are appended to ``collect`` when given.
+
+    Returns ``(checkpoint, positions, visible)``: ``positions`` covers complete
+    lines only and is safe to store; ``visible`` also includes a trailing
+    line that is still being written but already decodes.
+    """
+    accepts = getattr(probe, "accepts", None)
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if resume is not None and resume[0].matches(f, st):
+            offset = resume[0].offset
+            positions = array("q", resume[1])
+        else:
+            offset = 0
+            positions = array("q")
+        f.seek(offset)
+        start = offset
+
+        visible = positions
+        decoded = skipped = malformed = 0
+        for line in f:
+            if accepts is None or accepts(line):
+                decoded += 1
+                record = decode_line(line)
+                if record is None:
+                    malformed += 1
+                else:
+                    probe.feed(record)
+            else:
+                skipped += 1
+            produced = len(probe.messages)
+            if not line.endswith(b"\n"):
+                if produced:
+                    visible = array("q", positions)
+                    visible.extend([offset] * produced)
+                break
+            if collect is not None:
+                collect.extend(probe.messages)
+            probe.messages.clear()
+            positions.extend([offset] * produced)
+            offset += len(line)
+
+        f.seek(max(0, offset - SIGNATURE_BYTES))
+        signature = f.read(offset - f.tell())
+
+    metrics.record_read(offset - start, decoded=decoded, skipped=skipped, malformed=malformed)
+    checkpoint = Checkpoint(inode=st.st_ino, offset=offset, signature=signature)
+    return checkpoint, positions, visible
+
+
+def message_positions(
+    provider: str,
+    version: int,
+    path: Path,
+    new_state: Callable[[], DetailState],
+) -> array:
+    """Return the byte offset of the line behind each message of ``path``.
+
+    A line yielding several messages appears once per message.
+    """
+    return indexed_messages(provider, version, path, new_state)[2]
+
+
+def indexed_messages(
+    provider: str,
+    version: int,
+    path: Path,
+    new_state: Callable[[], DetailState],
+) -> tuple[Checkpoint, array, array]:
+    """Bring the stored index of ``path`` up to date and return it.
+
+    Returns ``(checkpoint, positions, visible)`` as ``extend_positions`` does.
+    """
+    conn = connect_cache()
+    if conn is None:
+        return extend_positions(path, new_state(), None)
+
+    try:
+        try:
+            resume = _load(conn, provider, path, version)
+        except sqlite3.Error:
+            resume = None
+        metrics.record_cache(resume is not None)
+        checkpoint, positions, visible = extend_positions(path, new_state(), resume)
+        if resume is None or checkpoint != resume[0]:
+            try:
+                _store(conn, provider, path, version, checkpoint, positions)
+            except sqlite3.Error as exc:
+                logger.debug("Failed to write message index", extra={"error": str(exc)})
+        return checkpoint, positions, visible
+    finally:
+        conn.close()
+
+
+def read_messages(
+    path: Path,
+    new_state: Callable[[], DetailState],
+    positions: array,
+    start: int,
+    stop: int,
+) -> list[SessionMessage]:
+    """Decode the messages ``positions[start:stop]`` of ``path``."""
+    messages: list[SessionMessage] = []
+    decoded: dict[int, list[MessageRecord]] = {}
+    size = 0
+    with open(path, "rb") as f:
+        for index in range(start, stop):
+            offset = positions[index]
+            if offset not in decoded:
+                f.seek(offset)
+                line = f.readline()
+                size += len(line)
+                record = decode_line(line)
+                state = new_state()
+                if record is not None:
+                    state.feed(record)
+                decoded[offset] = state.messages
+            # Several messages from one line: pick this one by its rank.
+            rank = index - bisect.bisect_left(positions, offset)
+            line_messages = decoded[offset]
+            if rank < len(line_messages):
+                messages.append(line_messages[rank].to_model())
+    metrics.record_read(size, decoded=len(decoded))
+    return messages
+
+
+def page_bounds(total: int, offset: int, limit: int) -> tuple[int, int]:
+    """Resolve a page request to ``(start, stop)`` message indexes.
+
+    A negative ``offset`` counts from the end, so ``offset=-limit`` is the
+    last page.
+    """
+    if offset < 0:
+        offset = max(0, total + offset)
+    start = min(offset, total)
+    return start, min(total, start + max(limit, 0))
+
+
+def get_message_page(
+    runner_type: RunnerType,
+    version: int,
+    session_id: str,
+    path: Path,
+    new_state: Callable[[], DetailState],
+    offset: int,
+    limit: int,
+) -> SessionMessagePage:
+    """Return one page of messages of a JSONL session file."""
+    positions = message_positions(runner_type.value, version, path, new_state)
+    start, stop = page_bounds(len(positions), offset, limit)
+    return SessionMessagePage(
+        id=session_id,
+        runner_type=runner_type,
+        offset=start,
+        total=len(positions),
+        messages=read_messages(path, new_state, positions, start, stop),
+    )
@@ -0,0 +1,152 @@
+"""Opt-in instrumentation of discovery and detail loading.
+
+Wrap calls in ``collect_stats()`` to find out where their time goes::
+
+    with collect_stats() as stats:
+        discover_sessions()
+    print(stats.process_scan_seconds, stats.providers["codex"].bytes_read)
+
+Counters are kept in context variables, so concurrent calls on other threads
+or tasks are not mixed in, and provider threads started by
+``discover_sessions`` (or ``asyncio.to_thread``) report into the caller's
+stats.  Outside ``collect_stats()`` every hook is a single context-variable
+lookup; hot loops keep local counts and report once per file.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Counters:
+    """Work done by one provider (or outside any provider)."""
+
+    wall_seconds: float = 0.0
+    files_stat: int = 0
+    files_opened: int = 0
+    bytes_read: int = 0
+    lines_decoded: int = 0
+    lines_skipped: int = 0
+    malformed_lines: int = 0
+    sql_queries: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def add(self, other: Counters) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+@dataclass
+class CallStats:
+    """Everything recorded inside one ``collect_stats()`` block.
+
+    Attributes:
+        wall_seconds: Duration of the block.
+        process_scan_seconds: Time spent reading the process table (zero when
+            a recent snapshot was reused).
+        providers: Counters per runner type value, e.g. ``"claude_code"``.
+        other: Counters for work not attributed to a provider, such as direct
+            calls to ``list_*`` functions.
+    """
+
+    wall_seconds: float = 0.0
+    process_scan_seconds: float = 0.0
+    providers: dict[str, Counters] = field(default_factory=dict)
+    other: Counters = field(default_factory=Counters)
+
+    @property
+    def total(self) -> Counters:
+        """Sum of the counters of every provider and ``other``."""
+        total = Counters()
+        for counters in (*self.providers.values(), self.other):
+            total.add(counters)
+        return total
+
+
+_stats: ContextVar[CallStats | None] = ContextVar("agent_sessions_stats", default=None)
+_counters: ContextVar[Counters | None] = ContextVar("agent_sessions_counters", default=None)
+
+
+@contextmanager
+def collect_stats() -> Iterator[CallStats]:
+    """Record the work done by agent-sessions calls made inside the block."""
+    stats = CallStats()
+    stats_token = _stats.set(stats)
+    counters_token = _counters.set(stats.other)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall_seconds += time.perf_counter() - start
+        _counters.reset(counters_token)
+        _stats.reset(stats_token)
+
+
+def call_provider(provider: str, func: Callable[..., T], *args, **kwargs) -> T:
+    """Call ``func``, attributing its work and wall time to ``provider``."""
+    stats = _stats.get()
+    if stats is None:
+        return func(*args, **kwargs)
+    bucket = stats.providers.setdefault(provider, Counters())
+    token = _counters.set(bucket)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        bucket.wall_seconds += time.perf_counter() - start
+        _counters.reset(token)
+
+
+def record_stat(count: int = 1) -> None:
+    """Record ``count`` files stat'ed."""
+    bucket = _counters.get()
+    if bucket is not None:
+        bucket.files_stat += count
+
+
+def record_cache(hit: bool) -> None:
+    bucket = _counters.get()
+    if bucket is not None:
+        if hit:
+            bucket.cache_hits += 1
+        else:
+            bucket.cache_misses += 1
+
+
+def record_read(bytes_read: int, decoded: int = 0, skipped: int = 0, malformed: int = 0) -> None:
+    """Record one file opened and read; ``malformed`` counts undecodable lines."""
+    bucket = _counters.get()
+    if bucket is not None:
+        bucket.files_opened += 1
+        bucket.bytes_read += bytes_read
+        bucket.lines_decoded += decoded
+        bucket.lines_skipped += skipped
+        bucket.malformed_lines += malformed
+
+
+def record_process_scan(seconds: float) -> None:
+    stats = _stats.get()
+    if stats is not None:
+        stats.process_scan_seconds += seconds
+
+
+def trace_queries(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Count the statements executed on ``conn`` while stats are collected."""
+    bucket = _counters.get()
+    if bucket is not None:
+
+        def count(_statement: str) -> None:
+            bucket.sql_queries += 1
+
+        conn.set_trace_callback(count)
+    return conn
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from enum import Enum
+from typing import NamedTuple
 
 from pydantic import BaseModel
 
@@ -25,6 +27,29 @@ class SessionMessage(BaseModel):
     timestamp: str | None = None
 
 
+class MessageRecord(NamedTuple):
+    """A parsed message before it becomes a ``SessionMessage``.
+
+    Parsers produce these for every message of a session; they are plain
+    tuples, cheap to create and hold.  Only the messages actually returned
+    are converted, with ``to_model``.
+    """
+
+    role: str
+    content: str
+    thinking: str | None = None
+    timestamp: str | None = None
+
+    def to_model(self) -> SessionMessage:
+        """Build the public model without re-validating parser output."""
+        return SessionMessage.model_construct(
+            role=self.role,
+            content=self.content,
+            thinking=self.thinking,
+            timestamp=self.timestamp if isinstance(self.timestamp, str) else None,
+        )
+
+
 class SessionSummary(BaseModel):
     """Summary info for a discovered session (for list views)."""
 
@@ -42,3 +67,78 @@ class SessionDetail(SessionSummary):
     """Full session with message history."""
 
     messages: list[SessionMessage] = []
+
+
+class SessionMessagePage(BaseModel):
+    """A window of a session's message history (for transcript views)."""
+
+    id: str
+    runner_type: RunnerType
+    offset: int  # index of the first message in this page
+    total: int  # number of messages in the session
+    messages: list[SessionMessage] = []
+
+    @property
+    def has_previous(self) -> bool:
+        return self.offset > 0
+
+    @property
+    def has_next(self) -> bool:
+        return self.offset + len(self.messages) < self.total
+
+
+class SearchHit(BaseModel):
+    """A message matching a full-text search (see ``search_sessions``)."""
+
+    id: str  # session ID
+    runner_type: RunnerType
+    directory: str
+    position: int  # index of the message, usable as a get_session_messages offset
+    role: str
+    timestamp: str | None = None
+    snippet: str
+    score: float  # relevance; higher is better
+
+
+class ChangeKind(str, Enum):
+    """What happened to a session (see ``watch_sessions``)."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    REMOVED = "removed"
+
+
+class SessionChange(BaseModel):
+    """A session that appeared, changed or disappeared."""
+
+    kind: ChangeKind
+    id: str
+    runner_type: RunnerType
+    summary: SessionSummary | None = None  # None when removed
+
+
+class DiscoveryComplete(BaseModel):
+    """Last item of ``discover_sessions_iter``: the final, sorted result."""
+
+    sessions: list[SessionSummary]
+    failed: list[RunnerType] = []  # providers that raised
+    incomplete: dict[RunnerType, list[str]] = {}  # as in SessionList
+
+
+class SessionList(list[SessionSummary]):
+    """Session summaries returned under a time budget.
+
+    A plain list of ``SessionSummary`` objects, plus ``incomplete``: for each
+    runner type that ran out of time, the locations it did not finish (project
+    directories, date partitions, the OpenCode database, ``"process table"``).
+    An empty location list means the provider returned nothing in time.  An
+    empty mapping means the result is complete.
+    """
+
+    def __init__(
+        self,
+        sessions: Iterable[SessionSummary] = (),
+        incomplete: dict[RunnerType, list[str]] | None = None,
+    ) -> None:
+        super().__init__(sessions)
+        self.incomplete: dict[RunnerType, list[str]] = incomplete or {}
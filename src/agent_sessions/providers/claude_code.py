@@ -2,22 +2,34 @@
 
 from __future__ import annotations
 
-import json
+import dataclasses
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import logging
 
+from agent_sessions import deadline
+from agent_sessions.cache import SummaryCache, cached_summary
+from agent_sessions.jsonl import StateCache, parse_detail, peek_type
+from agent_sessions.locator import locate_session_file, subdirectories
+from agent_sessions.message_index import get_message_page
 from agent_sessions.running import find_running_claude_sessions
+from agent_sessions.scanning import Candidate, scan_files, select_recent
 from agent_sessions.models import (
+    MessageRecord,
     RunnerType,
     SessionSummary,
     SessionDetail,
-    SessionMessage,
+    SessionMessagePage,
 )
+from agent_sessions.query import SessionQuery, matching, prune
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _SummaryState changes what it produces.
+_PARSER_VERSION = 1
+
 
 def _claude_home() -> Path:
     """Resolve the Claude home directory.
@@ -82,83 +94,101 @@ def _extract_user_prompt(content: str | list | None) -> str | None:
     return None
 
 
+def _is_session_file_name(name: str) -> bool:
+    """Return True for ``<uuid>.jsonl`` session files."""
+    if not name.endswith(".jsonl"):
+        return False
+    # Skip non-UUID files (like message files)
+    stem = name[: -len(".jsonl")]
+    return len(stem) >= 32 and "-" in stem
+
+
+def _session_id_from_file(session_file: Path) -> str:
+    return session_file.stem
+
+
 def _find_session_file(session_id: str) -> Path | None:
-    """Find the JSONL file for a session by scanning all projects."""
+    """Find the JSONL file for a session via the session location index."""
     if not _projects_dir().exists():
         return None
+    return locate_session_file(
+        RunnerType.CLAUDE_CODE.value,
+        session_id,
+        lambda: subdirectories(_projects_dir()),
+        lambda name: name.endswith(".jsonl"),
+        _session_id_from_file,
+    )
+
+
+# Record types the parsers read; other lines only contribute their timestamp
+# (and their cwd, until one has been seen).
+_PARSED_TYPES = frozenset({"user", "assistant"})
 
-    for project_dir in _projects_dir().iterdir():
-        if not project_dir.is_dir():
-            continue
-        session_file = project_dir / f"{session_id}.jsonl"
-        if session_file.exists():
-            return session_file
-    return None
 
+def _accepts_line(line: bytes, directory: str | None) -> bool:
+    if directory is None:
+        return True
+    record_type = peek_type(line)
+    return record_type is None or record_type in _PARSED_TYPES
 
-def _parse_session_summary(
-    session_file: Path,
-    running_sessions: set[str],
-) -> SessionSummary | None:
-    """Parse a session JSONL file and return summary info."""
-    session_id = session_file.stem
+
+@dataclass
+class _SummaryState:
+    """Running state of the summary parser, resumable across appends."""
 
     first_prompt: str | None = None
     last_prompt: str | None = None
     last_activity: str | None = None
     directory: str | None = None
-    message_count = 0
+    message_count: int = 0
+
+    def accepts(self, line: bytes) -> bool:
+        return _accepts_line(line, self.directory)
+
+    def feed(self, record: dict) -> None:
+        record_type = record.get("type")
+        timestamp = record.get("timestamp")
+
+        if timestamp:
+            self.last_activity = timestamp
+
+        # Extract cwd from records (more reliable than folder name)
+        if self.directory is None:
+            cwd = record.get("cwd")
+            if cwd:
+                self.directory = cwd
+
+        if record_type == "user":
+            self.message_count += 1
+            # Extract first and last prompt (skip tool results and system messages)
+            message = record.get("message", {})
+            # Skip tool_result records — they are user-role but not prompts
+            if message.get("role") == "user" and any(
+                isinstance(b, dict) and b.get("type") == "tool_result"
+                for b in (message.get("content") or [])
+                if isinstance(message.get("content"), list)
+            ):
+                pass  # skip tool_result messages
+            else:
+                content = message.get("content")
+                text = _extract_user_prompt(content)
+                if text:
+                    if self.first_prompt is None:
+                        self.first_prompt = text[:200]
+                    self.last_prompt = text[:200]
 
-    try:
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    record = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+        elif record_type == "assistant":
+            self.message_count += 1
 
-                record_type = record.get("type")
-                timestamp = record.get("timestamp")
-
-                if timestamp:
-                    last_activity = timestamp
-
-                # Extract cwd from records (more reliable than folder name)
-                if directory is None:
-                    cwd = record.get("cwd")
-                    if cwd:
-                        directory = cwd
-
-                if record_type == "user":
-                    message_count += 1
-                    # Extract first and last prompt (skip tool results and system messages)
-                    message = record.get("message", {})
-                    # Skip tool_result records — they are user-role but not prompts
-                    if message.get("role") == "user" and any(
-                        isinstance(b, dict) and b.get("type") == "tool_result"
-                        for b in (message.get("content") or [])
-                        if isinstance(message.get("content"), list)
-                    ):
-                        pass  # skip tool_result messages
-                    else:
-                        content = message.get("content")
-                        text = _extract_user_prompt(content)
-                        if text:
-                            if first_prompt is None:
-                                first_prompt = text[:200]
-                            last_prompt = text[:200]
-
-                elif record_type == "assistant":
-                    message_count += 1
+    def to_summary(self, session_file: Path, running_sessions: set[str]) -> SessionSummary:
+        session_id = session_file.stem
 
         # Fallback to decoding folder name if cwd not found in records
+        directory = self.directory
         if directory is None:
-            project_dir = session_file.parent.name
-            directory = decode_project_path(project_dir)
+            directory = decode_project_path(session_file.parent.name)
 
+        last_activity = self.last_activity
         if last_activity is None:
             # Use file modification time as fallback
             mtime = session_file.stat().st_mtime
@@ -170,65 +200,138 @@ def _parse_session_summary(
             id=session_id,
             runner_type=RunnerType.CLAUDE_CODE,
             directory=directory,
-            first_prompt=first_prompt,
-            last_prompt=last_prompt,
+            first_prompt=self.first_prompt,
+            last_prompt=self.last_prompt,
             last_activity=last_activity,
-            message_count=message_count,
+            message_count=self.message_count,
             is_running=session_id in running_sessions,
         )
 
-    except Exception as e:
-        logger.warning(
-            "Failed to parse Claude session file",
-            session_file=str(session_file),
-            error=str(e),
-        )
-        return None
-
 
 def list_claude_sessions(
     directory: str | None = None,
     limit: int = 50,
+    timeout_ms: int | None = None,
+    query: SessionQuery | None = None,
 ) -> list[SessionSummary]:
     """Discover Claude Code sessions.
 
     Args:
         directory: Filter to sessions for this project directory.
         limit: Maximum sessions to return.
+        query: Further conditions; only the project folders that can lie
+            under ``query.directory`` are listed.
+        timeout_ms: Stop after this many milliseconds and return the sessions
+            parsed so far, as a ``SessionList`` flagging what was skipped.
 
     Returns:
         List of session summaries sorted by last_activity descending.
     """
+    if timeout_ms is not None:
+        return deadline.run_with_timeout(
+            timeout_ms,
+            RunnerType.CLAUDE_CODE,
+            list_claude_sessions,
+            directory=directory,
+            limit=limit,
+            query=query,
+        )
+
     if not _projects_dir().exists():
         return []
 
     running_sessions = find_running_claude_sessions()
-    sessions: list[SessionSummary] = []
 
     # Determine which project directories to scan
     if directory:
         encoded = encode_project_path(directory)
         project_dirs = [_projects_dir() / encoded]
     else:
-        project_dirs = [d for d in _projects_dir().iterdir() if d.is_dir()]
+        project_dirs = [
+            d
+            for d in _projects_dir().iterdir()
+            if d.is_dir() and (query is None or query.may_contain_folder(d.name))
+        ]
 
+    candidates: list[Candidate] = []
     for project_dir in project_dirs:
-        if not project_dir.exists():
-            continue
+        candidates.extend(scan_files(project_dir, _is_session_file_name))
+    candidates = prune(query, candidates, _session_id_from_file, running_sessions)
+
+    with SummaryCache(RunnerType.CLAUDE_CODE.value, _PARSER_VERSION) as cache:
+        return select_recent(
+            candidates,
+            lambda c: matching(
+                query, cached_summary(cache, c.path, running_sessions, _SummaryState, c.stat)
+            ),
+            limit,
+        )
 
-        for session_file in project_dir.glob("*.jsonl"):
-            # Skip non-UUID files (like message files)
-            name = session_file.stem
-            if len(name) < 32 or "-" not in name:
-                continue
 
-            summary = _parse_session_summary(session_file, running_sessions)
-            if summary:
-                sessions.append(summary)
+@dataclass
+class _DetailState:
+    """Running state of the detail parser, resumable across appends."""
 
-    # Sort by last_activity descending
-    sessions.sort(key=lambda s: s.last_activity, reverse=True)
-    return sessions[:limit]
+    first_prompt: str | None = None
+    last_prompt: str | None = None
+    last_activity: str | None = None
+    directory: str | None = None
+    messages: list[MessageRecord] = field(default_factory=list)
+
+    def __copy__(self) -> _DetailState:
+        return dataclasses.replace(self, messages=list(self.messages))
+
+    def accepts(self, line: bytes) -> bool:
+        return _accepts_line(line, self.directory)
+
+    def feed(self, record: dict) -> None:
+        record_type = record.get("type")
+        timestamp = record.get("timestamp")
+
+        if timestamp:
+            self.last_activity = timestamp
+
+        # Extract cwd from records
+        if self.directory is None:
+            cwd = record.get("cwd")
+            if cwd:
+                self.directory = cwd
+
+        if record_type == "user":
+            message = record.get("message", {})
+            content = message.get("content")
+            text, _ = _extract_text_content(content, role="user")
+            if text:
+                candidate = _extract_user_prompt(content)
+                if candidate:
+                    if self.first_prompt is None:
+                        self.first_prompt = candidate[:200]
+                    self.last_prompt = candidate[:200]
+                self.messages.append(
+                    MessageRecord(
+                        role="user",
+                        content=text,
+                        timestamp=timestamp,
+                    )
+                )
+
+        elif record_type == "assistant":
+            message = record.get("message", {})
+            content = message.get("content")
+            text, thinking = _extract_text_content(content, role="assistant")
+            if text or thinking:
+                self.messages.append(
+                    MessageRecord(
+                        role="assistant",
+                        content=text,
+                        thinking=thinking,
+                        timestamp=timestamp,
+                    )
+                )
+
+
+# Parsed detail of recently viewed sessions, so polling only reads appends.
+_detail_states: StateCache[_DetailState] = StateCache()
 
 
 def get_claude_session_detail(
@@ -249,72 +352,17 @@ def get_claude_session_detail(
         return None
 
     running_sessions = find_running_claude_sessions()
-    first_prompt: str | None = None
-    last_prompt: str | None = None
-    last_activity: str | None = None
-    directory: str | None = None
-    messages: list[SessionMessage] = []
 
     try:
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    record = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                record_type = record.get("type")
-                timestamp = record.get("timestamp")
-
-                if timestamp:
-                    last_activity = timestamp
-
-                # Extract cwd from records
-                if directory is None:
-                    cwd = record.get("cwd")
-                    if cwd:
-                        directory = cwd
-
-                if record_type == "user":
-                    message = record.get("message", {})
-                    content = message.get("content")
-                    text, _ = _extract_text_content(content, role="user")
-                    if text:
-                        candidate = _extract_user_prompt(content)
-                        if candidate:
-                            if first_prompt is None:
-                                first_prompt = candidate[:200]
-                            last_prompt = candidate[:200]
-                        messages.append(
-                            SessionMessage(
-                                role="user",
-                                content=text,
-                                timestamp=timestamp,
-                            )
-                        )
-
-                elif record_type == "assistant":
-                    message = record.get("message", {})
-                    content = message.get("content")
-                    text, thinking = _extract_text_content(content, role="assistant")
-                    if text or thinking:
-                        messages.append(
-                            SessionMessage(
-                                role="assistant",
-                                content=text,
-                                thinking=thinking,
-                                timestamp=timestamp,
-                            )
-                        )
+        result = parse_detail(session_file, _DetailState, _detail_states, limit)
 
         # Fallback to decoding folder name if cwd not found
+        directory = result.directory
         if directory is None:
             project_dir = session_file.parent.name
             directory = decode_project_path(project_dir)
 
+        last_activity = result.last_activity
         if last_activity is None:
             mtime = session_file.stat().st_mtime
             from datetime import datetime, timezone
@@ -322,18 +370,19 @@ def get_claude_session_detail(
             last_activity = datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
 
         # Apply message limit
+        messages = result.messages
         messages = messages[-limit:] if len(messages) > limit else messages
 
         return SessionDetail(
             id=session_id,
             runner_type=RunnerType.CLAUDE_CODE,
             directory=directory,
-            first_prompt=first_prompt,
-            last_prompt=last_prompt,
+            first_prompt=result.first_prompt,
+            last_prompt=result.last_prompt,
             last_activity=last_activity,
             message_count=len(messages),
             is_running=session_id in running_sessions,
-            messages=messages,
+            messages=[m.to_model() for m in messages],
         )
 
     except Exception as e:
@@ -393,3 +442,40 @@ def _extract_text_content(content, role: str = "assistant") -> tuple[str, str |
         return text_content, thinking_content
 
     return "", None
+
+
+def get_claude_session_messages(
+    session_id: str,
+    offset: int = 0,
+    limit: int = 50,
+) -> SessionMessagePage | None:
+    """Load one page of a Claude Code session's messages.
+
+    Args:
+        session_id: The session ID.
+        offset: Index of the first message; negative values count from the end.
+        limit: Maximum messages to return.
+
+    Returns:
+        The page, or None if the session was not found.
+    """
+    session_file = _find_session_file(session_id)
+    if not session_file:
+        return None
+
+    try:
+        return get_message_page(
+            RunnerType.CLAUDE_CODE,
+            _PARSER_VERSION,
+            session_id,
+            session_file,
+            _DetailState,
+            offset,
+            limit,
+        )
+    except Exception as exc:
+        logger.warning(
+            "Failed to read Claude Code session messages",
+            extra={"session_file": str(session_file), "error": str(exc)},
+        )
+        return None
@@ -2,24 +2,45 @@
 
 from __future__ import annotations
 
-import json
+import dataclasses
 import os
 import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
 
 import logging
 
+from agent_sessions import deadline, metrics
+from agent_sessions.cache import SummaryCache, cached_summary
+from agent_sessions.jsonl import (
+    StateCache,
+    decode_line,
+    parse_detail,
+    peek_payload_type,
+    peek_type,
+)
+from agent_sessions.locator import locate_session_file, subdirectories
+from agent_sessions.message_index import get_message_page
 from agent_sessions.running import find_running_codex_sessions
+from agent_sessions.scanning import Candidate, scan_files, select_recent
 from agent_sessions.path_utils import normalize_directory_path
 from agent_sessions.models import (
+    MessageRecord,
     RunnerType,
     SessionSummary,
     SessionDetail,
-    SessionMessage,
+    SessionMessagePage,
 )
+from agent_sessions.query import SessionQuery, matching, prune
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _SummaryState changes what it produces.
+_PARSER_VERSION = 1
+
+_DAY_SECONDS = 24 * 60 * 60
+
 _ROLLOUT_ID_RE = re.compile(r"rollout-.*-([0-9a-fA-F-]{32,})\.jsonl$")
 
 
@@ -54,6 +75,10 @@ def _is_environment_context(text: str) -> bool:
     return text.lstrip().startswith("<environment_context>")
 
 
+def _is_rollout_file_name(name: str) -> bool:
+    return name.startswith("rollout-") and name.endswith(".jsonl")
+
+
 def _infer_session_id(session_file: Path) -> str | None:
     match = _ROLLOUT_ID_RE.match(session_file.name)
     if match:
@@ -61,136 +86,294 @@ def _infer_session_id(session_file: Path) -> str | None:
     return None
 
 
-def _parse_session_summary(
-    session_file: Path,
-    running_sessions: set[str],
-) -> SessionSummary | None:
+def _accepts_line(line: bytes) -> bool:
+    """Return False for lines the parsers would only take a timestamp from."""
+    types = peek_payload_type(line)
+    if types is not None and types[0] == "response_item":
+        return types[1] == "message"
+    record_type = peek_type(line)
+    return record_type is None or record_type in ("session_meta", "response_item")
+
+
+@dataclass
+class _SummaryState:
+    """Running state of the summary parser, resumable across appends."""
+
     session_id: str | None = None
     first_prompt: str | None = None
     last_prompt: str | None = None
     last_activity: str | None = None
     directory: str | None = None
-    message_count = 0
-
-    try:
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    record = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                timestamp = record.get("timestamp")
-                if timestamp:
-                    last_activity = timestamp
-
-                record_type = record.get("type")
-                payload = record.get("payload", {})
-
-                if record_type == "session_meta":
-                    session_id = payload.get("id") or session_id
-                    cwd = payload.get("cwd")
-                    if isinstance(cwd, str):
-                        directory = cwd
-
-                if record_type == "response_item" and isinstance(payload, dict):
-                    if payload.get("type") == "message":
-                        role = payload.get("role")
-                        content = payload.get("content")
-                        text = _extract_text(content)
-                        if role in ("user", "assistant"):
-                            message_count += 1
-                        if role == "user" and text:
-                            if not _is_environment_context(text):
-                                if first_prompt is None:
-                                    first_prompt = text[:200]
-                                last_prompt = text[:200]
-
+    message_count: int = 0
+
+    def accepts(self, line: bytes) -> bool:
+        return _accepts_line(line)
+
+    def feed(self, record: dict) -> None:
+        timestamp = record.get("timestamp")
+        if timestamp:
+            self.last_activity = timestamp
+
+        record_type = record.get("type")
+        payload = record.get("payload", {})
+
+        if record_type == "session_meta":
+            self.session_id = payload.get("id") or self.session_id
+            cwd = payload.get("cwd")
+            if isinstance(cwd, str):
+                self.directory = cwd
+
+        if record_type == "response_item" and isinstance(payload, dict):
+            if payload.get("type") == "message":
+                role = payload.get("role")
+                content = payload.get("content")
+                text = _extract_text(content)
+                if role in ("user", "assistant"):
+                    self.message_count += 1
+                if role == "user" and text:
+                    if not _is_environment_context(text):
+                        if self.first_prompt is None:
+                            self.first_prompt = text[:200]
+                        self.last_prompt = text[:200]
+
+    def to_summary(self, session_file: Path, running_sessions: set[str]) -> SessionSummary | None:
+        session_id = self.session_id
         if session_id is None:
             session_id = _infer_session_id(session_file)
 
-        if directory is None:
+        if self.directory is None:
             return None
 
+        last_activity = self.last_activity
         if last_activity is None:
             mtime = session_file.stat().st_mtime
-            from datetime import datetime, timezone
-
             last_activity = datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
 
         return SessionSummary(
             id=session_id or session_file.stem,
             runner_type=RunnerType.CODEX,
-            directory=directory,
-            first_prompt=first_prompt,
-            last_prompt=last_prompt,
+            directory=self.directory,
+            first_prompt=self.first_prompt,
+            last_prompt=self.last_prompt,
             last_activity=last_activity,
-            message_count=message_count,
+            message_count=self.message_count,
             is_running=(session_id or "") in running_sessions,
         )
-    except Exception as exc:
-        logger.warning(
-            "Failed to parse Codex session file",
-            session_file=str(session_file),
-            error=str(exc),
-        )
+
+
+def _partition_start(year: str, month: str, day: str) -> float | None:
+    """Return the UTC epoch of midnight on a ``YYYY/MM/DD`` partition."""
+    try:
+        return datetime(int(year), int(month), int(day), tzinfo=timezone.utc).timestamp()
+    except ValueError:
         return None
 
 
+def _subdirs(directory: Path) -> list[str]:
+    try:
+        with os.scandir(directory) as entries:
+            names = [e.name for e in entries if e.is_dir()]
+    except OSError:
+        return []
+    return sorted(names, reverse=True)
+
+
+def _scan_partitions(sessions_root: Path, until: float | None) -> list[Candidate]:
+    """Stat rollouts under ``YYYY/MM/DD`` partitions, newest partition first.
+
+    A rollout is filed under the (local) day its session started, so nothing
+    in a partition can have been active before that day.  Partitions starting
+    after ``until`` (allowing a day for the local-time offset) are skipped
+    without being listed.
+    """
+
+    def after_until(year: str, month: str = "1", day: str = "1") -> bool:
+        if until is None:
+            return False
+        start = _partition_start(year, month, day)
+        return start is not None and start - _DAY_SECONDS > until
+
+    candidates = scan_files(sessions_root, _is_rollout_file_name)
+    for year in _subdirs(sessions_root):
+        year_dir = sessions_root / year
+        if not year.isdigit():
+            # Not a date partition; keep whatever rollouts it holds.
+            candidates.extend(scan_files(year_dir, _is_rollout_file_name, recursive=True))
+            continue
+        if after_until(year):
+            continue
+        for month in _subdirs(year_dir):
+            month_dir = year_dir / month
+            if after_until(year, month):
+                continue
+            for day in _subdirs(month_dir):
+                if after_until(year, month, day):
+                    continue
+                candidates.extend(
+                    scan_files(month_dir / day, _is_rollout_file_name, recursive=True)
+                )
+    return candidates
+
+
 def list_codex_sessions(
     directory: str | None = None,
     limit: int = 50,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    timeout_ms: int | None = None,
+    query: SessionQuery | None = None,
 ) -> list[SessionSummary]:
-    """Discover Codex sessions stored under ~/.codex/sessions."""
+    """Discover Codex sessions stored under ~/.codex/sessions.
+
+    Args:
+        directory: Only return sessions started in this directory.
+        limit: Maximum sessions to return.
+        since: Only return sessions last active at or after this time.
+        until: Only return sessions last active at or before this time.
+            Naive datetimes are taken as UTC.
+        timeout_ms: Stop after this many milliseconds and return the sessions
+            parsed so far, as a ``SessionList`` flagging what was skipped.
+        query: Further conditions; its time range is combined with
+            ``since`` and ``until``.
+
+    Date partitions that started after ``until`` are never listed, and files
+    last modified before ``since`` are skipped without being opened.
+    """
+    if timeout_ms is not None:
+        return deadline.run_with_timeout(
+            timeout_ms,
+            RunnerType.CODEX,
+            list_codex_sessions,
+            directory=directory,
+            limit=limit,
+            since=since,
+            until=until,
+            query=query,
+        )
+
     sessions_root = _sessions_dir()
     if not sessions_root.exists():
         return []
 
     normalized_directory = normalize_directory_path(directory) if directory else None
+    if since is not None or until is not None:
+        query = (query or SessionQuery()).bounded(since, until)
     running_sessions = find_running_codex_sessions()
-    sessions: list[SessionSummary] = []
 
-    for session_file in sessions_root.rglob("rollout-*.jsonl"):
-        summary = _parse_session_summary(session_file, running_sessions)
+    candidates = _scan_partitions(sessions_root, query.until_ts if query else None)
+    candidates = prune(query, candidates, _session_id_from_file, running_sessions)
+
+    def summarize(candidate: Candidate) -> SessionSummary | None:
+        summary = cached_summary(
+            cache, candidate.path, running_sessions, _SummaryState, candidate.stat
+        )
         if not summary:
-            continue
+            return None
         if (
             normalized_directory
             and normalize_directory_path(summary.directory) != normalized_directory
         ):
-            continue
-        sessions.append(summary)
+            return None
+        return matching(query, summary)
+
+    with SummaryCache(RunnerType.CODEX.value, _PARSER_VERSION) as cache:
+        return select_recent(candidates, summarize, limit)
 
-    sessions.sort(key=lambda s: s.last_activity, reverse=True)
-    return sessions[:limit]
+
+# Rollouts start with their session_meta record; look no further than this.
+_HEADER_SCAN_LINES = 10
+
+
+def _session_id_from_file(session_file: Path) -> str | None:
+    """Return the session ID of a rollout, from its name or session_meta header."""
+    session_id = _infer_session_id(session_file)
+    if session_id:
+        return session_id
+    size = 0
+    try:
+        with open(session_file, "rb") as f:
+            for _, line in zip(range(_HEADER_SCAN_LINES), f):
+                size += len(line)
+                if b'"session_meta"' not in line:
+                    continue
+                record = decode_line(line) or {}
+                payload = record.get("payload", {})
+                if isinstance(payload, dict) and payload.get("id"):
+                    return payload["id"]
+    except Exception:
+        return None
+    finally:
+        metrics.record_read(size)
+    return None
 
 
 def _find_session_file(session_id: str) -> Path | None:
+    """Find a rollout file by session ID via the session location index."""
     sessions_root = _sessions_dir()
     if not sessions_root.exists():
         return None
+    return locate_session_file(
+        RunnerType.CODEX.value,
+        session_id,
+        lambda: subdirectories(sessions_root, recursive=True),
+        _is_rollout_file_name,
+        _session_id_from_file,
+    )
 
-    for session_file in sessions_root.rglob(f"*{session_id}.jsonl"):
-        if session_file.is_file():
-            return session_file
-
-    # Fallback: scan for matching session_meta ID
-    for session_file in sessions_root.rglob("rollout-*.jsonl"):
-        try:
-            with open(session_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if '"type":"session_meta"' not in line:
-                        continue
-                    record = json.loads(line)
-                    payload = record.get("payload", {})
-                    if payload.get("id") == session_id:
-                        return session_file
-        except Exception:
-            continue
-    return None
+
+@dataclass
+class _DetailState:
+    """Running state of the detail parser, resumable across appends."""
+
+    first_prompt: str | None = None
+    last_prompt: str | None = None
+    last_activity: str | None = None
+    directory: str | None = None
+    messages: list[MessageRecord] = field(default_factory=list)
+
+    def __copy__(self) -> _DetailState:
+        return dataclasses.replace(self, messages=list(self.messages))
+
+    def accepts(self, line: bytes) -> bool:
+        return _accepts_line(line)
+
+    def feed(self, record: dict) -> None:
+        timestamp = record.get("timestamp")
+        if timestamp:
+            self.last_activity = timestamp
+
+        record_type = record.get("type")
+        payload = record.get("payload", {})
+
+        if record_type == "session_meta":
+            cwd = payload.get("cwd")
+            if isinstance(cwd, str):
+                self.directory = cwd
+
+        if record_type == "response_item" and isinstance(payload, dict):
+            if payload.get("type") != "message":
+                return
+            role = payload.get("role")
+            if role not in ("user", "assistant"):
+                return
+            content = payload.get("content")
+            text = _extract_text(content)
+            if role == "user" and text:
+                if not _is_environment_context(text):
+                    if self.first_prompt is None:
+                        self.first_prompt = text[:200]
+                    self.last_prompt = text[:200]
+            self.messages.append(
+                MessageRecord(
+                    role=role,
+                    content=text,
+                    timestamp=timestamp,
+                )
+            )
+
+
+# Parsed detail of recently viewed sessions, so polling only reads appends.
+_detail_states: StateCache[_DetailState] = StateCache()
 
 
 def get_codex_session_detail(
@@ -202,78 +385,32 @@ def get_codex_session_detail(
         return None
 
     running_sessions = find_running_codex_sessions()
-    first_prompt: str | None = None
-    last_prompt: str | None = None
-    last_activity: str | None = None
-    directory: str | None = None
-    messages: list[SessionMessage] = []
 
     try:
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    record = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+        result = parse_detail(session_file, _DetailState, _detail_states, limit)
 
-                timestamp = record.get("timestamp")
-                if timestamp:
-                    last_activity = timestamp
-
-                record_type = record.get("type")
-                payload = record.get("payload", {})
-
-                if record_type == "session_meta":
-                    cwd = payload.get("cwd")
-                    if isinstance(cwd, str):
-                        directory = cwd
-
-                if record_type == "response_item" and isinstance(payload, dict):
-                    if payload.get("type") != "message":
-                        continue
-                    role = payload.get("role")
-                    if role not in ("user", "assistant"):
-                        continue
-                    content = payload.get("content")
-                    text = _extract_text(content)
-                    if role == "user" and text:
-                        if not _is_environment_context(text):
-                            if first_prompt is None:
-                                first_prompt = text[:200]
-                            last_prompt = text[:200]
-                    messages.append(
-                        SessionMessage(
-                            role=role,
-                            content=text,
-                            timestamp=timestamp,
-                        )
-                    )
-
-        if directory is None:
+        if result.directory is None:
             return None
 
+        last_activity = result.last_activity
         if last_activity is None:
             mtime = session_file.stat().st_mtime
-            from datetime import datetime, timezone
-
             last_activity = datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
 
+        messages = result.messages
         if limit and len(messages) > limit:
             messages = messages[-limit:]
 
         return SessionDetail(
             id=session_id,
             runner_type=RunnerType.CODEX,
-            directory=directory,
-            first_prompt=first_prompt,
-            last_prompt=last_prompt,
+            directory=result.directory,
+            first_prompt=result.first_prompt,
+            last_prompt=result.last_prompt,
             last_activity=last_activity,
             message_count=len(messages),
             is_running=session_id in running_sessions,
-            messages=messages,
+            messages=[m.to_model() for m in messages],
         )
     except Exception as exc:
         logger.warning(
@@ -282,3 +419,40 @@ def get_codex_session_detail(
             error=str(exc),
         )
         return None
+
+
+def get_codex_session_messages(
+    session_id: str,
+    offset: int = 0,
+    limit: int = 50,
+) -> SessionMessagePage | None:
+    """Load one page of a Codex session's messages.
+
+    Args:
+        session_id: The session ID.
+        offset: Index of the first message; negative values count from the end.
+        limit: Maximum messages to return.
+
+    Returns:
+        The page, or None if the session was not found.
+    """
+    session_file = _find_session_file(session_id)
+    if not session_file:
+        return None
+
+    try:
+        return get_message_page(
+            RunnerType.CODEX,
+            _PARSER_VERSION,
+            session_id,
+            session_file,
+            _DetailState,
+            offset,
+            limit,
+        )
+    except Exception as exc:
+        logger.warning(
+            "Failed to read Codex session messages",
+            extra={"session_file": str(session_file), "error": str(exc)},
+        )
+        return None
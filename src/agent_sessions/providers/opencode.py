@@ -21,24 +21,35 @@ from __future__ import annotations
 import json
 import logging
 import os
+import re
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
 
+from agent_sessions import deadline, metrics
+from agent_sessions.jsonl import loads
+from agent_sessions.message_index import page_bounds
 from agent_sessions.models import (
+    MessageRecord,
     RunnerType,
     SessionDetail,
     SessionMessage,
+    SessionMessagePage,
     SessionSummary,
 )
+from agent_sessions.query import SessionQuery
 from agent_sessions.running import find_running_opencode_sessions
+from agent_sessions.scanning import emit_summary
 
 logger = logging.getLogger(__name__)
 
 DB_FILENAME = "opencode.db"
 
+# Seconds to wait for a locked database (sqlite3's default).
+_BUSY_TIMEOUT = 5.0
 
-def _opencode_db_path() -> Path:
+
+def opencode_db_path() -> Path:
     """Return the path to the OpenCode database.
 
     Uses ``XDG_DATA_HOME`` if set, otherwise defaults to
@@ -57,165 +68,328 @@ def _millis_to_iso(ts: int | None) -> str | None:
     return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).isoformat()
 
 
-def _extract_text_from_parts(conn: sqlite3.Connection, message_id: str) -> tuple[str, str | None]:
-    """Extract text content from parts for a given message.
+def _text_from_part(data_json: str) -> str | None:
+    """Return the text of a ``part`` row's JSON data, or None if it has none."""
+    try:
+        part = loads(data_json)
+    except (ValueError, TypeError):
+        return None
 
-    Returns:
-        (text_content, thinking_content)
+    if not isinstance(part, dict):
+        return None
+
+    part_type = part.get("type", "")
+    if part_type == "text":
+        text = part.get("text", "")
+        if text:
+            return text
+    return None
+
+
+# A part row that carries non-empty text.  json_extract raises on malformed
+# JSON, so it is only evaluated for valid documents.
+_TEXT_PART_SQL = """
+    CASE WHEN json_valid(p.data)
+        THEN json_extract(p.data, '$.type') = 'text'
+            AND json_type(p.data, '$.text') = 'text'
+            AND json_extract(p.data, '$.text') != ''
+    END
+"""
 
-    Note: OpenCode does not currently expose separate "thinking" content
-    in the same way as Claude. All text parts are combined into text_content.
+# A message row written by the user, guarded like ``_TEXT_PART_SQL``.
+_USER_MESSAGE_SQL = """
+    CASE WHEN json_valid(m.data) THEN json_extract(m.data, '$.role') END = 'user'
+"""
+
+
+def _get_prompts_for_sessions(
+    conn: sqlite3.Connection,
+    sessions_sql: str,
+    params: list | tuple,
+) -> dict[str, tuple[str | None, str | None]]:
+    """Get the first and last user prompts for a set of sessions in one query.
+
+    Args:
+        conn: Open database connection.
+        sessions_sql: A SELECT returning the session IDs to look at.
+        params: Parameters for ``sessions_sql``.
+
+    Returns:
+        Mapping of session ID to ``(first_prompt, last_prompt)`` for sessions
+        that have at least one user message with text.
+    """
+    # Rank each session's user messages that carry text, then fetch the parts
+    # of only the first and the last one.
+    query = f"""
+        WITH prompt_message AS (
+            SELECT
+                m.id,
+                m.session_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY m.session_id ORDER BY m.time_created ASC, m.id ASC
+                ) AS first_rank,
+                ROW_NUMBER() OVER (
+                    PARTITION BY m.session_id ORDER BY m.time_created DESC, m.id DESC
+                ) AS last_rank
+            FROM message m
+            WHERE m.session_id IN ({sessions_sql})
+              AND {_USER_MESSAGE_SQL}
+              AND EXISTS (
+                  SELECT 1 FROM part p WHERE p.message_id = m.id AND {_TEXT_PART_SQL}
+              )
+        )
+        SELECT pm.session_id, pm.id, pm.first_rank = 1, pm.last_rank = 1, p.data
+        FROM prompt_message pm
+        JOIN part p ON p.message_id = pm.id
+        WHERE pm.first_rank = 1 OR pm.last_rank = 1
+        ORDER BY pm.session_id, pm.id, p.time_created ASC, p.id ASC
     """
-    texts: list[str] = []
 
-    try:
-        cursor = conn.execute(
-            "SELECT data FROM part WHERE message_id = ? ORDER BY time_created ASC",
-            (message_id,),
+    texts: dict[tuple[str, str], list[str]] = {}
+    ranks: dict[tuple[str, str], tuple[bool, bool]] = {}
+    for session_id, message_id, is_first, is_last, data_json in conn.execute(query, params):
+        key = (session_id, message_id)
+        ranks[key] = (bool(is_first), bool(is_last))
+        text = _text_from_part(data_json)
+        if text:
+            texts.setdefault(key, []).append(text)
+
+    prompts: dict[str, tuple[str | None, str | None]] = {}
+    for (session_id, message_id), (is_first, is_last) in ranks.items():
+        prompt = "\n".join(texts.get((session_id, message_id), []))[:200] or None
+        first_prompt, last_prompt = prompts.get(session_id, (None, None))
+        if is_first:
+            first_prompt = prompt
+        if is_last:
+            last_prompt = prompt
+        prompts[session_id] = (first_prompt, last_prompt)
+    return prompts
+
+
+def _session_conditions(
+    directory: str | None,
+    query: SessionQuery | None,
+    running_sessions: set[str],
+) -> tuple[list[str], list]:
+    """Translate the filters into SQL conditions on the ``session`` table.
+
+    All conditions are exact except the prompt text, which is narrowed down
+    to sessions whose title or user messages contain it; the summaries are
+    checked with ``SessionQuery.matches`` afterwards.
+    """
+    conditions = ["parent_id IS NULL"]
+    params: list = []
+    if directory:
+        conditions.append("directory = ?")
+        params.append(directory)
+    if query is None:
+        return conditions, params
+
+    if query.root is not None:
+        prefix = query.root.rstrip("/") + "/"
+        conditions.append("(directory = ? OR substr(directory, 1, ?) = ?)")
+        params.extend([query.root, len(prefix), prefix])
+    if query.since_ts is not None:
+        conditions.append("time_updated >= ?")
+        params.append(query.since_ts * 1000)
+    if query.until_ts is not None:
+        conditions.append("time_updated <= ?")
+        params.append(query.until_ts * 1000)
+    if query.running:
+        # Join against the IDs found in the process table.
+        conditions.append("id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(sorted(running_sessions)))
+    if query.min_messages > 0:
+        conditions.append(
+            "(SELECT COUNT(*) FROM message WHERE message.session_id = session.id) >= ?"
         )
-        for (data_json,) in cursor:
-            try:
-                part = json.loads(data_json)
-            except (json.JSONDecodeError, TypeError):
-                continue
+        params.append(query.min_messages)
+    if query.prompt and query.prompt.isascii():
+        # LIKE ignores case for ASCII only; other text is matched in Python.
+        pattern = "%" + re.sub(r"([%_\\])", r"\\\1", query.prompt) + "%"
+        conditions.append(f"""
+            (title LIKE ? ESCAPE '\\' OR EXISTS (
+                SELECT 1
+                FROM message m
+                JOIN part p ON p.message_id = m.id
+                WHERE m.session_id = session.id
+                  AND {_USER_MESSAGE_SQL}
+                  AND {_TEXT_PART_SQL}
+                  AND json_extract(p.data, '$.text') LIKE ? ESCAPE '\\'
+            ))
+            """)
+        params.extend([pattern, pattern])
+    return conditions, params
+
+
+def read_sessions(
+    conn: sqlite3.Connection,
+    db_path: Path,
+    conditions: list[str],
+    params: list,
+    limit: int,
+    query: SessionQuery | None,
+    running_sessions: set[str],
+) -> list[SessionSummary]:
+    """Return the most recently updated sessions meeting ``conditions``."""
+    sessions: list[SessionSummary] = []
+    after: tuple[int, str] | None = None
+    while True:
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if after is not None:
+            # Keyset pagination, for pages the query's prompt filter thinned out.
+            page_conditions.append("(time_updated < ? OR (time_updated = ? AND id < ?))")
+            page_params.extend([after[0], after[0], after[1]])
+
+        # Build the page query
+        page_sql = f"""
+            SELECT id, directory, title, time_created, time_updated
+            FROM session
+            WHERE {" AND ".join(page_conditions)}
+            ORDER BY time_updated DESC, id DESC
+        """
+        if limit:
+            page_sql += " LIMIT ?"
+            page_params.append(limit)
+
+        # Count messages (user + assistant) for the whole page at once
+        rows = conn.execute(
+            f"""
+            WITH page AS ({page_sql})
+            SELECT page.id, page.directory, page.title, page.time_updated,
+                   COALESCE(counts.message_count, 0) AS message_count
+            FROM page
+            LEFT JOIN (
+                SELECT session_id, COUNT(*) AS message_count
+                FROM message
+                WHERE session_id IN (SELECT id FROM page)
+                GROUP BY session_id
+            ) counts ON counts.session_id = page.id
+            ORDER BY page.time_updated DESC, page.id DESC
+            """,
+            page_params,
+        ).fetchall()
 
-            if not isinstance(part, dict):
-                continue
+        # Get first and last user prompts
+        try:
+            prompts = _get_prompts_for_sessions(conn, f"SELECT id FROM ({page_sql})", page_params)
+        except sqlite3.Error as exc:
+            if deadline.expired():
+                # Sessions are returned with their titles as prompts.
+                deadline.mark_incomplete(str(db_path))
+            logger.debug(
+                "Failed to load OpenCode prompts",
+                extra={"db_path": str(db_path), "error": str(exc)},
+            )
+            prompts = {}
 
-            part_type = part.get("type", "")
-            if part_type == "text":
-                text = part.get("text", "")
-                if text:
-                    texts.append(text)
-    except Exception:
-        pass
+        for row in rows:
+            session_id = row["id"]
+            title = row["title"]
+            last_activity = _millis_to_iso(row["time_updated"]) or ""
+
+            first_prompt, last_prompt = prompts.get(session_id, (None, None))
+
+            # Use title as fallback for first_prompt
+            if not first_prompt and title:
+                first_prompt = title[:200]
+
+            summary = SessionSummary(
+                id=session_id,
+                runner_type=RunnerType.OPENCODE,
+                directory=row["directory"],
+                first_prompt=first_prompt,
+                last_prompt=last_prompt,
+                last_activity=last_activity,
+                message_count=row["message_count"],
+                is_running=session_id in running_sessions,
+            )
+            if query is not None and not query.matches(summary):
+                continue
+            sessions.append(summary)
+            emit_summary(summary, (row["time_updated"] or 0) / 1000)
+            if limit and len(sessions) >= limit:
+                return sessions
 
-    text_content = "\n".join(texts)
-    return text_content, None
+        if not limit or len(rows) < limit:
+            return sessions
+        after = (rows[-1]["time_updated"], rows[-1]["id"])
 
 
 def list_opencode_sessions(
     directory: str | None = None,
     limit: int = 50,
+    timeout_ms: int | None = None,
+    query: SessionQuery | None = None,
 ) -> list[SessionSummary]:
     """Discover OpenCode sessions.
 
     Reads from the centralized OpenCode database at
     ``~/.local/share/opencode/opencode.db`` and returns session summaries.
+    Message counts and prompts for the whole page are loaded with a fixed
+    number of queries, independent of how many sessions or messages there are.
 
     Args:
         directory: Filter to sessions for this specific project directory.
         limit: Maximum sessions to return.
+        timeout_ms: Give up after this many milliseconds, returning a
+            ``SessionList`` that flags the database as incomplete.
+        query: Further conditions, evaluated by SQLite.
 
     Returns:
         List of session summaries sorted by last_activity descending.
     """
-    db_path = _opencode_db_path()
+    if timeout_ms is not None:
+        return deadline.run_with_timeout(
+            timeout_ms,
+            RunnerType.OPENCODE,
+            list_opencode_sessions,
+            directory=directory,
+            limit=limit,
+            query=query,
+        )
+
+    db_path = opencode_db_path()
     if not db_path.exists():
         return []
 
     running_sessions = find_running_opencode_sessions()
-    sessions: list[SessionSummary] = []
+    conditions, params = _session_conditions(directory, query, running_sessions)
 
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn = metrics.trace_queries(
+            sqlite3.connect(
+                f"file:{db_path}?mode=ro", uri=True, timeout=deadline.remaining(_BUSY_TIMEOUT)
+            )
+        )
+        deadline.interrupt_when_expired(conn)
         conn.row_factory = sqlite3.Row
-
         try:
-            # Build query with optional directory filter
-            query = """
-                SELECT id, directory, title, time_created, time_updated
-                FROM session
-                WHERE parent_id IS NULL
-            """
-            params = []
-
-            if directory:
-                query += " AND directory = ?"
-                params.append(directory)
-
-            query += " ORDER BY time_updated DESC"
-
-            if limit:
-                query += " LIMIT ?"
-                params.append(limit)
-
-            cursor = conn.execute(query, params)
-
-            for row in cursor:
-                session_id = row["id"]
-                session_dir = row["directory"]
-                title = row["title"]
-                time_updated = row["time_updated"]
-                last_activity = _millis_to_iso(time_updated) or ""
-
-                # Get first and last user prompts
-                first_prompt, last_prompt = _get_first_last_prompts(conn, session_id)
-
-                # Use title as fallback for first_prompt
-                if not first_prompt and title:
-                    first_prompt = title[:200]
-
-                # Count messages (user + assistant)
-                message_count_cursor = conn.execute(
-                    "SELECT COUNT(*) FROM message WHERE session_id = ?",
-                    (session_id,),
-                )
-                message_count = message_count_cursor.fetchone()[0]
-
-                sessions.append(
-                    SessionSummary(
-                        id=session_id,
-                        runner_type=RunnerType.OPENCODE,
-                        directory=session_dir,
-                        first_prompt=first_prompt,
-                        last_prompt=last_prompt,
-                        last_activity=last_activity,
-                        message_count=message_count,
-                        is_running=session_id in running_sessions,
-                    )
-                )
+            return read_sessions(conn, db_path, conditions, params, limit, query, running_sessions)
         finally:
             conn.close()
     except Exception as exc:
+        if deadline.expired():
+            # Out of time (locked database or slow query): nothing to return.
+            deadline.mark_incomplete(str(db_path))
+            return []
         logger.warning(
             "Failed to read OpenCode database",
             extra={"db_path": str(db_path), "error": str(exc)},
         )
-
-    return sessions
+    return []
 
 
 def _get_first_last_prompts(
     conn: sqlite3.Connection, session_id: str
 ) -> tuple[str | None, str | None]:
     """Get the first and last user prompts for a session."""
-    first_prompt: str | None = None
-    last_prompt: str | None = None
-
     try:
-        # Get user messages ordered by creation time
-        cursor = conn.execute(
-            """
-            SELECT id, data FROM message
-            WHERE session_id = ? AND json_extract(data, '$.role') = 'user'
-            ORDER BY time_created ASC
-            """,
-            (session_id,),
-        )
-
-        for message_id, data_json in cursor:
-            # Extract text from parts
-            text, _ = _extract_text_from_parts(conn, message_id)
-            if text:
-                prompt = text[:200]
-                if first_prompt is None:
-                    first_prompt = prompt
-                last_prompt = prompt
+        prompts = _get_prompts_for_sessions(conn, "?", (session_id,))
     except Exception:
-        pass
-
-    return first_prompt, last_prompt
+        return None, None
+    return prompts.get(session_id, (None, None))
 
 
 def get_opencode_session_detail(
@@ -231,14 +405,14 @@ def get_opencode_session_detail(
     Returns:
         Session detail with messages, or None if not found.
     """
-    db_path = _opencode_db_path()
+    db_path = opencode_db_path()
     if not db_path.exists():
         return None
 
     running_sessions = find_running_opencode_sessions()
 
     try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn = metrics.trace_queries(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True))
         conn.row_factory = sqlite3.Row
 
         try:
@@ -289,30 +463,52 @@ def get_opencode_session_detail(
 def _get_messages(
     conn: sqlite3.Connection, session_id: str, limit: int = 100
 ) -> list[SessionMessage]:
-    """Get messages for a session, applying the limit to the most recent."""
+    """Get messages for a session, applying the limit to the most recent.
+
+    Only the selected messages are read, and the text parts of all of them
+    are fetched with one ordered query and grouped in Python.
+    """
     messages: list[SessionMessage] = []
 
+    # Apply limit to most recent; SQLite treats a negative LIMIT as no limit
+    sql_limit = limit if limit and limit > 0 else -1
+    recent_sql = (
+        "SELECT id FROM message WHERE session_id = ? "
+        "ORDER BY time_created DESC, id DESC LIMIT ?"
+    )
+
     try:
         cursor = conn.execute(
             "SELECT id, data, time_created FROM message "
-            "WHERE session_id = ? ORDER BY time_created ASC",
-            (session_id,),
+            "WHERE session_id = ? ORDER BY time_created DESC, id DESC LIMIT ?",
+            (session_id, sql_limit),
         )
-        all_rows = cursor.fetchall()
+        rows = cursor.fetchall()
+        rows.reverse()
 
-        # Apply limit to most recent
-        if len(all_rows) > limit:
-            all_rows = all_rows[-limit:]
+        texts: dict[str, list[str]] = {}
+        cursor = conn.execute(
+            f"""
+            SELECT p.message_id, p.data FROM part p
+            WHERE p.message_id IN ({recent_sql}) AND {_TEXT_PART_SQL}
+            ORDER BY p.message_id, p.time_created ASC, p.id ASC
+            """,
+            (session_id, sql_limit),
+        )
+        for message_id, data_json in cursor:
+            text = _text_from_part(data_json)
+            if text:
+                texts.setdefault(message_id, []).append(text)
 
-        for row in all_rows:
+        for row in rows:
             message_id = row["id"]
             data_json = row["data"]
             time_created = row["time_created"]
             timestamp = _millis_to_iso(time_created)
 
             try:
-                data = json.loads(data_json)
-            except (json.JSONDecodeError, TypeError):
+                data = loads(data_json)
+            except (ValueError, TypeError):
                 continue
 
             if not isinstance(data, dict):
@@ -322,17 +518,18 @@ def _get_messages(
             if role not in ("user", "assistant"):
                 continue
 
-            # Extract text from parts
-            text, thinking = _extract_text_from_parts(conn, message_id)
+            # OpenCode does not expose thinking separately; all text parts are content.
+            text = "\n".join(texts.get(message_id, []))
+            thinking = None
 
             if text or thinking:
                 messages.append(
-                    SessionMessage(
+                    MessageRecord(
                         role=role,
                         content=text,
                         thinking=thinking,
                         timestamp=timestamp,
-                    )
+                    ).to_model()
                 )
     except Exception as exc:
         logger.warning(
@@ -341,3 +538,189 @@ def _get_messages(
         )
 
     return messages
+
+
+# A message row with a user/assistant role and at least one text part; only
+# these become SessionMessages.
+_QUALIFYING_MESSAGE_SQL = f"""
+    m.session_id = ?
+    AND CASE WHEN json_valid(m.data)
+        THEN json_extract(m.data, '$.role') IN ('user', 'assistant')
+    END
+    AND EXISTS (SELECT 1 FROM part p WHERE p.message_id = m.id AND {_TEXT_PART_SQL})
+"""
+
+
+def count_messages(conn: sqlite3.Connection, session_id: str) -> int:
+    """Return the number of messages of a session that carry text."""
+    (total,) = conn.execute(
+        f"SELECT COUNT(*) FROM message m WHERE {_QUALIFYING_MESSAGE_SQL}", (session_id,)
+    ).fetchone()
+    return total
+
+
+def message_range(
+    conn: sqlite3.Connection, session_id: str, start: int, count: int
+) -> list[MessageRecord]:
+    """Read ``count`` messages (-1 for all) of a session from index ``start``.
+
+    Indexes count only the messages that carry text, in creation order.
+    """
+    page_sql = (
+        f"SELECT m.id FROM message m WHERE {_QUALIFYING_MESSAGE_SQL} "
+        "ORDER BY m.time_created ASC, m.id ASC LIMIT ? OFFSET ?"
+    )
+    params = (session_id, count, start)
+    rows = conn.execute(
+        f"SELECT m.id, m.data, m.time_created FROM message m "
+        f"WHERE m.id IN ({page_sql}) ORDER BY m.time_created ASC, m.id ASC",
+        params,
+    ).fetchall()
+    texts: dict[str, list[str]] = {}
+    cursor = conn.execute(
+        f"""
+        SELECT p.message_id, p.data FROM part p
+        WHERE p.message_id IN ({page_sql}) AND {_TEXT_PART_SQL}
+        ORDER BY p.message_id, p.time_created ASC, p.id ASC
+        """,
+        params,
+    )
+    for message_id, data_json in cursor:
+        text = _text_from_part(data_json)
+        if text:
+            texts.setdefault(message_id, []).append(text)
+
+    return [
+        MessageRecord(
+            role=loads(data_json)["role"],
+            content="\n".join(texts.get(message_id, [])),
+            timestamp=_millis_to_iso(time_created),
+        )
+        for message_id, data_json, time_created in rows
+    ]
+
+
+def message_cursor(
+    conn: sqlite3.Connection, session_id: str, start: int | None
+) -> tuple[int, str] | None:
+    """Return the ``(time_created, id)`` of the message before index ``start``.
+
+    ``start=None`` means after the last message.  Returns None when reading
+    should begin with the first message.
+    """
+    if start is not None and start <= 0:
+        return None
+    order = "DESC" if start is None else "ASC"
+    row = conn.execute(
+        f"SELECT m.time_created, m.id FROM message m WHERE {_QUALIFYING_MESSAGE_SQL} "
+        f"ORDER BY m.time_created {order}, m.id {order} LIMIT 1 OFFSET ?",
+        (session_id, 0 if start is None else start - 1),
+    ).fetchone()
+    if row is None and start is not None:
+        # Fewer messages than ``start``: continue after the last one.
+        return message_cursor(conn, session_id, None)
+    return tuple(row) if row is not None else None
+
+
+def messages_after(
+    conn: sqlite3.Connection, session_id: str, after: tuple[int, str] | None
+) -> tuple[list[MessageRecord], tuple[int, str] | None]:
+    """Read the messages created after the ``(time_created, id)`` cursor ``after``.
+
+    Reading stops at the first assistant message OpenCode has not marked
+    completed, so its text is not returned half-written.  Returns the records
+    and the cursor of the last one.
+    """
+    newer_sql = (
+        f"SELECT m.id FROM message m WHERE {_QUALIFYING_MESSAGE_SQL} "
+        "AND (m.time_created, m.id) > (?, ?)"
+    )
+    params = (session_id, *(after or (-1, "")))
+    rows = conn.execute(
+        f"SELECT m.id, m.data, m.time_created FROM message m "
+        f"WHERE m.id IN ({newer_sql}) ORDER BY m.time_created ASC, m.id ASC",
+        params,
+    ).fetchall()
+    if not rows:
+        return [], after
+
+    texts: dict[str, list[str]] = {}
+    cursor = conn.execute(
+        f"""
+        SELECT p.message_id, p.data FROM part p
+        WHERE p.message_id IN ({newer_sql}) AND {_TEXT_PART_SQL}
+        ORDER BY p.message_id, p.time_created ASC, p.id ASC
+        """,
+        params,
+    )
+    for message_id, data_json in cursor:
+        text = _text_from_part(data_json)
+        if text:
+            texts.setdefault(message_id, []).append(text)
+
+    records: list[MessageRecord] = []
+    for message_id, data_json, time_created in rows:
+        data = loads(data_json)
+        times = data.get("time")
+        if data["role"] == "assistant" and isinstance(times, dict) and not times.get("completed"):
+            break
+        records.append(
+            MessageRecord(
+                role=data["role"],
+                content="\n".join(texts.get(message_id, [])),
+                timestamp=_millis_to_iso(time_created),
+            )
+        )
+        after = (time_created, message_id)
+    return records, after
+
+
+def get_opencode_session_messages(
+    session_id: str,
+    offset: int = 0,
+    limit: int = 50,
+) -> SessionMessagePage | None:
+    """Load one page of an OpenCode session's messages.
+
+    The page is selected in SQL with LIMIT/OFFSET over the messages that
+    carry text, so only that page's rows and parts are read.
+
+    Args:
+        session_id: The session ID.
+        offset: Index of the first message; negative values count from the end.
+        limit: Maximum messages to return.
+
+    Returns:
+        The page, or None if the session was not found.
+    """
+    db_path = opencode_db_path()
+    if not db_path.exists():
+        return None
+
+    try:
+        conn = metrics.trace_queries(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True))
+        try:
+            if (
+                conn.execute("SELECT 1 FROM session WHERE id = ?", (session_id,)).fetchone()
+                is None
+            ):
+                return None
+            total = count_messages(conn, session_id)
+            start, stop = page_bounds(total, offset, limit)
+            records = message_range(conn, session_id, start, stop - start)
+        finally:
+            conn.close()
+    except Exception as exc:
+        logger.warning(
+            "Failed to query OpenCode messages",
+            extra={"session_id": session_id, "error": str(exc)},
+        )
+        return None
+
+    return SessionMessagePage(
+        id=session_id,
+        runner_type=RunnerType.OPENCODE,
+        offset=start,
+        total=total,
+        messages=[record.to_model() for record in records],
+    )
@@ -8,23 +8,41 @@ compaction, etc.).
 
 from __future__ import annotations
 
-import json
+import dataclasses
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import logging
 
+from agent_sessions import deadline, metrics
+from agent_sessions.cache import SummaryCache, cached_summary
+from agent_sessions.jsonl import (
+    StateCache,
+    decode_line,
+    iter_records,
+    parse_detail,
+    peek_type,
+)
+from agent_sessions.locator import locate_session_file, subdirectories
+from agent_sessions.message_index import get_message_page
 from agent_sessions.running import find_running_pi_sessions
+from agent_sessions.scanning import Candidate, scan_files, select_recent
 from agent_sessions.path_utils import normalize_directory_path
 from agent_sessions.models import (
+    MessageRecord,
     RunnerType,
     SessionSummary,
     SessionDetail,
-    SessionMessage,
+    SessionMessagePage,
 )
+from agent_sessions.query import SessionQuery, matching, prune
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _SummaryState changes what it produces.
+_PARSER_VERSION = 1
+
 
 def _pi_sessions_dir() -> Path:
     """Resolve the pi sessions directory."""
@@ -111,68 +129,68 @@ def _extract_assistant_content(content: object) -> tuple[str, str | None]:
     return "", None
 
 
-def _parse_session_summary(
-    session_file: Path,
-    running_sessions: set[str],
-) -> SessionSummary | None:
-    """Parse a pi session JSONL file and return summary info."""
+# Record types the parsers read; other lines only contribute their timestamp.
+_PARSED_TYPES = frozenset({"session", "message"})
+
+
+def _accepts_line(line: bytes) -> bool:
+    record_type = peek_type(line)
+    return record_type is None or record_type in _PARSED_TYPES
+
+
+@dataclass
+class _SummaryState:
+    """Running state of the summary parser, resumable across appends."""
+
     session_id: str | None = None
     first_prompt: str | None = None
     last_prompt: str | None = None
     last_activity: str | None = None
     directory: str | None = None
-    message_count = 0
-
-    try:
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    record = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                record_type = record.get("type")
-                timestamp = record.get("timestamp")
-
-                if timestamp:
-                    last_activity = timestamp
-
-                # Session header
-                if record_type == "session":
-                    session_id = record.get("id")
-                    cwd = record.get("cwd")
-                    if cwd:
-                        directory = cwd
-
-                # Count user and assistant messages
-                if record_type == "message":
-                    message = record.get("message", {})
-                    role = message.get("role")
-                    if role in ("user", "assistant"):
-                        message_count += 1
-                    if role == "user":
-                        text = _extract_user_text(message.get("content"))
-                        if text:
-                            if first_prompt is None:
-                                first_prompt = text[:200]
-                            last_prompt = text[:200]
+    message_count: int = 0
+
+    def accepts(self, line: bytes) -> bool:
+        return _accepts_line(line)
+
+    def feed(self, record: dict) -> None:
+        record_type = record.get("type")
+        timestamp = record.get("timestamp")
+
+        if timestamp:
+            self.last_activity = timestamp
+
+        # Session header
+        if record_type == "session":
+            self.session_id = record.get("id")
+            cwd = record.get("cwd")
+            if cwd:
+                self.directory = cwd
+
+        # Count user and assistant messages
+        if record_type == "message":
+            message = record.get("message", {})
+            role = message.get("role")
+            if role in ("user", "assistant"):
+                self.message_count += 1
+            if role == "user":
+                text = _extract_user_text(message.get("content"))
+                if text:
+                    if self.first_prompt is None:
+                        self.first_prompt = text[:200]
+                    self.last_prompt = text[:200]
 
+    def to_summary(self, session_file: Path, running_sessions: set[str]) -> SessionSummary:
         # Fallback: decode directory from folder name
+        directory = self.directory
         if directory is None:
             directory = _decode_directory_name(session_file.parent.name)
 
         # Fallback: use file stem as session ID
+        session_id = self.session_id
         if session_id is None:
-            # File name: 2026-02-11T07-36-34-614Z_<uuid>.jsonl
-            name = session_file.stem
-            if "_" in name:
-                session_id = name.split("_", 1)[1]
-            else:
-                session_id = name
+            session_id = _session_id_from_filename(session_file)
 
+        last_activity = self.last_activity
         if last_activity is None:
             mtime = session_file.stat().st_mtime
             from datetime import datetime, timezone
@@ -183,61 +201,84 @@ def _parse_session_summary(
             id=session_id,
             runner_type=RunnerType.PI,
             directory=directory,
-            first_prompt=first_prompt,
-            last_prompt=last_prompt,
+            first_prompt=self.first_prompt,
+            last_prompt=self.last_prompt,
             last_activity=last_activity,
-            message_count=message_count,
+            message_count=self.message_count,
             is_running=session_id in running_sessions,
         )
 
-    except Exception as e:
-        logger.warning(
-            "Failed to parse pi session file",
-            session_file=str(session_file),
-            error=str(e),
-        )
-        return None
+
+def _session_id_from_filename(session_file: Path) -> str:
+    """Return the session ID encoded in a pi session file name.
+
+    File name: ``2026-02-11T07-36-34-614Z_<uuid>.jsonl``.
+    """
+    name = session_file.stem
+    if "_" in name:
+        return name.split("_", 1)[1]
+    return name
 
 
 def list_pi_sessions(
     directory: str | None = None,
     limit: int = 50,
+    timeout_ms: int | None = None,
+    query: SessionQuery | None = None,
 ) -> list[SessionSummary]:
     """Discover pi coding agent sessions.
 
     Args:
         directory: Filter to sessions for this project directory.
         limit: Maximum sessions to return.
+        query: Further conditions; only the project folders that can lie
+            under ``query.directory`` are listed.
+        timeout_ms: Stop after this many milliseconds and return the sessions
+            parsed so far, as a ``SessionList`` flagging what was skipped.
 
     Returns:
         List of session summaries sorted by last_activity descending.
     """
+    if timeout_ms is not None:
+        return deadline.run_with_timeout(
+            timeout_ms,
+            RunnerType.PI,
+            list_pi_sessions,
+            directory=directory,
+            limit=limit,
+            query=query,
+        )
+
     sessions_root = _pi_sessions_dir()
     if not sessions_root.exists():
         return []
 
     running_sessions = find_running_pi_sessions()
-    sessions: list[SessionSummary] = []
 
     # Determine which project directories to scan
     if directory:
         encoded = _encode_directory_name(directory)
         project_dirs = [sessions_root / encoded]
     else:
-        project_dirs = [d for d in sessions_root.iterdir() if d.is_dir()]
+        project_dirs = [
+            d
+            for d in sessions_root.iterdir()
+            if d.is_dir() and (query is None or query.may_contain_folder(d.name))
+        ]
 
+    candidates: list[Candidate] = []
     for project_dir in project_dirs:
-        if not project_dir.exists():
-            continue
-
-        for session_file in project_dir.glob("*.jsonl"):
-            summary = _parse_session_summary(session_file, running_sessions)
-            if summary:
-                sessions.append(summary)
-
-    # Sort by last_activity descending
-    sessions.sort(key=lambda s: s.last_activity, reverse=True)
-    return sessions[:limit]
+        candidates.extend(scan_files(project_dir, lambda name: name.endswith(".jsonl")))
+    candidates = prune(query, candidates, _session_id_from_file, running_sessions)
+
+    with SummaryCache(RunnerType.PI.value, _PARSER_VERSION) as cache:
+        return select_recent(
+            candidates,
+            lambda c: matching(
+                query, cached_summary(cache, c.path, running_sessions, _SummaryState, c.stat)
+            ),
+            limit,
+        )
 
 
 def get_pi_session_model(session_file: Path) -> tuple[str, str] | None:
@@ -251,16 +292,7 @@ def get_pi_session_model(session_file: Path) -> tuple[str, str] | None:
         (provider, model_id) tuple, or None if no model is recorded.
     """
     try:
-        entries: list[dict] = []
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+        entries = list(iter_records(session_file))
 
         if not entries:
             return None
@@ -315,35 +347,97 @@ def get_pi_session_model(session_file: Path) -> tuple[str, str] | None:
         return None
 
 
+def _session_id_from_file(session_file: Path) -> str | None:
+    """Return the session ID of a pi session file, from its name or header."""
+    if "_" in session_file.stem:
+        return _session_id_from_filename(session_file)
+    try:
+        with open(session_file, "rb") as f:
+            line = f.readline()
+        metrics.record_read(len(line), decoded=1)
+        record = decode_line(line)
+        if record and record.get("type") == "session" and record.get("id"):
+            return record["id"]
+    except Exception:
+        return None
+    return None
+
+
 def _find_session_file(session_id: str) -> Path | None:
-    """Find a pi session file by session ID."""
+    """Find a pi session file by session ID via the session location index."""
     sessions_root = _pi_sessions_dir()
     if not sessions_root.exists():
         return None
+    return locate_session_file(
+        RunnerType.PI.value,
+        session_id,
+        lambda: subdirectories(sessions_root),
+        lambda name: name.endswith(".jsonl"),
+        _session_id_from_file,
+    )
 
-    for project_dir in sessions_root.iterdir():
-        if not project_dir.is_dir():
-            continue
-        for session_file in project_dir.glob("*.jsonl"):
-            # Check filename contains the session ID
-            if session_id in session_file.stem:
-                return session_file
-
-    # Fallback: scan session headers
-    for project_dir in sessions_root.iterdir():
-        if not project_dir.is_dir():
-            continue
-        for session_file in project_dir.glob("*.jsonl"):
-            try:
-                with open(session_file, "r", encoding="utf-8") as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        record = json.loads(first_line)
-                        if record.get("type") == "session" and record.get("id") == session_id:
-                            return session_file
-            except Exception:
-                continue
-    return None
+
+@dataclass
+class _DetailState:
+    """Running state of the detail parser, resumable across appends."""
+
+    first_prompt: str | None = None
+    last_prompt: str | None = None
+    last_activity: str | None = None
+    directory: str | None = None
+    messages: list[MessageRecord] = field(default_factory=list)
+
+    def __copy__(self) -> _DetailState:
+        return dataclasses.replace(self, messages=list(self.messages))
+
+    def accepts(self, line: bytes) -> bool:
+        return _accepts_line(line)
+
+    def feed(self, record: dict) -> None:
+        record_type = record.get("type")
+        timestamp = record.get("timestamp")
+
+        if timestamp:
+            self.last_activity = timestamp
+
+        if record_type == "session":
+            cwd = record.get("cwd")
+            if cwd:
+                self.directory = cwd
+
+        if record_type == "message":
+            message = record.get("message", {})
+            role = message.get("role")
+
+            if role == "user":
+                text = _extract_user_text(message.get("content"))
+                if text:
+                    if self.first_prompt is None:
+                        self.first_prompt = text[:200]
+                    self.last_prompt = text[:200]
+                    self.messages.append(
+                        MessageRecord(
+                            role="user",
+                            content=text,
+                            timestamp=timestamp,
+                        )
+                    )
+
+            elif role == "assistant":
+                text, thinking = _extract_assistant_content(message.get("content"))
+                if text or thinking:
+                    self.messages.append(
+                        MessageRecord(
+                            role="assistant",
+                            content=text,
+                            thinking=thinking,
+                            timestamp=timestamp,
+                        )
+                    )
+
+
+# Parsed detail of recently viewed sessions, so polling only reads appends.
+_detail_states: StateCache[_DetailState] = StateCache()
 
 
 def get_pi_session_detail(
@@ -364,68 +458,16 @@ def get_pi_session_detail(
         return None
 
     running_sessions = find_running_pi_sessions()
-    first_prompt: str | None = None
-    last_prompt: str | None = None
-    last_activity: str | None = None
-    directory: str | None = None
-    messages: list[SessionMessage] = []
 
     try:
-        with open(session_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    record = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                record_type = record.get("type")
-                timestamp = record.get("timestamp")
-
-                if timestamp:
-                    last_activity = timestamp
-
-                if record_type == "session":
-                    cwd = record.get("cwd")
-                    if cwd:
-                        directory = cwd
-
-                if record_type == "message":
-                    message = record.get("message", {})
-                    role = message.get("role")
-
-                    if role == "user":
-                        text = _extract_user_text(message.get("content"))
-                        if text:
-                            if first_prompt is None:
-                                first_prompt = text[:200]
-                            last_prompt = text[:200]
-                            messages.append(
-                                SessionMessage(
-                                    role="user",
-                                    content=text,
-                                    timestamp=timestamp,
-                                )
-                            )
-
-                    elif role == "assistant":
-                        text, thinking = _extract_assistant_content(message.get("content"))
-                        if text or thinking:
-                            messages.append(
-                                SessionMessage(
-                                    role="assistant",
-                                    content=text,
-                                    thinking=thinking,
-                                    timestamp=timestamp,
-                                )
-                            )
+        result = parse_detail(session_file, _DetailState, _detail_states, limit)
 
         # Fallback directory from folder name
+        directory = result.directory
         if directory is None:
             directory = _decode_directory_name(session_file.parent.name)
 
+        last_activity = result.last_activity
         if last_activity is None:
             mtime = session_file.stat().st_mtime
             from datetime import datetime, timezone
@@ -433,6 +475,7 @@ def get_pi_session_detail(
             last_activity = datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
 
         # Apply message limit
+        messages = result.messages
         if len(messages) > limit:
             messages = messages[-limit:]
 
@@ -440,12 +483,12 @@ def get_pi_session_detail(
             id=session_id,
             runner_type=RunnerType.PI,
             directory=directory,
-            first_prompt=first_prompt,
-            last_prompt=last_prompt,
+            first_prompt=result.first_prompt,
+            last_prompt=result.last_prompt,
             last_activity=last_activity,
             message_count=len(messages),
             is_running=session_id in running_sessions,
-            messages=messages,
+            messages=[m.to_model() for m in messages],
         )
 
     except Exception as e:
@@ -455,3 +498,40 @@ def get_pi_session_detail(
             error=str(e),
         )
         return None
+
+
+def get_pi_session_messages(
+    session_id: str,
+    offset: int = 0,
+    limit: int = 50,
+) -> SessionMessagePage | None:
+    """Load one page of a pi session's messages.
+
+    Args:
+        session_id: The session ID.
+        offset: Index of the first message; negative values count from the end.
+        limit: Maximum messages to return.
+
+    Returns:
+        The page, or None if the session was not found.
+    """
+    session_file = _find_session_file(session_id)
+    if not session_file:
+        return None
+
+    try:
+        return get_message_page(
+            RunnerType.PI,
+            _PARSER_VERSION,
+            session_id,
+            session_file,
+            _DetailState,
+            offset,
+            limit,
+        )
+    except Exception as exc:
+        logger.warning(
+            "Failed to read pi session messages",
+            extra={"session_file": str(session_file), "error": str(exc)},
+        )
+        return None
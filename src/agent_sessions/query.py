@@ -0,0 +1,178 @@
+"""Structured session queries, planned by each provider against its storage.
+
+A ``SessionQuery`` combines conditions on the sessions to list.  Providers
+use them to avoid touching sessions that cannot match:
+
+* Claude Code and Pi only list the project folders whose encoded names can
+  lie under ``directory``;
+* Codex skips the date partitions that started after ``until``;
+* session files last modified before ``since``, and with ``running`` the
+  files of sessions missing from the process table, are never opened;
+* OpenCode turns the conditions into the ``WHERE`` clause of its query.
+
+Whatever is left is checked against the parsed (usually cached) summary with
+``SessionQuery.matches``.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+
+from agent_sessions.models import RunnerType, SessionSummary
+from agent_sessions.path_utils import normalize_directory_path
+from agent_sessions.scanning import MTIME_SLACK_SECONDS, Candidate, parse_timestamp
+
+# Characters that project folder encodings may have replaced with "-".
+_ENCODED_AS_DASH = re.compile(r"[^0-9A-Za-z]")
+
+
+def epoch(value: datetime | None) -> float | None:
+    """Return ``value`` as epoch seconds, taking naive datetimes as UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass(frozen=True)
+class SessionQuery:
+    """Conditions on the sessions to list; a session must meet all of them.
+
+    Attributes:
+        directory: Project directory; sessions in it or in any directory
+            below it match.
+        runner_types: Agents to include (any iterable); None includes all.
+        since: Only sessions last active at or after this time.
+        until: Only sessions last active at or before this time.  Naive
+            datetimes are taken as UTC.
+        running: Only sessions that are currently running.
+        min_messages: Only sessions with at least this many messages.
+        prompt: Only sessions whose first or last prompt contains this text,
+            ignoring case.
+    """
+
+    directory: str | None = None
+    runner_types: frozenset[RunnerType] | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    running: bool = False
+    min_messages: int = 0
+    prompt: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.runner_types is not None:
+            runner_types = frozenset(RunnerType(t) for t in self.runner_types)
+            object.__setattr__(self, "runner_types", runner_types)
+
+    @cached_property
+    def root(self) -> str | None:
+        """``directory`` made absolute, or None."""
+        if self.directory is None:
+            return None
+        return normalize_directory_path(self.directory)
+
+    @cached_property
+    def since_ts(self) -> float | None:
+        return epoch(self.since)
+
+    @cached_property
+    def until_ts(self) -> float | None:
+        return epoch(self.until)
+
+    def bounded(self, since: datetime | None, until: datetime | None) -> SessionQuery:
+        """Return this query with its time range narrowed to ``since``..``until``."""
+        query = self
+        if since is not None and (self.since is None or epoch(since) > self.since_ts):
+            query = replace(query, since=since)
+        if until is not None and (self.until is None or epoch(until) < self.until_ts):
+            query = replace(query, until=until)
+        return query
+
+    def includes(self, runner_type: RunnerType) -> bool:
+        """Return True if sessions of ``runner_type`` can match."""
+        return self.runner_types is None or runner_type in self.runner_types
+
+    def contains_directory(self, directory: str) -> bool:
+        """Return True if ``directory`` (as recorded by the agent) is in the subtree."""
+        root = self.root
+        if root is None:
+            return True
+        return directory == root or directory.startswith(root.rstrip("/") + "/")
+
+    def may_contain_folder(self, name: str) -> bool:
+        """Return False if a project folder named ``name`` cannot be in the subtree.
+
+        Claude Code and Pi name project folders after the directory with
+        ``/`` (and possibly other punctuation) replaced by ``-``, so the
+        encoding is compared loosely; ``matches`` has the final word.
+        """
+        if self.root is None:
+            return True
+        encoded_root = _ENCODED_AS_DASH.sub("-", self.root).strip("-")
+        encoded = _ENCODED_AS_DASH.sub("-", name).strip("-")
+        return (
+            not encoded_root or encoded == encoded_root or encoded.startswith(encoded_root + "-")
+        )
+
+    def matches(self, summary: SessionSummary) -> bool:
+        """Return True if ``summary`` meets every condition."""
+        if not self.includes(summary.runner_type):
+            return False
+        if not self.contains_directory(summary.directory):
+            return False
+        if self.running and not summary.is_running:
+            return False
+        if summary.message_count < self.min_messages:
+            return False
+        if self.since is not None or self.until is not None:
+            activity = parse_timestamp(summary.last_activity)
+            if activity is not None:
+                if self.since_ts is not None and activity < self.since_ts:
+                    return False
+                if self.until_ts is not None and activity > self.until_ts:
+                    return False
+        if self.prompt:
+            needle = self.prompt.lower()
+            prompts = (summary.first_prompt, summary.last_prompt)
+            if not any(needle in prompt.lower() for prompt in prompts if prompt):
+                return False
+        return True
+
+
+def prune(
+    query: SessionQuery | None,
+    candidates: Iterable[Candidate],
+    session_id: Callable[[Path], str | None],
+    running_sessions: set[str],
+) -> list[Candidate]:
+    """Drop the session files that cannot match ``query``, without opening them.
+
+    Args:
+        query: The query, if any.
+        candidates: Session files with their stat results.
+        session_id: Returns the session ID of a file.
+        running_sessions: IDs of the running sessions.
+    """
+    candidates = list(candidates)
+    if query is None:
+        return candidates
+    since = query.since_ts
+    if since is not None:
+        # A file cannot hold activity newer than its mtime.
+        candidates = [c for c in candidates if c.mtime + MTIME_SLACK_SECONDS >= since]
+    if query.running:
+        candidates = [c for c in candidates if session_id(c.path) in running_sessions]
+    return candidates
+
+
+def matching(query: SessionQuery | None, summary: SessionSummary | None) -> SessionSummary | None:
+    """Return ``summary`` if there is one and it matches ``query`` (if any)."""
+    if summary is None or (query is not None and not query.matches(summary)):
+        return None
+    return summary
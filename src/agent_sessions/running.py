@@ -1,113 +1,379 @@
-"""Utilities for detecting running agent sessions via process inspection."""
+"""Utilities for detecting running agent sessions via process inspection.
+
+All detectors match against a single snapshot of the process table.  On Linux
+the snapshot is built by reading ``/proc/<pid>/cmdline`` directly; elsewhere it
+falls back to one ``ps aux`` call.  Snapshots are reused for a short time
+(``AGENT_SESSIONS_PROCESS_TTL`` seconds, default 1) so that one discovery pass
+inspects the process table once, no matter how many providers ask.
+
+Every new snapshot also refreshes a registry of which PID owns each running
+session.  The ``is_*_session_running`` checks answer from that registry: a
+known session is confirmed with a signal-0 probe plus a process start-time
+comparison (guarding against PID reuse), and the full process table is only
+rescanned once the registry is older than ``AGENT_SESSIONS_REGISTRY_TTL``
+seconds (default 5).
+"""
 
 from __future__ import annotations
 
+import os
 import re
 import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
 
+from agent_sessions import deadline, metrics
 
-def find_running_claude_sessions() -> set[str]:
-    """Return set of Claude Code session IDs that are currently running.
+_PROC_DIR = Path("/proc")
 
-    Detection method: Parse ``ps`` output for ``claude --resume <id>`` processes.
-    """
-    running: set[str] = set()
+# Seconds to wait for ``ps`` (less under a time budget).
+_PS_TIMEOUT = 5.0
+
+DEFAULT_PROCESS_TTL = 1.0
+
+DEFAULT_REGISTRY_TTL = 5.0
+
+_UUID_RE = re.compile(r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})")
+
+
+class ProcessInfo(NamedTuple):
+    """A process and its command line."""
+
+    pid: int
+    cmdline: str
+
+    @property
+    def args(self) -> list[str]:
+        return self.cmdline.split()
+
+
+class ProcessSnapshot(NamedTuple):
+    """The process table at one point in time."""
+
+    processes: tuple[ProcessInfo, ...]
+    taken_at: float  # time.monotonic()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+
+class _Owner(NamedTuple):
+    """The process that owns a running session."""
+
+    pid: int
+    start_time: int | None  # clock ticks after boot; None where unknown
+
+
+_snapshot: ProcessSnapshot | None = None
+_snapshot_lock = threading.Lock()
+# Held while scanning, so concurrent callers wait for one scan instead of
+# each running their own.  ``_snapshot_lock`` is never held during a scan.
+_scan_lock = threading.Lock()
+
+# agent name -> session ID -> owning process, as of ``_registry_taken_at``.
+_registry: dict[str, dict[str, _Owner]] = {}
+_registry_taken_at: float | None = None
+
+
+def _env_seconds(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    return default
+
+
+def _process_ttl() -> float:
+    return _env_seconds("AGENT_SESSIONS_PROCESS_TTL", DEFAULT_PROCESS_TTL)
+
+
+def _registry_ttl() -> float:
+    return _env_seconds("AGENT_SESSIONS_REGISTRY_TTL", DEFAULT_REGISTRY_TTL)
+
+
+def _read_start_time(pid: int) -> int | None:
+    """Return the start time of ``pid`` from ``/proc/<pid>/stat``, if available."""
     try:
-        result = subprocess.run(
-            ["ps", "aux"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode != 0:
-            return running
-
-        for line in result.stdout.splitlines():
-            if "claude" not in line:
-                continue
-            parts = line.split()
-            for i, part in enumerate(parts):
-                if part == "--resume" and i + 1 < len(parts):
-                    sid = parts[i + 1]
-                    if len(sid) >= 32 and "-" in sid:
-                        running.add(sid)
-                    break
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+        with open(_PROC_DIR / str(pid) / "stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # The command name is parenthesised and may itself contain spaces or
+    # parentheses; fields after it start at field 3 (state).
+    fields = raw[raw.rfind(b")") + 2 :].split()
+    try:
+        return int(fields[19])  # field 22: starttime
+    except (IndexError, ValueError):
+        return None
 
-    return running
 
+def _owner_alive(owner: _Owner) -> bool:
+    """Return True if ``owner`` is still the same running process."""
+    try:
+        os.kill(owner.pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, but belongs to another user
+    except OSError:
+        return False
+    if owner.start_time is None:
+        return True
+    return _read_start_time(owner.pid) == owner.start_time
 
-def find_running_codex_sessions() -> set[str]:
-    """Return set of Codex CLI session IDs that are currently running.
 
-    Detection method: Parse ``ps`` output for ``codex resume`` processes.
-    """
-    running: set[str] = set()
+def read_proc() -> list[ProcessInfo] | None:
+    """Read command lines from ``/proc``; None if it is not available."""
+    try:
+        entries = os.listdir(_PROC_DIR)
+    except OSError:
+        return None
+
+    processes: list[ProcessInfo] = []
+    for name in entries:
+        if not name.isdigit():
+            continue
+        try:
+            with open(_PROC_DIR / name / "cmdline", "rb") as f:
+                raw = f.read()
+        except OSError:
+            # The process exited or is not ours to inspect.
+            continue
+        if not raw:
+            continue  # kernel thread or zombie
+        args = raw.rstrip(b"\0").split(b"\0")
+        cmdline = " ".join(arg.decode("utf-8", "replace") for arg in args)
+        processes.append(ProcessInfo(int(name), cmdline))
+    return processes
+
+
+def parse_ps(output: str) -> list[ProcessInfo]:
+    """Parse ``ps aux`` output into processes."""
+    processes: list[ProcessInfo] = []
+    for line in output.splitlines():
+        # USER PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND
+        fields = line.split(None, 10)
+        if len(fields) < 11 or not fields[1].isdigit():
+            continue
+        processes.append(ProcessInfo(int(fields[1]), fields[10]))
+    return processes
+
+
+def _read_ps() -> list[ProcessInfo]:
+    """Read command lines from ``ps aux``."""
     try:
         result = subprocess.run(
             ["ps", "aux"],
             capture_output=True,
             text=True,
-            timeout=5,
+            timeout=deadline.remaining(_PS_TIMEOUT),
         )
-        if result.returncode != 0:
-            return running
-
-        for line in result.stdout.splitlines():
-            if "codex resume" in line:
-                parts = line.split()
-                for i, part in enumerate(parts):
-                    if part == "resume" and i + 1 < len(parts):
-                        session_id = parts[i + 1]
-                        if len(session_id) >= 32 and "-" in session_id:
-                            running.add(session_id)
-                        break
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+        return []
+    if result.returncode != 0:
+        return []
+    return parse_ps(result.stdout)
 
-    return running
 
+def cached_snapshot(max_age: float | None) -> ProcessSnapshot | None:
+    """Return the current snapshot if it is at most ``max_age`` seconds old."""
+    if max_age is None:
+        max_age = _process_ttl()
+    with _snapshot_lock:
+        snapshot = _snapshot
+    if snapshot is not None and snapshot.age <= max_age:
+        return snapshot
+    return None
+
+
+def install_snapshot(processes: list[ProcessInfo]) -> ProcessSnapshot:
+    """Make ``processes`` the current snapshot and refresh the registry."""
+    global _snapshot, _registry_taken_at
+    snapshot = ProcessSnapshot(tuple(processes), time.monotonic())
+    registry = _build_registry(snapshot)
+    with _snapshot_lock:
+        _snapshot = snapshot
+        _registry.clear()
+        _registry.update(registry)
+        _registry_taken_at = snapshot.taken_at
+    return snapshot
+
+
+def _scan() -> ProcessSnapshot:
+    start = time.perf_counter()
+    processes = read_proc()
+    if processes is None:
+        processes = _read_ps()
+    metrics.record_process_scan(time.perf_counter() - start)
+    if deadline.expired():
+        # Possibly cut short: use it for this call only.
+        deadline.mark_incomplete("process table")
+        return ProcessSnapshot(tuple(processes), time.monotonic())
+    return install_snapshot(processes)
 
-def find_running_pi_sessions() -> set[str]:
-    """Return set of Pi session IDs that are currently running.
 
-    Detection method: Parse ``ps`` output for ``pi`` processes and extract
-    UUID-shaped session identifiers.
+def get_process_snapshot(max_age: float | None = None) -> ProcessSnapshot:
+    """Return a snapshot of the process table, reusing a recent one.
+
+    Args:
+        max_age: Maximum age in seconds of a reusable snapshot.  Defaults to
+            ``AGENT_SESSIONS_PROCESS_TTL``; pass 0 to force a fresh scan.
     """
-    running: set[str] = set()
+    snapshot = cached_snapshot(max_age)
+    if snapshot is not None:
+        return snapshot
+
+    # Wait for a scan in progress, but not past the caller's budget; without
+    # the lock, scan anyway (the scan itself stops at the deadline).
+    locked = _scan_lock.acquire(timeout=deadline.remaining(_PS_TIMEOUT))
     try:
-        result = subprocess.run(
-            ["ps", "aux"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode != 0:
-            return running
-
-        for line in result.stdout.splitlines():
-            if "pi-coding-agent" not in line and "/pi " not in line:
-                continue
-            uuid_match = re.search(
-                r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})",
-                line,
-            )
-            if uuid_match:
-                running.add(uuid_match.group(1))
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+        if locked:
+            snapshot = cached_snapshot(max_age)
+            if snapshot is not None:
+                return snapshot
+        return _scan()
+    finally:
+        if locked:
+            _scan_lock.release()
+
+
+def clear_process_snapshot() -> None:
+    """Discard the cached process snapshot and session registry."""
+    global _snapshot, _registry_taken_at
+    with _snapshot_lock:
+        _snapshot = None
+        _registry.clear()
+        _registry_taken_at = None
+
+
+def _build_registry(snapshot: ProcessSnapshot) -> dict[str, dict[str, _Owner]]:
+    """Map each agent's running sessions in ``snapshot`` to their processes."""
+    return {
+        agent: {
+            session_id: _Owner(pid, _read_start_time(pid))
+            for session_id, pid in session_pids(snapshot).items()
+        }
+        for agent, session_pids in _SESSION_MATCHERS.items()
+    }
+
+
+def _is_session_running(agent: str, session_id: str) -> bool:
+    """Answer a running check from the registry, rescanning only when stale."""
+    with _snapshot_lock:
+        owner = _registry.get(agent, {}).get(session_id)
+        age = None if _registry_taken_at is None else time.monotonic() - _registry_taken_at
+
+    if owner is not None:
+        if age is not None and age <= _process_ttl():
+            return True
+        if _owner_alive(owner):
+            return True
+        with _snapshot_lock:
+            sessions = _registry.get(agent, {})
+            if sessions.get(session_id) == owner:
+                del sessions[session_id]
+        return False
+
+    if age is not None and age <= _registry_ttl():
+        return False
+
+    get_process_snapshot()
+    with _snapshot_lock:
+        return session_id in _registry.get(agent, {})
 
+
+def _claude_session_pids(snapshot: ProcessSnapshot) -> dict[str, int]:
+    running: dict[str, int] = {}
+    for process in snapshot.processes:
+        if "claude" not in process.cmdline:
+            continue
+        parts = process.args
+        for i, part in enumerate(parts):
+            if part == "--resume" and i + 1 < len(parts):
+                sid = parts[i + 1]
+                if len(sid) >= 32 and "-" in sid:
+                    running[sid] = process.pid
+                break
+    return running
+
+
+def _codex_session_pids(snapshot: ProcessSnapshot) -> dict[str, int]:
+    running: dict[str, int] = {}
+    for process in snapshot.processes:
+        if "codex resume" not in process.cmdline:
+            continue
+        parts = process.args
+        for i, part in enumerate(parts):
+            if part == "resume" and i + 1 < len(parts):
+                session_id = parts[i + 1]
+                if len(session_id) >= 32 and "-" in session_id:
+                    running[session_id] = process.pid
+                break
+    return running
+
+
+def _pi_session_pids(snapshot: ProcessSnapshot) -> dict[str, int]:
+    running: dict[str, int] = {}
+    for process in snapshot.processes:
+        line = process.cmdline
+        if "pi-coding-agent" not in line and "/pi " not in line:
+            continue
+        uuid_match = _UUID_RE.search(line)
+        if uuid_match:
+            running[uuid_match.group(1)] = process.pid
     return running
 
 
-def find_running_opencode_sessions() -> set[str]:
+_SESSION_MATCHERS = {
+    "claude": _claude_session_pids,
+    "codex": _codex_session_pids,
+    "pi": _pi_session_pids,
+}
+
+
+def find_running_claude_sessions(snapshot: ProcessSnapshot | None = None) -> set[str]:
+    """Return set of Claude Code session IDs that are currently running.
+
+    Detection method: Look for ``claude --resume <id>`` processes.
+    """
+    if snapshot is None:
+        snapshot = get_process_snapshot()
+    return set(_claude_session_pids(snapshot))
+
+
+def find_running_codex_sessions(snapshot: ProcessSnapshot | None = None) -> set[str]:
+    """Return set of Codex CLI session IDs that are currently running.
+
+    Detection method: Look for ``codex resume <id>`` processes.
+    """
+    if snapshot is None:
+        snapshot = get_process_snapshot()
+    return set(_codex_session_pids(snapshot))
+
+
+def find_running_pi_sessions(snapshot: ProcessSnapshot | None = None) -> set[str]:
+    """Return set of Pi session IDs that are currently running.
+
+    Detection method: Look for ``pi`` processes and extract UUID-shaped
+    session identifiers from their command lines.
+    """
+    if snapshot is None:
+        snapshot = get_process_snapshot()
+    return set(_pi_session_pids(snapshot))
+
+
+def find_running_opencode_sessions(snapshot: ProcessSnapshot | None = None) -> set[str]:
     """Return set of OpenCode session IDs that are currently running.
 
-    Detection method: Parse ``ps`` output for ``opencode`` processes.
     OpenCode does not expose session IDs in the process command line,
     so this returns an empty set.  A running OpenCode process is detected,
-    but individual session IDs cannot be determined from ``ps`` alone.
+    but individual session IDs cannot be determined from the process table
+    alone.
     """
     running: set[str] = set()
     # OpenCode runs as a TUI application and does not embed session IDs
@@ -117,17 +383,17 @@ def find_running_opencode_sessions() -> set[str]:
 
 def is_claude_session_running(session_id: str) -> bool:
     """Check if a specific Claude Code session is running."""
-    return session_id in find_running_claude_sessions()
+    return _is_session_running("claude", session_id)
 
 
 def is_codex_session_running(session_id: str) -> bool:
     """Check if a specific Codex session is running."""
-    return session_id in find_running_codex_sessions()
+    return _is_session_running("codex", session_id)
 
 
 def is_pi_session_running(session_id: str) -> bool:
     """Check if a specific Pi session is running."""
-    return session_id in find_running_pi_sessions()
+    return _is_session_running("pi", session_id)
 
 
 def is_opencode_session_running(session_id: str) -> bool:
@@ -0,0 +1,161 @@
+"""Limit-aware discovery of session files.
+
+Listing the most recent sessions should not require parsing every session on
+disk.  Candidate files are stat'ed first (cheap via ``os.scandir``) and parsed
+newest-mtime first.  A session's last activity is recorded in the file itself,
+so it can never be later than the file's mtime; once ``limit`` sessions have
+been found whose last activity is newer than the mtime of every file not yet
+parsed, the remaining files cannot make it into the result and are skipped.
+
+While ``discover_sessions_iter`` runs, every summary is also handed to its
+sink (see ``emit_summary``) as soon as it is parsed.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+from agent_sessions import deadline, metrics
+from agent_sessions.models import SessionSummary
+
+# Tolerance between record timestamps and file mtimes (clock granularity).
+MTIME_SLACK_SECONDS = 1.0
+
+# Receives ``(summary, mtime)`` for each summary parsed in this context.
+summary_sink: ContextVar[Callable[[SessionSummary, float], None] | None] = ContextVar(
+    "agent_sessions_summary_sink", default=None
+)
+
+
+def emit_summary(summary: SessionSummary, mtime: float) -> None:
+    """Pass a freshly parsed summary to the current sink, if any.
+
+    Providers call this in the order they parse sessions, newest ``mtime``
+    (a bound on the session's last activity) first.
+    """
+    sink = summary_sink.get()
+    if sink is not None:
+        sink(summary, mtime)
+
+
+class Candidate(NamedTuple):
+    """A session file found on disk, with the stat taken while scanning."""
+
+    path: Path
+    stat: os.stat_result
+
+    @property
+    def mtime(self) -> float:
+        return self.stat.st_mtime
+
+
+def parse_timestamp(value: str | None) -> float | None:
+    """Convert an ISO 8601 timestamp to epoch seconds, or None if unparseable."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def scan_files(
+    directory: Path,
+    accept: Callable[[str], bool],
+    recursive: bool = False,
+) -> list[Candidate]:
+    """Stat the files in ``directory`` whose names satisfy ``accept``.
+
+    Args:
+        directory: Directory to scan.  Missing directories yield nothing.
+        accept: Predicate on the file name.
+        recursive: Descend into subdirectories.
+
+    Under a time budget, directories not reached by the deadline are
+    recorded as incomplete.
+    """
+    candidates: list[Candidate] = []
+    pending = [directory]
+    while pending:
+        if deadline.expired():
+            deadline.mark_incomplete(*(str(path) for path in pending))
+            break
+        current = pending.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if recursive:
+                            pending.append(Path(entry.path))
+                        continue
+                    if not accept(entry.name) or not entry.is_file():
+                        continue
+                    candidates.append(Candidate(Path(entry.path), entry.stat()))
+                except OSError:
+                    continue
+    metrics.record_stat(len(candidates))
+    return candidates
+
+
+def select_recent(
+    candidates: Iterable[Candidate],
+    summarize: Callable[[Candidate], SessionSummary | None],
+    limit: int | None,
+) -> list[SessionSummary]:
+    """Return the ``limit`` most recently active sessions among ``candidates``.
+
+    Args:
+        candidates: Session files with their stat results.
+        summarize: Returns the (possibly filtered out) summary for a file.
+        limit: Maximum sessions to return; None parses every candidate.
+
+    Returns:
+        Summaries sorted by last_activity descending.
+    """
+    if limit is not None and limit <= 0:
+        return []
+
+    ordered = sorted(candidates, key=lambda c: c.mtime, reverse=True)
+    sessions: list[SessionSummary] = []
+    # Min-heap of the best ``limit`` activity times seen so far.
+    best: list[float] = []
+
+    for index, candidate in enumerate(ordered):
+        if limit is not None and len(best) >= limit:
+            if best[0] > candidate.mtime + MTIME_SLACK_SECONDS:
+                break
+        if deadline.expired():
+            deadline.mark_incomplete(*sorted({str(c.path.parent) for c in ordered[index:]}))
+            break
+
+        summary = summarize(candidate)
+        if summary is None:
+            continue
+        sessions.append(summary)
+        emit_summary(summary, candidate.mtime)
+
+        activity = parse_timestamp(summary.last_activity)
+        if activity is None:
+            activity = candidate.mtime
+        if limit is None or len(best) < limit:
+            heapq.heappush(best, activity)
+        elif activity > best[0]:
+            heapq.heapreplace(best, activity)
+
+    sessions.sort(key=lambda s: s.last_activity, reverse=True)
+    if limit is None:
+        return sessions
+    return sessions[:limit]
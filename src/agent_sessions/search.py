@@ -0,0 +1,408 @@
+"""Full-text search over the messages of every session.
+
+Message text is kept in an SQLite FTS5 index in the cache database (see
+``agent_sessions.cache``) and brought up to date at the start of each search:
+
+* session files are indexed from their last checkpoint, so only messages
+  appended since the previous search are read; files that were rewritten are
+  indexed again and deleted files are dropped;
+* OpenCode sessions are indexed again when their ``time_updated`` changes.
+
+Messages are extracted with the providers' detail parsers, so the indexed
+text is what ``get_session_detail`` shows and a hit's ``position`` is the
+message's offset for ``get_session_messages``.  When the cache is disabled
+the index is built in memory for every search.  Without FTS5 support in
+SQLite, searches log a warning and return nothing.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from array import array
+from collections.abc import Callable
+from typing import NamedTuple
+
+from agent_sessions import metrics
+from agent_sessions.cache import connect_cache, create_schema
+from agent_sessions.jsonl import Checkpoint
+from agent_sessions.message_index import extend_positions
+from agent_sessions.models import MessageRecord, RunnerType, SearchHit
+from agent_sessions.path_utils import normalize_directory_path
+from agent_sessions.providers import opencode
+from agent_sessions.scanning import Candidate
+from agent_sessions.session_files import FileProvider, file_providers
+
+logger = logging.getLogger(__name__)
+
+# Bump when the indexed text changes; older entries are indexed again.
+_INDEX_VERSION = 1
+
+# Marks around matched terms in snippets, and the snippet length in tokens.
+SNIPPET_START = "["
+SNIPPET_END = "]"
+_SNIPPET_TOKENS = 16
+
+
+class _Source(NamedTuple):
+    """A ``search_source`` row."""
+
+    version: int
+    session_id: str
+    directory: str
+    mtime_ns: int
+    inode: int
+    offset: int
+    signature: bytes
+    messages: int
+
+
+_SOURCE_COLUMNS = "version, session_id, directory, mtime_ns, inode, offset, signature, messages"
+
+# Parsed messages are written once about this many are pending, each batch in
+# its own short transaction so other writers of the cache are not held up.
+_BATCH_MESSAGES = 2000
+
+
+class _Update(NamedTuple):
+    """Parsed messages of a source, to be written over ``previous``."""
+
+    source: str
+    previous: _Source | None
+    entry: _Source
+    records: list[MessageRecord]
+    start: int
+    append: bool
+
+
+def _indexed_sources(conn: sqlite3.Connection, provider: str) -> dict[str, _Source]:
+    rows = conn.execute(
+        f"SELECT source, {_SOURCE_COLUMNS} FROM search_source WHERE provider = ?",
+        (provider,),
+    ).fetchall()
+    return {row[0]: _Source(*row[1:]) for row in rows}
+
+
+def _replace_messages(
+    conn: sqlite3.Connection,
+    provider: str,
+    source: str,
+    entry: _Source,
+    records: list[MessageRecord],
+    start: int,
+    append: bool,
+) -> None:
+    """Store ``records`` (from message index ``start``) and ``entry`` for a source."""
+    if not append:
+        conn.execute(
+            "DELETE FROM search_message WHERE provider = ? AND source = ?", (provider, source)
+        )
+    rows = []
+    for position, record in enumerate(records, start):
+        content = " ".join(record.content.split())
+        if content:
+            timestamp = record.timestamp if isinstance(record.timestamp, str) else None
+            rows.append(
+                (
+                    provider,
+                    source,
+                    entry.session_id,
+                    entry.directory,
+                    position,
+                    record.role,
+                    timestamp,
+                    content,
+                )
+            )
+    conn.executemany(
+        "INSERT INTO search_message "
+        "(provider, source, session_id, directory, position, role, timestamp, content) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO search_source "
+        "(provider, source, version, session_id, directory, mtime_ns, inode, offset, "
+        "signature, messages) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (provider, source, *entry),
+    )
+
+
+def _forget(conn: sqlite3.Connection, provider: str, sources: list[str]) -> None:
+    if not sources:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for source in sources:
+            conn.execute(
+                "DELETE FROM search_message WHERE provider = ? AND source = ?", (provider, source)
+            )
+            conn.execute(
+                "DELETE FROM search_source WHERE provider = ? AND source = ?", (provider, source)
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _write(conn: sqlite3.Connection, provider: str, updates: list[_Update]) -> None:
+    """Store ``updates`` in one transaction.
+
+    A source whose row changed since it was parsed (another process indexed
+    it meanwhile) is left alone; the next search catches up with it.
+    """
+    if not updates:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for update in updates:
+            row = conn.execute(
+                f"SELECT {_SOURCE_COLUMNS} FROM search_source WHERE provider = ? AND source = ?",
+                (provider, update.source),
+            ).fetchone()
+            if (_Source(*row) if row is not None else None) != update.previous:
+                continue
+            _replace_messages(
+                conn,
+                provider,
+                update.source,
+                update.entry,
+                update.records,
+                update.start,
+                update.append,
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class _Batch:
+    """Collects updates and writes them whenever enough messages are pending."""
+
+    def __init__(self, conn: sqlite3.Connection, provider: str) -> None:
+        self._conn = conn
+        self._provider = provider
+        self._updates: list[_Update] = []
+        self._messages = 0
+
+    def add(self, update: _Update) -> None:
+        self._updates.append(update)
+        self._messages += len(update.records)
+        if self._messages >= _BATCH_MESSAGES:
+            self.flush()
+
+    def flush(self) -> None:
+        updates, self._updates, self._messages = self._updates, [], 0
+        _write(self._conn, self._provider, updates)
+
+
+def _index_file(
+    provider: FileProvider,
+    candidate: Candidate,
+    previous: _Source | None,
+) -> _Update | None:
+    """Parse the messages of ``candidate`` not indexed yet, or None if it is unchanged."""
+    path = candidate.path
+    st = candidate.stat
+    version = provider.version * 1000 + _INDEX_VERSION
+    indexed = previous if previous is not None and previous.version == version else None
+    if indexed is not None and (indexed.inode, indexed.mtime_ns, indexed.offset) == (
+        st.st_ino,
+        st.st_mtime_ns,
+        st.st_size,
+    ):
+        return None
+
+    resume = None
+    if indexed is not None:
+        # Placeholder positions: ``extend_positions`` keeps them only if it resumes.
+        checkpoint = Checkpoint(indexed.inode, indexed.offset, indexed.signature)
+        resume = (checkpoint, array("q", [0]) * indexed.messages)
+    probe = provider.detail_state()
+    records: list[MessageRecord] = []
+    checkpoint, positions, _ = extend_positions(path, probe, resume, records)
+    resumed = indexed is not None and len(positions) == indexed.messages + len(records)
+
+    if resumed:
+        session_id, directory, start = indexed.session_id, indexed.directory, indexed.messages
+    else:
+        session_id = provider.session_id(path) or path.stem
+        directory = probe.directory or provider.directory(path)
+        directory = normalize_directory_path(directory) if directory else ""
+        start = 0
+    entry = _Source(
+        version,
+        session_id,
+        directory,
+        st.st_mtime_ns,
+        checkpoint.inode,
+        checkpoint.offset,
+        checkpoint.signature,
+        start + len(records),
+    )
+    return _Update(str(path), previous, entry, records, start, resumed)
+
+
+def _refresh_files(conn: sqlite3.Connection, provider: FileProvider) -> None:
+    name = provider.runner_type.value
+    candidates = provider.session_files()
+    indexed = _indexed_sources(conn, name)
+    batch = _Batch(conn, name)
+    for candidate in candidates:
+        try:
+            update = _index_file(provider, candidate, indexed.get(str(candidate.path)))
+        except OSError:
+            continue
+        if update is not None:
+            batch.add(update)
+    batch.flush()
+    seen = {str(c.path) for c in candidates}
+    _forget(conn, name, [source for source in indexed if source not in seen])
+
+
+def _refresh_opencode(conn: sqlite3.Connection) -> None:
+    name = RunnerType.OPENCODE.value
+    db_path = opencode.opencode_db_path()
+    indexed = _indexed_sources(conn, name)
+    sessions = []
+    if db_path.exists():
+        source_conn = metrics.trace_queries(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True))
+        try:
+            sessions = source_conn.execute(
+                "SELECT id, directory, time_updated FROM session WHERE parent_id IS NULL"
+            ).fetchall()
+            batch = _Batch(conn, name)
+            for session_id, directory, time_updated in sessions:
+                previous = indexed.get(session_id)
+                if previous is not None and (previous.version, previous.offset) == (
+                    _INDEX_VERSION,
+                    time_updated,
+                ):
+                    continue
+                records = opencode.message_range(source_conn, session_id, 0, -1)
+                entry = _Source(
+                    _INDEX_VERSION,
+                    session_id,
+                    normalize_directory_path(directory),
+                    0,
+                    0,
+                    time_updated,
+                    b"",
+                    len(records),
+                )
+                batch.add(_Update(session_id, previous, entry, records, 0, False))
+            batch.flush()
+        finally:
+            source_conn.close()
+    seen = {session_id for session_id, _, _ in sessions}
+    _forget(conn, name, [source for source in indexed if source not in seen])
+
+
+def _refresh(conn: sqlite3.Connection, runner_type: RunnerType | None) -> None:
+    """Bring the index up to date for the selected providers."""
+    refreshers: list[tuple[RunnerType, Callable[[], None]]] = [
+        (p.runner_type, lambda p=p: _refresh_files(conn, p)) for p in file_providers()
+    ]
+    refreshers.append((RunnerType.OPENCODE, lambda: _refresh_opencode(conn)))
+    for provider_type, refresh in refreshers:
+        if runner_type is not None and runner_type != provider_type:
+            continue
+        try:
+            metrics.call_provider(provider_type.value, refresh)
+        except Exception as exc:
+            logger.warning(
+                "Failed to update search index",
+                extra={"runner_type": provider_type.value, "error": str(exc)},
+            )
+
+
+def _match_expression(query: str) -> str | None:
+    """Turn free text into an FTS5 query matching messages with every term."""
+    terms = query.split()
+    if not terms:
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _connect() -> sqlite3.Connection | None:
+    conn = connect_cache()
+    if conn is None:
+        conn = metrics.trace_queries(sqlite3.connect(":memory:", isolation_level=None))
+        create_schema(conn)
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_text'"
+    ).fetchone()
+    if has_fts is None:
+        conn.close()
+        logger.warning("Session search needs SQLite with FTS5 support")
+        return None
+    return conn
+
+
+def search_sessions(
+    query: str,
+    runner_type: RunnerType | None = None,
+    directory: str | None = None,
+    limit: int = 20,
+) -> list[SearchHit]:
+    """Find the messages that contain every word of ``query``.
+
+    Args:
+        query: Words to look for; case and diacritics are ignored.  Quoted
+            punctuation-separated words (``flaky-migration``) match as a
+            phrase.
+        runner_type: Only search sessions of this agent type.
+        directory: Only search sessions for this project directory.
+        limit: Maximum hits to return.
+
+    Returns:
+        Matching messages, most relevant first, with a snippet whose matched
+        terms are wrapped in ``SNIPPET_START``/``SNIPPET_END``.
+    """
+    expression = _match_expression(query)
+    if expression is None or limit <= 0:
+        return []
+
+    conn = _connect()
+    if conn is None:
+        return []
+    try:
+        _refresh(conn, runner_type)
+
+        sql = (
+            "SELECT m.session_id, m.provider, m.directory, m.position, m.role, m.timestamp, "
+            "snippet(search_text, 0, ?, ?, '…', ?), bm25(search_text) "
+            "FROM search_text JOIN search_message m ON m.rowid = search_text.rowid "
+            "WHERE search_text MATCH ?"
+        )
+        params: list = [SNIPPET_START, SNIPPET_END, _SNIPPET_TOKENS, expression]
+        if runner_type is not None:
+            sql += " AND m.provider = ?"
+            params.append(runner_type.value)
+        if directory:
+            sql += " AND m.directory = ?"
+            params.append(normalize_directory_path(directory))
+        sql += " ORDER BY bm25(search_text) LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+    except sqlite3.Error as exc:
+        logger.warning("Session search failed", extra={"error": str(exc)})
+        return []
+    finally:
+        conn.close()
+
+    return [
+        SearchHit(
+            id=session_id,
+            runner_type=RunnerType(provider),
+            directory=hit_directory,
+            position=position,
+            role=role,
+            timestamp=timestamp,
+            snippet=snippet,
+            score=-rank,
+        )
+        for session_id, provider, hit_directory, position, role, timestamp, snippet, rank in rows
+    ]
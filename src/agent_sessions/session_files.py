@@ -0,0 +1,133 @@
+"""Where the JSONL providers keep their session files, and how to read them.
+
+Features that work on session files of every JSONL provider alike (search,
+watching) use this table instead of special-casing each provider.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent_sessions.cache import SummaryState
+from agent_sessions.jsonl import DetailState
+from agent_sessions.locator import subdirectories
+from agent_sessions.models import RunnerType
+from agent_sessions.providers import claude_code, codex, pi
+from agent_sessions.running import (
+    find_running_claude_sessions,
+    find_running_codex_sessions,
+    find_running_pi_sessions,
+)
+from agent_sessions.scanning import Candidate, scan_files
+
+
+@dataclass(frozen=True)
+class FileProvider:
+    """How to find and parse the session files of one JSONL provider.
+
+    Attributes:
+        runner_type: The provider.
+        version: The provider's parser version.
+        root: Returns the directory holding all its session files.
+        accept: Predicate on session file names.
+        nested: Whether session files may be anywhere below ``root`` (Codex)
+            rather than only in its direct subdirectories.
+        summary_state: Parse state producing a ``SessionSummary``.
+        detail_state: Parse state producing messages.
+        session_id: Returns the session ID stored in a file.
+        find_session_file: Returns the file of a session ID, if any.
+        directory: Returns the project directory implied by a file's
+            location, for files that do not record one.
+        running_sessions: Returns the IDs of running sessions.
+    """
+
+    runner_type: RunnerType
+    version: int
+    root: Callable[[], Path]
+    accept: Callable[[str], bool]
+    nested: bool
+    summary_state: type[SummaryState]
+    detail_state: Callable[[], DetailState]
+    session_id: Callable[[Path], str | None]
+    find_session_file: Callable[[str], Path | None]
+    directory: Callable[[Path], str]
+    running_sessions: Callable[[], set[str]]
+
+    def session_files(self) -> list[Candidate]:
+        """Stat every session file of this provider."""
+        root = self.root()
+        if self.nested:
+            return scan_files(root, self.accept, recursive=True)
+        return [
+            candidate
+            for project_dir in subdirectories(root)
+            for candidate in scan_files(project_dir, self.accept)
+        ]
+
+    def owns(self, path: Path) -> bool:
+        """Return True if ``path`` is (or would be) one of this provider's session files."""
+        if not self.accept(path.name):
+            return False
+        root = self.root()
+        if self.nested:
+            return path.is_relative_to(root)
+        return path.parent.parent == root
+
+
+def _is_jsonl(name: str) -> bool:
+    return name.endswith(".jsonl")
+
+
+def file_providers() -> list[FileProvider]:
+    """Return the JSONL providers (looked up at call time so they can be patched)."""
+    return [
+        FileProvider(
+            runner_type=RunnerType.CLAUDE_CODE,
+            version=claude_code._PARSER_VERSION,
+            root=claude_code._projects_dir,
+            accept=claude_code._is_session_file_name,
+            nested=False,
+            summary_state=claude_code._SummaryState,
+            detail_state=claude_code._DetailState,
+            session_id=claude_code._session_id_from_file,
+            find_session_file=claude_code._find_session_file,
+            directory=lambda path: claude_code.decode_project_path(path.parent.name),
+            running_sessions=find_running_claude_sessions,
+        ),
+        FileProvider(
+            runner_type=RunnerType.CODEX,
+            version=codex._PARSER_VERSION,
+            root=codex._sessions_dir,
+            accept=codex._is_rollout_file_name,
+            nested=True,
+            summary_state=codex._SummaryState,
+            detail_state=codex._DetailState,
+            session_id=codex._session_id_from_file,
+            find_session_file=codex._find_session_file,
+            directory=lambda path: "",
+            running_sessions=find_running_codex_sessions,
+        ),
+        FileProvider(
+            runner_type=RunnerType.PI,
+            version=pi._PARSER_VERSION,
+            root=pi._pi_sessions_dir,
+            accept=_is_jsonl,
+            nested=False,
+            summary_state=pi._SummaryState,
+            detail_state=pi._DetailState,
+            session_id=pi._session_id_from_file,
+            find_session_file=pi._find_session_file,
+            directory=lambda path: pi._decode_directory_name(path.parent.name),
+            running_sessions=find_running_pi_sessions,
+        ),
+    ]
+
+
+def file_provider(runner_type: RunnerType) -> FileProvider | None:
+    """Return the JSONL provider for ``runner_type``, or None for OpenCode."""
+    for provider in file_providers():
+        if provider.runner_type == runner_type:
+            return provider
+    return None
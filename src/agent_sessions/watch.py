@@ -0,0 +1,701 @@
+"""Change feed of sessions, driven by filesystem events.
+
+``watch_sessions`` yields a ``SessionChange`` whenever a session is created,
+updated or removed, instead of the caller re-running discovery on a timer.
+Only the files that changed are parsed again (through the summary cache, so
+usually only their appended records).
+
+On Linux the Claude Code ``projects/`` tree, the Codex ``sessions/`` tree,
+the Pi sessions directory and the directory holding the OpenCode database
+are watched with inotify.  Elsewhere, or when inotify cannot be used, the
+session files are stat'ed every ``interval`` seconds and compared with the
+previous round.  Bursts of events (an agent appending several records) are
+debounced into one change per session.
+
+``is_running`` in the summaries is as of the session's last change: a
+process exiting without writing to its session does not produce a change.
+
+``follow_session`` uses the same backends to stream the messages appended to
+one session.  A session file is read from the checkpoint after the last
+complete line, and OpenCode messages are queried by ``(time_created, id)``
+past the last one returned, so each update costs about as much as the new
+messages themselves.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sqlite3
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from agent_sessions import metrics
+from agent_sessions.cache import SummaryCache, cached_summary
+from agent_sessions.jsonl import Checkpoint
+from agent_sessions.message_index import extend_positions, indexed_messages, read_messages
+from agent_sessions.models import (
+    ChangeKind,
+    MessageRecord,
+    RunnerType,
+    SessionChange,
+    SessionMessage,
+    SessionSummary,
+)
+from agent_sessions.path_utils import normalize_directory_path
+from agent_sessions.providers import opencode
+from agent_sessions.session_files import FileProvider, file_provider, file_providers
+
+logger = logging.getLogger(__name__)
+
+# Debounced events are held back at most this many times ``debounce``.
+_MAX_DEBOUNCE_ROUNDS = 10
+
+# inotify(7) event masks.
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# A tree to watch: its root and how many levels of subdirectories to include
+# (-1 for all).
+_Tree = tuple[Path, int]
+
+# Returned by a backend when changes were lost and everything must be rescanned.
+_RESCAN = None
+
+
+# File -> (mtime_ns, size, inode), as compared by the polling backend.
+_Stats = dict[Path, tuple[int, int, int]]
+
+
+def _opencode_files() -> list[Path]:
+    db_path = opencode.opencode_db_path()
+    return [db_path, db_path.with_name(db_path.name + "-wal")]
+
+
+def _stat_files(paths: list[Path]) -> _Stats:
+    stats = {}
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        stats[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return stats
+
+
+class _Inotify:
+    """Watches directory trees with inotify through ``ctypes``."""
+
+    def __init__(self, trees: list[_Tree], interval: float) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._interval = interval
+        self._dirs: dict[int, tuple[Path, int]] = {}
+        self._roots = set(trees)
+        self._pending: list[_Tree] = []
+        for root, depth in trees:
+            if not self._add_tree(root, depth, set()):
+                self._pending.append((root, depth))
+
+    def _add_tree(self, directory: Path, depth: int, found: set[Path]) -> bool:
+        """Watch ``directory`` and its subdirectories; collect the files seen."""
+        wd = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            return False
+        self._dirs[wd] = (directory, depth)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth != 0:
+                            self._add_tree(Path(entry.path), depth - 1, found)
+                    else:
+                        found.add(Path(entry.path))
+        except OSError:
+            pass
+        return True
+
+    def wait(self, timeout: float | None) -> set[Path] | None:
+        """Return the paths changed within ``timeout`` seconds, or ``_RESCAN``."""
+        if self._pending:
+            # Roots that did not exist yet: check for them periodically.
+            timeout = self._interval if timeout is None else min(timeout, self._interval)
+            appeared = [tree for tree in self._pending if tree[0].is_dir()]
+            if appeared:
+                for tree in appeared:
+                    self._pending.remove(tree)
+                    self._add_tree(*tree, set())
+                return _RESCAN
+
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                return _RESCAN
+            watched = self._dirs.get(wd)
+            if watched is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._dirs[wd]
+                if watched in self._roots:
+                    # The root itself went away: wait for it to come back.
+                    self._pending.append(watched)
+                    return _RESCAN
+                continue
+            directory, depth = watched
+            if not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and depth != 0:
+                    # Files may have been written before the watch was added.
+                    self._add_tree(path, depth - 1, changed)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    # Dropped with its files; the caller knows which ones.
+                    return _RESCAN
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _Poller:
+    """Detects changed files by stat'ing them every round."""
+
+    def __init__(self, snapshot: Callable[[], _Stats], interval: float) -> None:
+        self._snapshot = snapshot
+        self._interval = interval
+        self._stats = snapshot()
+
+    def wait(self, timeout: float | None) -> set[Path] | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self._interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            stats = self._snapshot()
+            changed = {
+                path
+                for path in stats.keys() | self._stats.keys()
+                if stats.get(path) != self._stats.get(path)
+            }
+            self._stats = stats
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+def _open_backend(
+    trees: list[_Tree], snapshot: Callable[[], _Stats], interval: float, use_inotify: bool
+) -> _Inotify | _Poller:
+    if use_inotify:
+        try:
+            return _Inotify(trees, interval)
+        except (OSError, AttributeError) as exc:
+            logger.debug("inotify unavailable, polling instead", extra={"error": str(exc)})
+    return _Poller(snapshot, interval)
+
+
+class _Feed(ABC):
+    """Waits on a backend and reads what changed; subclasses implement ``_read``.
+
+    ``close`` may be called from another thread while ``poll`` is waiting
+    (as the asyncio wrappers do on cancellation): the backend is then closed
+    when ``poll`` returns.
+    """
+
+    def __init__(self, backend: _Inotify | _Poller, debounce: float) -> None:
+        self._backend = backend
+        self._debounce = debounce
+        self._lock = threading.Lock()
+        self._polling = False
+        self._closed = False
+        # Returned by the first ``poll``, before waiting.
+        self._backlog: list = []
+
+    @abstractmethod
+    def _read(self, paths: set[Path] | None) -> list | None:
+        """Read what changed in ``paths`` (None: everything), or None when done."""
+
+    def poll(self, timeout: float | None) -> list | None:
+        """Wait up to ``timeout`` seconds for changes and return them.
+
+        Returns None when there is nothing left to watch.
+        """
+        if self._backlog:
+            backlog, self._backlog = self._backlog, []
+            return backlog
+        with self._lock:
+            if self._closed:
+                return []
+            self._polling = True
+        try:
+            paths = self._backend.wait(timeout)
+            if paths == set():
+                return []
+            # Debounce: wait for the burst to end, but not indefinitely.
+            for _ in range(_MAX_DEBOUNCE_ROUNDS if self._debounce > 0 else 0):
+                if paths is _RESCAN:
+                    break
+                more = self._backend.wait(self._debounce)
+                if more is _RESCAN:
+                    paths = _RESCAN
+                elif more:
+                    paths |= more
+                else:
+                    break
+            return self._read(paths)
+        finally:
+            with self._lock:
+                self._polling = False
+                closed = self._closed
+            if closed:
+                self._backend.close()
+
+    def close(self) -> None:
+        """Stop watching; safe to call while another thread is in ``poll``."""
+        with self._lock:
+            self._closed = True
+            if self._polling:
+                return
+        self._backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SessionWatcher(_Feed):
+    """Tracks the current sessions and turns file changes into deltas."""
+
+    def __init__(
+        self,
+        directory: str | None,
+        runner_type: RunnerType | None,
+        interval: float,
+        debounce: float,
+        use_inotify: bool = True,
+    ) -> None:
+        self._directory = normalize_directory_path(directory) if directory else None
+        self._providers = [
+            p for p in file_providers() if runner_type is None or runner_type == p.runner_type
+        ]
+        self._watch_opencode = runner_type is None or runner_type == RunnerType.OPENCODE
+
+        # Session file -> its (visible) summary.
+        self._files: dict[Path, SessionSummary] = {}
+        # OpenCode session ID -> (time_updated, summary).
+        self._opencode: dict[str, tuple[int, SessionSummary]] = {}
+
+        trees: list[_Tree] = [(p.root(), -1 if p.nested else 1) for p in self._providers]
+        if self._watch_opencode:
+            trees.append((opencode.opencode_db_path().parent, 0))
+        super().__init__(_open_backend(trees, self._snapshot, interval, use_inotify), debounce)
+
+        # Baseline: the sessions that exist now are not reported.
+        self._read(_RESCAN)
+
+    def _snapshot(self) -> _Stats:
+        stats = {}
+        for provider in self._providers:
+            for candidate in provider.session_files():
+                st = candidate.stat
+                stats[candidate.path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if self._watch_opencode:
+            stats.update(_stat_files(_opencode_files()))
+        return stats
+
+    def _visible(self, summary: SessionSummary | None) -> SessionSummary | None:
+        if summary is None or self._directory is None:
+            return summary
+        if normalize_directory_path(summary.directory) != self._directory:
+            return None
+        return summary
+
+    def _diff(
+        self,
+        old: SessionSummary | None,
+        new: SessionSummary | None,
+        changes: list[SessionChange],
+    ) -> None:
+        if old is None and new is not None:
+            changes.append(
+                SessionChange(
+                    kind=ChangeKind.CREATED, id=new.id, runner_type=new.runner_type, summary=new
+                )
+            )
+        elif old is not None and new is None:
+            changes.append(
+                SessionChange(kind=ChangeKind.REMOVED, id=old.id, runner_type=old.runner_type)
+            )
+        elif old is not None and new is not None and old != new:
+            changes.append(
+                SessionChange(
+                    kind=ChangeKind.UPDATED, id=new.id, runner_type=new.runner_type, summary=new
+                )
+            )
+
+    def _apply_files(
+        self, provider: FileProvider, paths: set[Path], changes: list[SessionChange]
+    ) -> None:
+        running_sessions = provider.running_sessions()
+        with SummaryCache(provider.runner_type.value, provider.version) as cache:
+            for path in sorted(paths):
+                summary = None
+                try:
+                    st = path.stat()
+                except OSError:
+                    st = None
+                if st is not None:
+                    summary = cached_summary(
+                        cache, path, running_sessions, provider.summary_state, st
+                    )
+                summary = self._visible(summary)
+                old = self._files.pop(path, None)
+                if summary is not None:
+                    self._files[path] = summary
+                self._diff(old, summary, changes)
+
+    def _apply_opencode(self, changes: list[SessionChange]) -> None:
+        db_path = opencode.opencode_db_path()
+        versions: dict[str, int] = {}
+        if db_path.exists():
+            try:
+                conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+                try:
+                    rows = conn.execute(
+                        "SELECT id, directory, time_updated FROM session WHERE parent_id IS NULL"
+                    ).fetchall()
+                finally:
+                    conn.close()
+            except sqlite3.Error as exc:
+                # Probably mid-write; the next event will bring us here again.
+                logger.debug("Failed to read OpenCode sessions", extra={"error": str(exc)})
+                return
+            versions = {
+                session_id: time_updated
+                for session_id, directory, time_updated in rows
+                if self._directory is None
+                or normalize_directory_path(directory) == self._directory
+            }
+
+        changed = {
+            session_id
+            for session_id, time_updated in versions.items()
+            if self._opencode.get(session_id, (None,))[0] != time_updated
+        }
+        summaries: dict[str, SessionSummary] = {}
+        if changed:
+            # Changed sessions are normally the most recently updated ones.
+            listed = opencode.list_opencode_sessions(limit=len(changed))
+            if not changed <= {s.id for s in listed}:
+                listed = opencode.list_opencode_sessions(limit=0)
+            summaries = {s.id: s for s in listed if s.id in changed}
+
+        for session_id in changed | (self._opencode.keys() - versions.keys()):
+            old = self._opencode.pop(session_id, (None, None))[1]
+            new = summaries.get(session_id)
+            if new is not None:
+                self._opencode[session_id] = (versions[session_id], new)
+            self._diff(old, new, changes)
+
+    def _read(self, paths: set[Path] | None) -> list[SessionChange]:
+        changes: list[SessionChange] = []
+        opencode_files = set(_opencode_files()) if self._watch_opencode else set()
+        for provider in self._providers:
+            if paths is _RESCAN:
+                owned = {c.path for c in provider.session_files()}
+                owned |= {
+                    p for p, s in self._files.items() if s.runner_type == provider.runner_type
+                }
+            else:
+                owned = {p for p in paths if provider.owns(p)}
+            if owned:
+                metrics.call_provider(
+                    provider.runner_type.value, self._apply_files, provider, owned, changes
+                )
+        if self._watch_opencode and (paths is _RESCAN or paths & opencode_files):
+            metrics.call_provider(RunnerType.OPENCODE.value, self._apply_opencode, changes)
+        return changes
+
+
+def watch_sessions(
+    directory: str | None = None,
+    runner_type: RunnerType | None = None,
+    interval: float = 1.0,
+    debounce: float = 0.25,
+) -> Iterator[SessionChange]:
+    """Yield a change every time a session is created, updated or removed.
+
+    Sessions that exist when watching starts are not reported; call
+    ``discover_sessions`` first for those.  The generator runs until it is
+    closed.
+
+    Args:
+        directory: Only report sessions for this project directory.
+        runner_type: Only report sessions of this agent type.
+        interval: Seconds between polling rounds when inotify is unavailable
+            (and between checks for session directories that do not exist
+            yet).
+        debounce: Seconds without further events before a burst is reported.
+    """
+    with SessionWatcher(directory, runner_type, interval, debounce) as watcher:
+        while True:
+            yield from watcher.poll(None)
+
+
+class _FileFollower(_Feed):
+    """Reads the messages appended to one session file."""
+
+    def __init__(
+        self,
+        provider: FileProvider,
+        path: Path,
+        start: int | None,
+        interval: float,
+        use_inotify: bool = True,
+    ) -> None:
+        self._provider = provider
+        self._path = path
+        checkpoint, positions, _ = indexed_messages(
+            provider.runner_type.value, provider.version, path, provider.detail_state
+        )
+        self._checkpoint: Checkpoint = checkpoint
+        # Messages read so far, and the index of the next one to return.
+        self._count = len(positions)
+        if start is None:
+            self._next = self._count
+        else:
+            self._next = max(0, self._count + start) if start < 0 else start
+        backlog: list[SessionMessage] = []
+        if self._next < self._count:
+            backlog = read_messages(
+                path, provider.detail_state, positions, self._next, self._count
+            )
+            self._next = self._count
+
+        trees: list[_Tree] = [(path.parent, 0)]
+        backend = _open_backend(trees, lambda: _stat_files([path]), interval, use_inotify)
+        super().__init__(backend, debounce=0)
+        self._backlog = backlog
+
+    def _append(self) -> list[SessionMessage] | None:
+        records: list[MessageRecord] = []
+        # A one-entry placeholder: ``extend_positions`` keeps it only if it resumes.
+        resume = (self._checkpoint, array("q", [0]))
+        try:
+            checkpoint, positions, _ = extend_positions(
+                self._path, self._provider.detail_state(), resume, records
+            )
+        except FileNotFoundError:
+            return None
+        if len(positions) != 1 + len(records):
+            # Rewritten: read again from the start, skipping what was returned.
+            self._count = 0
+        first = self._count
+        self._checkpoint = checkpoint
+        self._count += len(records)
+        messages = [
+            record.to_model() for index, record in enumerate(records, first) if index >= self._next
+        ]
+        self._next = max(self._next, self._count)
+        return messages
+
+    def _read(self, paths: set[Path] | None) -> list[SessionMessage] | None:
+        if paths is not _RESCAN and self._path not in paths:
+            return []
+        try:
+            return metrics.call_provider(self._provider.runner_type.value, self._append)
+        except OSError as exc:
+            logger.debug(
+                "Failed to read session file",
+                extra={"session_file": str(self._path), "error": str(exc)},
+            )
+            return []
+
+
+class _OpenCodeFollower(_Feed):
+    """Reads the messages added to one OpenCode session."""
+
+    def __init__(
+        self,
+        session_id: str,
+        cursor: tuple[int, str] | None,
+        interval: float,
+        use_inotify: bool = True,
+    ) -> None:
+        self._session_id = session_id
+        self._cursor = cursor
+        self._files = set(_opencode_files())
+        trees: list[_Tree] = [(opencode.opencode_db_path().parent, 0)]
+        backend = _open_backend(
+            trees, lambda: _stat_files(_opencode_files()), interval, use_inotify
+        )
+        super().__init__(backend, debounce=0)
+        # Messages from the cursor on (and any added since it was taken).
+        self._backlog = self._read(_RESCAN) or []
+
+    def _query(self) -> list[SessionMessage] | None:
+        conn = _connect_opencode()
+        if conn is None:
+            return None
+        try:
+            if (
+                conn.execute("SELECT 1 FROM session WHERE id = ?", (self._session_id,)).fetchone()
+                is None
+            ):
+                return None
+            records, self._cursor = opencode.messages_after(conn, self._session_id, self._cursor)
+        finally:
+            conn.close()
+        return [record.to_model() for record in records]
+
+    def _read(self, paths: set[Path] | None) -> list[SessionMessage] | None:
+        if paths is not _RESCAN and not paths & self._files:
+            return []
+        try:
+            return metrics.call_provider(RunnerType.OPENCODE.value, self._query)
+        except sqlite3.Error as exc:
+            # Probably mid-write; the next event will bring us here again.
+            logger.debug(
+                "Failed to query OpenCode messages",
+                extra={"session_id": self._session_id, "error": str(exc)},
+            )
+            return []
+
+
+def _connect_opencode() -> sqlite3.Connection | None:
+    db_path = opencode.opencode_db_path()
+    if not db_path.exists():
+        return None
+    return metrics.trace_queries(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True))
+
+
+def open_session_follower(
+    session_id: str,
+    runner_type: RunnerType,
+    start: int | None,
+    interval: float,
+    use_inotify: bool = True,
+) -> _FileFollower | _OpenCodeFollower | None:
+    """Start following a session; None if it does not exist."""
+    provider = file_provider(runner_type)
+    if provider is not None:
+        path = provider.find_session_file(session_id)
+        if path is None:
+            return None
+        try:
+            return _FileFollower(provider, path, start, interval, use_inotify)
+        except OSError as exc:
+            logger.warning(
+                "Failed to read session file",
+                extra={"session_file": str(path), "error": str(exc)},
+            )
+            return None
+
+    try:
+        conn = _connect_opencode()
+        if conn is None:
+            return None
+        try:
+            if (
+                conn.execute("SELECT 1 FROM session WHERE id = ?", (session_id,)).fetchone()
+                is None
+            ):
+                return None
+            if start is not None and start < 0:
+                start = max(0, opencode.count_messages(conn, session_id) + start)
+            cursor = opencode.message_cursor(conn, session_id, start)
+        finally:
+            conn.close()
+    except sqlite3.Error as exc:
+        logger.warning(
+            "Failed to query OpenCode messages",
+            extra={"session_id": session_id, "error": str(exc)},
+        )
+        return None
+    return _OpenCodeFollower(session_id, cursor, interval, use_inotify)
+
+
+def follow_session(
+    session_id: str,
+    runner_type: RunnerType,
+    start: int | None = None,
+    interval: float = 1.0,
+) -> Iterator[SessionMessage]:
+    """Yield the messages of a session as they are appended.
+
+    Messages that exist when following starts are skipped unless ``start``
+    is given.  The generator ends when the session is deleted (or is not
+    found), and otherwise runs until it is closed.
+
+    Args:
+        session_id: The session ID.
+        runner_type: Which agent created the session.
+        start: Index of the first message to yield, as the ``offset`` of
+            ``get_session_messages`` (negative values count from the end).
+            Pass a page's ``total`` to continue exactly after it.
+        interval: Seconds between polling rounds when inotify is unavailable.
+    """
+    follower = open_session_follower(session_id, runner_type, start, interval)
+    if follower is None:
+        return
+    with follower:
+        while True:
+            messages = follower.poll(None)
+            if messages is None:
+                return
+            yield from messages
@@ -0,0 +1,26 @@
+"""Shared test fixtures."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from agent_sessions.running import clear_process_snapshot
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(monkeypatch, tmp_path: Path) -> Path:
+    """Keep the on-disk session cache inside the test's temp directory."""
+    cache_dir = tmp_path / "agent-sessions-cache"
+    monkeypatch.setenv("AGENT_SESSIONS_CACHE_DIR", str(cache_dir))
+    monkeypatch.delenv("AGENT_SESSIONS_NO_CACHE", raising=False)
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def _fresh_process_snapshot():
+    """Never reuse a process snapshot taken by another test."""
+    clear_process_snapshot()
+    yield
+    clear_process_snapshot()
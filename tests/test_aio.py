@@ -0,0 +1,149 @@
+"""Tests for the asyncio API."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+import agent_sessions
+from agent_sessions import aio, running
+from agent_sessions.models import RunnerType, SessionSummary
+
+pytestmark = pytest.mark.asyncio
+
+_aread_ps = aio._aread_ps
+
+
+def _summary(session_id: str, runner_type: RunnerType, last_activity: str) -> SessionSummary:
+    return SessionSummary(
+        id=session_id,
+        runner_type=runner_type,
+        directory="/tmp",
+        last_activity=last_activity,
+        message_count=1,
+        is_running=False,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_processes(monkeypatch):
+    monkeypatch.setattr(running, "_PROC_DIR", Path("/nonexistent-proc"))
+    monkeypatch.setattr(aio, "_aread_ps", _empty_ps)
+
+
+async def _empty_ps():
+    return []
+
+
+async def test_adiscover_sessions_merges_and_isolates_failures(monkeypatch):
+    def failing(**kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(
+        agent_sessions,
+        "list_claude_sessions",
+        lambda **kw: [_summary("c", RunnerType.CLAUDE_CODE, "2026-01-02T00:00:00Z")],
+    )
+    monkeypatch.setattr(
+        agent_sessions,
+        "list_codex_sessions",
+        lambda **kw: [_summary("x", RunnerType.CODEX, "2026-01-03T00:00:00Z")],
+    )
+    monkeypatch.setattr(agent_sessions, "list_opencode_sessions", failing)
+    monkeypatch.setattr(agent_sessions, "list_pi_sessions", lambda **kw: [])
+
+    sessions = await agent_sessions.adiscover_sessions(limit=10)
+    assert [s.id for s in sessions] == ["x", "c"]
+
+
+async def test_adiscover_sessions_bounds_concurrency(monkeypatch):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow(**kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        threading.Event().wait(0.05)
+        with lock:
+            active -= 1
+        return []
+
+    for name in ("claude", "codex", "opencode", "pi"):
+        monkeypatch.setattr(agent_sessions, f"list_{name}_sessions", slow)
+
+    await agent_sessions.adiscover_sessions(max_concurrency=2)
+    assert peak == 2
+
+
+async def test_adiscover_sessions_can_be_cancelled(monkeypatch):
+    release = threading.Event()
+
+    def blocked(**kwargs):
+        release.wait(5)
+        return []
+
+    for name in ("claude", "codex", "opencode", "pi"):
+        monkeypatch.setattr(agent_sessions, f"list_{name}_sessions", blocked)
+
+    task = asyncio.create_task(agent_sessions.adiscover_sessions())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 1)
+    finally:
+        release.set()
+
+
+async def test_aget_session_detail_runs_off_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    seen = []
+
+    def detail(session_id, limit=100):
+        seen.append(threading.get_ident())
+        return None
+
+    monkeypatch.setattr(agent_sessions, "get_claude_session_detail", detail)
+    assert await agent_sessions.aget_session_detail("s", RunnerType.CLAUDE_CODE) is None
+    assert seen and seen[0] != loop_thread
+
+
+async def test_process_snapshot_from_async_ps(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(aio, "_aread_ps", _aread_ps)
+    fake_ps = tmp_path / "ps"
+    fake_ps.write_text(
+        "#!/bin/sh\n"
+        "echo 'USER PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND'\n"
+        "echo 'lars 4242 0.0 0.1 1 1 pts/0 S 10:00 0:00 codex resume "
+        "019b2182-8e89-77a1-a675-72857fca4fb1'\n"
+    )
+    fake_ps.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    snapshot = await aio.aget_process_snapshot(max_age=0)
+    assert [p.pid for p in snapshot.processes] == [4242]
+    # The synchronous API reuses the snapshot taken on the loop.
+    assert running.find_running_codex_sessions() == {"019b2182-8e89-77a1-a675-72857fca4fb1"}
+
+
+async def test_adiscover_sessions_reports_stats(monkeypatch, tmp_path: Path):
+    claude_home = tmp_path / ".claude"
+    project = claude_home / "projects" / "-tmp-proj"
+    project.mkdir(parents=True)
+    (project / "12345678-1234-1234-1234-123456789abc.jsonl").write_text(
+        '{"type": "user", "cwd": "/tmp/proj", "message": {"role": "user", "content": "hi"}}\n'
+    )
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+
+    with agent_sessions.collect_stats() as stats:
+        await agent_sessions.adiscover_sessions(runner_type=RunnerType.CLAUDE_CODE)
+
+    assert stats.providers["claude_code"].files_opened == 1
+    assert stats.providers["claude_code"].lines_decoded == 1
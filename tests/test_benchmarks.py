@@ -0,0 +1,63 @@
+"""Tests for the benchmark corpus generator and runner."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import agent_sessions
+from agent_sessions.models import RunnerType
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from benchmarks.run import compare, run
+
+_SPEC = CorpusSpec(sessions=3, messages=9, record_bytes=256, seed=7)
+
+
+def test_corpus_is_discovered_by_every_provider(monkeypatch, tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "corpus", _SPEC)
+    for name, value in corpus.env.items():
+        monkeypatch.setenv(name, value)
+
+    for runner_type, session_ids in corpus.session_ids.items():
+        sessions = agent_sessions.discover_sessions(runner_type=runner_type)
+        assert sorted(s.id for s in sessions) == sorted(session_ids)
+        assert all(s.first_prompt and s.first_prompt.startswith("Please") for s in sessions)
+
+        detail = agent_sessions.get_session_detail(session_ids[0], runner_type)
+        assert detail is not None
+        assert detail.messages
+
+
+def test_corpus_is_deterministic(tmp_path: Path) -> None:
+    first = generate_corpus(tmp_path / "a", _SPEC)
+    second = generate_corpus(tmp_path / "b", _SPEC)
+    assert first.session_ids == second.session_ids
+
+    claude_files = sorted((tmp_path / "a" / "claude").rglob("*.jsonl"))
+    assert [f.read_bytes() for f in claude_files] == [
+        (tmp_path / "b" / f.relative_to(tmp_path / "a")).read_bytes() for f in claude_files
+    ]
+
+
+def test_run_times_every_operation(monkeypatch, tmp_path: Path) -> None:
+    for name in ("CLAUDE_HOME", "CODEX_HOME", "PI_SESSIONS_DIR", "XDG_DATA_HOME"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.setenv("AGENT_SESSIONS_CACHE_DIR", str(tmp_path / "cache"))
+    corpus = generate_corpus(tmp_path / "corpus", _SPEC)
+
+    results = run(corpus, repeat=1, scratch=tmp_path / "scratch")
+
+    assert "discover_sessions" in results
+    assert len([name for name in results if name.endswith("_detail")]) == len(RunnerType)
+    assert all(t["cold"] > 0 and t["warm"] > 0 for t in results.values())
+
+
+def test_compare_flags_only_real_slowdowns() -> None:
+    baseline = {"a": {"cold": 0.100, "warm": 0.010}, "b": {"cold": 0.0001}}
+    results = {
+        "a": {"cold": 0.200, "warm": 0.011},
+        "b": {"cold": 0.0009},  # 9x, but below the noise floor
+        "c": {"cold": 1.0},  # no baseline
+    }
+    regressions = compare(results, baseline, tolerance=1.5)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("a (cold)")
@@ -0,0 +1,206 @@
+"""Tests for the persistent session summary cache."""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent_sessions import cache as cache_module
+from agent_sessions.cache import SummaryCache, cached_summary
+from agent_sessions.models import RunnerType, SessionSummary
+from agent_sessions.providers import claude_code
+from agent_sessions.providers.claude_code import encode_project_path, list_claude_sessions
+
+SESSION_ID = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+
+
+def _write_session(path: Path, prompts: list[str], mode: str = "w", start: int = 0) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open(mode, encoding="utf-8") as f:
+        for i, prompt in enumerate(prompts, start=start):
+            record = {
+                "type": "user",
+                "cwd": "/home/lars/myproject",
+                "message": {"role": "user", "content": prompt},
+                "timestamp": f"2026-02-10T12:00:{i:02d}.000Z",
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def _setup(monkeypatch, tmp_path: Path) -> Path:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    monkeypatch.setattr(
+        "agent_sessions.providers.claude_code.find_running_claude_sessions", lambda: set()
+    )
+    session_file = (
+        claude_home
+        / "projects"
+        / encode_project_path("/home/lars/myproject")
+        / f"{SESSION_ID}.jsonl"
+    )
+    _write_session(session_file, ["first"])
+    return session_file
+
+
+def _counting_parser(monkeypatch) -> list[tuple]:
+    """Record every parse and the checkpoint it resumed from."""
+    calls: list[tuple] = []
+    original = cache_module.parse_incremental
+
+    def parse(session_file, new_state, resume=None):
+        calls.append((session_file, resume))
+        return original(session_file, new_state, resume)
+
+    monkeypatch.setattr(cache_module, "parse_incremental", parse)
+    return calls
+
+
+def test_unchanged_file_is_served_from_cache(monkeypatch, tmp_path: Path) -> None:
+    _setup(monkeypatch, tmp_path)
+    calls = _counting_parser(monkeypatch)
+
+    first = list_claude_sessions()
+    second = list_claude_sessions()
+
+    assert len(calls) == 1
+    assert first == second
+    assert second[0].first_prompt == "first"
+
+
+def test_changed_file_is_reparsed(monkeypatch, tmp_path: Path) -> None:
+    session_file = _setup(monkeypatch, tmp_path)
+    calls = _counting_parser(monkeypatch)
+
+    list_claude_sessions()
+    _write_session(session_file, ["rewritten", "second"])
+    sessions = list_claude_sessions()
+
+    assert len(calls) == 2
+    assert sessions[0].first_prompt == "rewritten"
+    assert sessions[0].last_prompt == "second"
+
+
+def test_appended_file_resumes_from_checkpoint(monkeypatch, tmp_path: Path) -> None:
+    session_file = _setup(monkeypatch, tmp_path)
+    calls = _counting_parser(monkeypatch)
+
+    list_claude_sessions()
+    size = session_file.stat().st_size
+    _write_session(session_file, ["second"], mode="a", start=1)
+    sessions = list_claude_sessions()
+
+    assert len(calls) == 2
+    checkpoint, state = calls[1][1]
+    assert checkpoint.offset == size
+    assert state.message_count == 1
+    assert sessions[0].first_prompt == "first"
+    assert sessions[0].last_prompt == "second"
+    assert sessions[0].message_count == 2
+
+
+def test_is_running_is_not_cached(monkeypatch, tmp_path: Path) -> None:
+    _setup(monkeypatch, tmp_path)
+    assert list_claude_sessions()[0].is_running is False
+
+    monkeypatch.setattr(
+        "agent_sessions.providers.claude_code.find_running_claude_sessions",
+        lambda: {SESSION_ID},
+    )
+    assert list_claude_sessions()[0].is_running is True
+
+
+def test_parser_version_invalidates_entries(monkeypatch, tmp_path: Path) -> None:
+    _setup(monkeypatch, tmp_path)
+    calls = _counting_parser(monkeypatch)
+
+    list_claude_sessions()
+    monkeypatch.setattr(claude_code, "_PARSER_VERSION", claude_code._PARSER_VERSION + 1)
+    list_claude_sessions()
+
+    assert len(calls) == 2
+
+
+def test_cache_can_be_disabled(monkeypatch, tmp_path: Path, _isolated_cache: Path) -> None:
+    monkeypatch.setenv("AGENT_SESSIONS_NO_CACHE", "1")
+    _setup(monkeypatch, tmp_path)
+    calls = _counting_parser(monkeypatch)
+
+    list_claude_sessions()
+    list_claude_sessions()
+
+    assert len(calls) == 2
+    assert not _isolated_cache.exists()
+
+
+@dataclass
+class _NoSessionState:
+    def feed(self, record: dict) -> None:
+        pass
+
+    def to_summary(self, session_file: Path, running_sessions: set[str]) -> None:
+        return None
+
+
+def test_negative_results_are_cached(monkeypatch, tmp_path: Path) -> None:
+    session_file = tmp_path / "empty.jsonl"
+    session_file.write_text("")
+    calls = _counting_parser(monkeypatch)
+
+    for _ in range(2):
+        with SummaryCache("test", 1) as cache:
+            assert cached_summary(cache, session_file, set(), _NoSessionState) is None
+    assert len(calls) == 1
+
+
+def test_cache_key_includes_inode(tmp_path: Path) -> None:
+    session_file = tmp_path / "session.jsonl"
+    session_file.write_text("{}\n")
+    st = session_file.stat()
+    summary = SessionSummary(
+        id="s1",
+        runner_type=RunnerType.PI,
+        directory="/tmp",
+        last_activity="2026-01-01T00:00:00Z",
+        message_count=0,
+        is_running=False,
+    )
+
+    with SummaryCache("test", 1) as cache:
+        cache.put(session_file, st, summary.model_dump(mode="json", exclude={"is_running"}))
+
+    replaced = os.stat_result(
+        (st.st_mode, st.st_ino + 1) + tuple(st)[2:],
+        {"st_mtime_ns": st.st_mtime_ns},
+    )
+    with SummaryCache("test", 1) as cache:
+        entry = cache.get(session_file)
+        assert entry is not None
+        assert entry.is_fresh(st, 1)
+        assert not entry.is_fresh(replaced, 1)
+
+
+def test_cached_summary_matches_fresh_parse(monkeypatch, tmp_path: Path) -> None:
+    _setup(monkeypatch, tmp_path)
+
+    fresh = list_claude_sessions()
+    cached = list_claude_sessions()
+
+    assert cached == fresh
+    assert cached[0].runner_type is RunnerType.CLAUDE_CODE
+
+
+def test_schema_upgrade_drops_full_text_tables(monkeypatch) -> None:
+    conn = cache_module.connect_cache()
+    conn.execute(
+        "INSERT INTO search_message VALUES (1, 'p', 's', 'id', '/', 0, 'user', NULL, 'x')"
+    )
+    conn.close()
+
+    monkeypatch.setattr(cache_module, "SCHEMA_VERSION", cache_module.SCHEMA_VERSION + 1)
+    conn = cache_module.connect_cache()
+    assert conn is not None
+    assert conn.execute("SELECT COUNT(*) FROM search_message").fetchone() == (0,)
+    conn.close()
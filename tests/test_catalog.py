@@ -0,0 +1,178 @@
+"""Tests for the session catalog."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from agent_sessions import catalog as catalog_module
+from agent_sessions import (
+    Catalog,
+    SessionQuery,
+    collect_stats,
+    discover_sessions,
+    get_session_detail,
+    get_session_messages,
+)
+from agent_sessions.models import RunnerType
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from tests.test_opencode import _create_opencode_db, _insert_message, _insert_session
+from tests.test_search import _SESSION_ID, _append, _assistant, _user, claude_file  # noqa: F401
+
+
+@pytest.fixture
+def catalog(tmp_path: Path):
+    with Catalog(tmp_path / "catalog.db") as catalog:
+        yield catalog
+
+
+def test_catalog_serves_what_providers_return(monkeypatch, tmp_path: Path, catalog) -> None:
+    corpus = generate_corpus(tmp_path / "corpus", CorpusSpec(sessions=4, messages=6, seed=7))
+    for name, value in corpus.env.items():
+        monkeypatch.setenv(name, value)
+
+    catalog.sync()
+
+    assert catalog.discover_sessions(limit=10) == discover_sessions(limit=10)
+    for runner_type in RunnerType:
+        expected = discover_sessions(runner_type=runner_type, limit=1)[0]
+        assert catalog.discover_sessions(runner_type=runner_type, limit=1) == [expected]
+
+        detail = catalog.get_session_detail(expected.id, runner_type, limit=3)
+        page = get_session_messages(expected.id, runner_type, offset=-3, limit=3)
+        assert detail.messages == page.messages
+        assert detail.first_prompt == expected.first_prompt
+
+        everything = catalog.get_session_detail(expected.id, runner_type, limit=0)
+        assert (
+            everything.messages == get_session_detail(expected.id, runner_type, limit=0).messages
+        )
+        assert len(everything.messages) > 3
+
+    rows = catalog.execute(
+        "SELECT runner_type, COUNT(*) FROM session GROUP BY runner_type ORDER BY runner_type"
+    )
+    assert rows == sorted((t.value, 4) for t in RunnerType)
+
+
+def test_appended_messages_are_synced_incrementally(claude_file: Path, catalog) -> None:
+    _append(claude_file, _user("set up the database"), _assistant("Done."))
+    catalog.sync()
+
+    size = claude_file.stat().st_size
+    _append(claude_file, _user("now add an index"))
+    with collect_stats() as stats:
+        catalog.sync()
+
+    # The summary and the messages are each parsed from the previous offset.
+    assert stats.total.bytes_read == 2 * (claude_file.stat().st_size - size)
+    detail = catalog.get_session_detail(_SESSION_ID, RunnerType.CLAUDE_CODE)
+    assert [m.content for m in detail.messages] == [
+        "set up the database",
+        "Done.",
+        "now add an index",
+    ]
+    assert detail.last_prompt == "now add an index"
+    assert detail.directory == "/home/lars/project"
+
+
+def test_catalog_is_not_locked_while_files_are_parsed(
+    monkeypatch, claude_file: Path, catalog
+) -> None:
+    for index in range(3):
+        path = claude_file.with_name(f"6b2d8f63-0000-4000-8000-00000000000{index}.jsonl")
+        _append(path, _user(f"message {index}"))
+    ingest_file = catalog_module._ingest_file
+    parsed = []
+
+    def ingest_file_and_write(*args):
+        # Another process syncing the same catalog must not wait for this one.
+        other = sqlite3.connect(catalog.path, timeout=0, isolation_level=None)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("ROLLBACK")
+            parsed.append(args[2].path)
+        finally:
+            other.close()
+        return ingest_file(*args)
+
+    monkeypatch.setattr(catalog_module, "_ingest_file", ingest_file_and_write)
+    monkeypatch.setattr(catalog_module, "_BATCH_MESSAGES", 1)
+    catalog.sync(RunnerType.CLAUDE_CODE)
+
+    assert len(parsed) == 3
+    assert catalog.execute("SELECT COUNT(*) FROM session") == [(3,)]
+
+
+def test_rewritten_and_deleted_files(claude_file: Path, catalog) -> None:
+    _append(claude_file, _user("original"), _assistant("reply"))
+    catalog.sync()
+
+    claude_file.write_text("")
+    _append(claude_file, _user("replacement text, longer than before"))
+    catalog.sync()
+    detail = catalog.get_session_detail(_SESSION_ID, RunnerType.CLAUDE_CODE)
+    assert [m.content for m in detail.messages] == ["replacement text, longer than before"]
+
+    claude_file.unlink()
+    catalog.sync()
+    assert catalog.get_session_detail(_SESSION_ID, RunnerType.CLAUDE_CODE) is None
+    assert catalog.execute("SELECT COUNT(*) FROM message") == [(0,)]
+
+
+def test_opencode_sessions_are_synced_when_updated(monkeypatch, tmp_path: Path, catalog) -> None:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    for name in ("CLAUDE_HOME", "CODEX_HOME", "PI_SESSIONS_DIR"):
+        monkeypatch.setenv(name, str(tmp_path / "empty"))
+    db_path = tmp_path / "data" / "opencode" / "opencode.db"
+    _create_opencode_db(db_path)
+    _insert_session(db_path, "ses_1", "/home/user/project", time_updated=1700000100000)
+    _insert_message(db_path, "msg1", "ses_1", "user", [{"type": "text", "text": "first"}])
+    catalog.sync()
+
+    with collect_stats() as stats:
+        catalog.sync()
+    assert stats.providers["opencode"].sql_queries == 1  # the list of sessions only
+
+    _insert_message(
+        db_path,
+        "msg2",
+        "ses_1",
+        "assistant",
+        [{"type": "text", "text": "second"}],
+        time_created=1700000060000,
+    )
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE session SET time_updated = 1700000200000")
+    catalog.sync()
+
+    detail = catalog.get_session_detail("ses_1", RunnerType.OPENCODE)
+    assert [m.content for m in detail.messages] == ["first", "second"]
+    assert catalog.discover_sessions()[0].message_count == 2
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM session")
+    catalog.sync()
+    assert catalog.discover_sessions() == []
+
+
+def test_query(claude_file: Path, catalog) -> None:
+    _append(claude_file, _user("Fix the Flaky migration"), _assistant("Done."))
+    other = claude_file.with_name("6b2d8f63-0000-4000-8000-000000000002.jsonl")
+    _append(other, _user("unrelated", cwd="/home/lars/project/api"))
+    catalog.sync()
+
+    def ids(**fields) -> list[str]:
+        return [s.id for s in catalog.discover_sessions(query=SessionQuery(**fields))]
+
+    assert len(ids(directory="/home/lars/project")) == 2
+    assert ids(directory="/home/lars/project/api") == [other.stem]
+    assert ids(prompt="flaky MIGRATION") == [_SESSION_ID]
+    assert ids(min_messages=2) == [_SESSION_ID]
+    assert ids(runner_types=[RunnerType.CODEX]) == []
+    assert ids(running=True) == []
+    assert [s.id for s in catalog.discover_sessions(directory="/home/lars/project/api")] == [
+        other.stem
+    ]
@@ -127,3 +127,103 @@ def test_get_claude_session_detail(monkeypatch, tmp_path: Path) -> None:
 def test_list_claude_sessions_empty(monkeypatch, tmp_path: Path) -> None:
     monkeypatch.setenv("CLAUDE_HOME", str(tmp_path / "nonexistent"))
     assert list_claude_sessions() == []
+
+
+def test_get_claude_session_detail_picks_up_appended_messages(monkeypatch, tmp_path: Path) -> None:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    monkeypatch.setattr(
+        "agent_sessions.providers.claude_code.find_running_claude_sessions", lambda: set()
+    )
+    session_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+    session_file = (
+        claude_home
+        / "projects"
+        / encode_project_path("/home/lars/myproject")
+        / f"{session_id}.jsonl"
+    )
+    _write_session(session_file, session_id)
+    assert len(get_claude_session_detail(session_id).messages) == 4
+
+    record = {
+        "type": "user",
+        "message": {"role": "user", "content": "One more thing"},
+        "timestamp": "2026-02-10T12:02:00.000Z",
+    }
+    with session_file.open("a", encoding="utf-8") as f:
+        # The second half of the line has not been written yet.
+        line = json.dumps(record) + "\n"
+        f.write(line[:20])
+    assert len(get_claude_session_detail(session_id).messages) == 4
+
+    with session_file.open("a", encoding="utf-8") as f:
+        f.write(line[20:])
+    detail = get_claude_session_detail(session_id)
+    assert len(detail.messages) == 5
+    assert detail.messages[-1].content == "One more thing"
+    assert detail.last_prompt == "One more thing"
+    assert detail.last_activity == "2026-02-10T12:02:00.000Z"
+
+
+def _write_long_session(path: Path, turns: int) -> None:
+    records: list[dict] = [{"type": "file-history-snapshot", "snapshot": {}}]
+    for i in range(turns):
+        records.append(
+            {
+                "cwd": "/home/lars/long",
+                "type": "user",
+                "message": {"role": "user", "content": f"Prompt {i}"},
+                "timestamp": f"2026-02-10T12:{i % 60:02d}:00.000Z",
+            }
+        )
+        records.append(
+            {
+                "type": "progress",
+                "data": {"type": "hook", "output": "x" * (i % 7) * 50},
+                "timestamp": f"2026-02-10T13:{i % 60:02d}:00.000Z",
+            }
+        )
+        records.append(
+            {
+                "type": "assistant",
+                "message": {"role": "assistant", "content": [{"type": "text", "text": f"R{i}"}]},
+            }
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_tail_read_matches_full_parse(monkeypatch, tmp_path: Path) -> None:
+    from agent_sessions import jsonl
+    from agent_sessions.providers import claude_code
+
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    monkeypatch.setattr(claude_code, "find_running_claude_sessions", lambda: set())
+    session_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+    session_file = claude_home / "projects" / "-home-lars-long" / f"{session_id}.jsonl"
+    _write_long_session(session_file, 80)
+
+    def detail(limit: int, tail_min_bytes: int):
+        claude_code._detail_states.clear()
+        monkeypatch.setattr(jsonl, "TAIL_MIN_BYTES", tail_min_bytes)
+        return get_claude_session_detail(session_id, limit=limit)
+
+    monkeypatch.setattr(jsonl, "TAIL_BLOCK_BYTES", 97)
+    assert detail(500, 0) == detail(500, 10**9)
+    full = detail(5, 10**9)
+
+    parse_incremental = jsonl.parse_incremental
+    calls = []
+    monkeypatch.setattr(
+        jsonl, "parse_incremental", lambda *a: calls.append(a) or parse_incremental(*a)
+    )
+    tail = detail(5, 0)
+
+    assert calls == []
+    assert tail == full
+    assert [m.content for m in tail.messages][-2:] == ["Prompt 79", "R79"]
+    assert tail.first_prompt == "Prompt 0"
+    assert tail.last_activity == "2026-02-10T13:19:00.000Z"
@@ -3,20 +3,22 @@
 from __future__ import annotations
 
 import json
+from datetime import datetime, timezone
 from pathlib import Path
 
+from agent_sessions.providers import codex
 from agent_sessions.providers.codex import list_codex_sessions, get_codex_session_detail
 
 
-def _write_rollout(path: Path, session_id: str) -> None:
+def _write_rollout(path: Path, session_id: str, day: str = "2026-02-06") -> None:
     records = [
         {
-            "timestamp": "2026-02-06T20:00:00.000Z",
+            "timestamp": f"{day}T20:00:00.000Z",
             "type": "session_meta",
             "payload": {"id": session_id, "cwd": "/home/lars/xithing/tether"},
         },
         {
-            "timestamp": "2026-02-06T20:00:01.000Z",
+            "timestamp": f"{day}T20:00:01.000Z",
             "type": "response_item",
             "payload": {
                 "type": "message",
@@ -25,7 +27,7 @@ def _write_rollout(path: Path, session_id: str) -> None:
             },
         },
         {
-            "timestamp": "2026-02-06T20:00:02.000Z",
+            "timestamp": f"{day}T20:00:02.000Z",
             "type": "response_item",
             "payload": {
                 "type": "message",
@@ -91,3 +93,85 @@ def test_list_codex_sessions_empty(monkeypatch, tmp_path: Path) -> None:
     monkeypatch.setenv("CODEX_HOME", str(tmp_path / "nonexistent"))
     sessions = list_codex_sessions()
     assert sessions == []
+
+
+def _write_partitioned(codex_home: Path, day: str, session_id: str) -> Path:
+    year, month, dom = day.split("-")
+    path = (
+        codex_home / "sessions" / year / month / dom / f"rollout-{day}T20-00-00-{session_id}.jsonl"
+    )
+    _write_rollout(path, session_id, day)
+    return path
+
+
+def test_list_codex_sessions_time_window(monkeypatch, tmp_path: Path) -> None:
+    codex_home = tmp_path / ".codex"
+    monkeypatch.setenv("CODEX_HOME", str(codex_home))
+    days = {
+        "2025-12-31": "00000000-0000-0000-0000-000000000001",
+        "2026-02-06": "00000000-0000-0000-0000-000000000002",
+        "2026-03-10": "00000000-0000-0000-0000-000000000003",
+    }
+    for day, session_id in days.items():
+        _write_partitioned(codex_home, day, session_id)
+
+    since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    until = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert [s.id for s in list_codex_sessions(since=since)] == [
+        days["2026-03-10"],
+        days["2026-02-06"],
+    ]
+    assert [s.id for s in list_codex_sessions(until=until)] == [
+        days["2026-02-06"],
+        days["2025-12-31"],
+    ]
+    assert [s.id for s in list_codex_sessions(since=since, until=until.replace(tzinfo=None))] == [
+        days["2026-02-06"]
+    ]
+
+
+def test_list_codex_sessions_until_skips_later_partitions(monkeypatch, tmp_path: Path) -> None:
+    codex_home = tmp_path / ".codex"
+    monkeypatch.setenv("CODEX_HOME", str(codex_home))
+    _write_partitioned(codex_home, "2026-02-06", "00000000-0000-0000-0000-000000000002")
+    _write_partitioned(codex_home, "2026-03-10", "00000000-0000-0000-0000-000000000003")
+    _write_partitioned(codex_home, "2027-01-01", "00000000-0000-0000-0000-000000000004")
+
+    scanned: list[Path] = []
+    original = codex.scan_files
+
+    def spy(directory, accept, recursive=False):
+        scanned.append(directory)
+        return original(directory, accept, recursive)
+
+    monkeypatch.setattr(codex, "scan_files", spy)
+    sessions = list_codex_sessions(until=datetime(2026, 2, 28, tzinfo=timezone.utc))
+
+    assert [s.id for s in sessions] == ["00000000-0000-0000-0000-000000000002"]
+    assert codex_home / "sessions" / "2026" / "02" / "06" in scanned
+    assert not any("2027" in str(p) or "/03/" in str(p) for p in scanned)
+
+
+def test_skipped_records_still_set_last_activity(monkeypatch, tmp_path: Path) -> None:
+    codex_home = tmp_path / ".codex"
+    monkeypatch.setenv("CODEX_HOME", str(codex_home))
+    session_id = "00000000-0000-0000-0000-000000000005"
+    path = _write_partitioned(codex_home, "2026-02-06", session_id)
+    with path.open("a", encoding="utf-8") as f:
+        for record in (
+            {
+                "timestamp": "2026-02-06T21:00:00.000Z",
+                "type": "response_item",
+                "payload": {"type": "function_call_output", "output": "x" * 10_000},
+            },
+            {
+                "timestamp": "2026-02-06T21:00:05.000Z",
+                "type": "event_msg",
+                "payload": {"type": "token_count"},
+            },
+        ):
+            f.write(json.dumps(record) + "\n")
+
+    (session,) = list_codex_sessions()
+    assert session.last_activity == "2026-02-06T21:00:05.000Z"
+    assert session.message_count == 2
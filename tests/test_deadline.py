@@ -0,0 +1,135 @@
+"""Tests for time-bounded discovery."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from agent_sessions import deadline, discover_sessions, discover_sessions_iter
+from agent_sessions.models import DiscoveryComplete, RunnerType, SessionList, SessionSummary
+from agent_sessions.providers.claude_code import list_claude_sessions
+from agent_sessions.providers.opencode import list_opencode_sessions
+from agent_sessions.scanning import scan_files, select_recent
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from tests.test_opencode import _create_opencode_db, _insert_session
+
+
+def _summary(session_id: str, runner_type: RunnerType) -> SessionSummary:
+    return SessionSummary(
+        id=session_id,
+        runner_type=runner_type,
+        directory="/tmp",
+        last_activity="2026-01-01T00:00:00Z",
+        message_count=1,
+        is_running=False,
+    )
+
+
+def test_select_recent_returns_what_was_parsed(tmp_path: Path) -> None:
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "s.jsonl").write_text("{}\n")
+    candidates = [c for d in "abc" for c in scan_files(tmp_path / d, lambda name: True)]
+
+    def summarize(candidate):
+        time.sleep(0.05)
+        return _summary(candidate.path.parent.name, RunnerType.CLAUDE_CODE)
+
+    incomplete: list[str] = []
+    with deadline.budget(time.monotonic() + 0.07, incomplete):
+        sessions = select_recent(candidates, summarize, limit=10)
+
+    assert len(sessions) == 2
+    assert len(incomplete) == 1
+    assert incomplete[0] not in {str(tmp_path / s.id) for s in sessions}
+
+
+def test_list_function_timeout(monkeypatch, tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "corpus", CorpusSpec(sessions=4, messages=2, seed=1))
+    for name, value in corpus.env.items():
+        monkeypatch.setenv(name, value)
+
+    sessions = list_claude_sessions(timeout_ms=0)
+    assert isinstance(sessions, SessionList)
+    assert sessions == []
+    assert sessions.incomplete[RunnerType.CLAUDE_CODE]
+
+    sessions = list_claude_sessions(timeout_ms=10_000)
+    assert len(sessions) == 4
+    assert sessions.incomplete == {}
+
+
+def test_locked_opencode_database(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    db_path = tmp_path / "data" / "opencode" / "opencode.db"
+    _create_opencode_db(db_path)
+    _insert_session(db_path, "ses_1", "/home/lars/project")
+
+    lock = sqlite3.connect(db_path, isolation_level=None)
+    lock.execute("BEGIN EXCLUSIVE")
+    try:
+        start = time.monotonic()
+        sessions = list_opencode_sessions(timeout_ms=200)
+        elapsed = time.monotonic() - start
+    finally:
+        lock.execute("ROLLBACK")
+        lock.close()
+
+    assert elapsed < 1.0
+    assert sessions == []
+    assert sessions.incomplete == {RunnerType.OPENCODE: [str(db_path)]}
+    assert [s.id for s in list_opencode_sessions(timeout_ms=1000)] == ["ses_1"]
+
+
+def _stalled(release: threading.Event):
+    def list_sessions(directory=None, limit=50, query=None):
+        release.wait(5)
+        return [_summary("late", RunnerType.CODEX)]
+
+    return list_sessions
+
+
+def test_discover_sessions_abandons_stalled_providers() -> None:
+    release = threading.Event()
+    with (
+        patch(
+            "agent_sessions.list_claude_sessions",
+            return_value=[_summary("c1", RunnerType.CLAUDE_CODE)],
+        ),
+        patch("agent_sessions.list_codex_sessions", _stalled(release)),
+        patch("agent_sessions.list_opencode_sessions", return_value=[]),
+        patch("agent_sessions.list_pi_sessions", return_value=[]),
+    ):
+        start = time.monotonic()
+        sessions = discover_sessions(timeout_ms=200)
+        elapsed = time.monotonic() - start
+        items = list(discover_sessions_iter(timeout_ms=200))
+        release.set()
+
+    assert elapsed < 1.0
+    assert [s.id for s in sessions] == ["c1"]
+    assert sessions.incomplete == {RunnerType.CODEX: []}
+
+    complete = items[-1]
+    assert isinstance(complete, DiscoveryComplete)
+    assert [s.id for s in complete.sessions] == ["c1"]
+    assert complete.incomplete == {RunnerType.CODEX: []}
+
+
+def test_discover_sessions_without_timeout_is_complete() -> None:
+    with (
+        patch(
+            "agent_sessions.list_claude_sessions",
+            return_value=[_summary("c1", RunnerType.CLAUDE_CODE)],
+        ),
+        patch("agent_sessions.list_codex_sessions", return_value=[]),
+        patch("agent_sessions.list_opencode_sessions", return_value=[]),
+        patch("agent_sessions.list_pi_sessions", return_value=[]),
+    ):
+        sessions = discover_sessions()
+
+    assert [s.id for s in sessions] == ["c1"]
+    assert sessions.incomplete == {}
@@ -2,10 +2,19 @@
 
 from __future__ import annotations
 
+import threading
+from pathlib import Path
 from unittest.mock import patch
 
-from agent_sessions import discover_sessions, get_session_detail, RunnerType
-from agent_sessions.models import SessionSummary, SessionDetail, SessionMessage
+from agent_sessions import (
+    discover_sessions,
+    discover_sessions_iter,
+    get_session_detail,
+    RunnerType,
+)
+from agent_sessions.models import DiscoveryComplete, SessionSummary, SessionDetail, SessionMessage
+from agent_sessions.scanning import emit_summary
+from benchmarks.corpus import CorpusSpec, generate_corpus
 
 
 def _make_summary(id: str, runner_type: RunnerType, activity: str) -> SessionSummary:
@@ -151,3 +160,130 @@ def test_get_session_detail_returns_none_for_not_found():
     with patch("agent_sessions.get_claude_session_detail", return_value=None):
         result = get_session_detail("nonexistent", RunnerType.CLAUDE_CODE)
     assert result is None
+
+
+def test_discover_sessions_isolates_provider_errors():
+    with (
+        patch("agent_sessions.list_claude_sessions", side_effect=RuntimeError("boom")),
+        patch(
+            "agent_sessions.list_codex_sessions",
+            return_value=[_make_summary("x1", RunnerType.CODEX, "2026-01-02T00:00:00Z")],
+        ),
+        patch("agent_sessions.list_opencode_sessions", return_value=[]),
+        patch(
+            "agent_sessions.list_pi_sessions",
+            return_value=[_make_summary("p1", RunnerType.PI, "2026-01-03T00:00:00Z")],
+        ),
+    ):
+        sessions = discover_sessions()
+
+    assert [s.id for s in sessions] == ["p1", "x1"]
+
+
+def test_discover_sessions_runs_providers_concurrently():
+    # Every provider waits for all four to be running at the same time.
+    barrier = threading.Barrier(4, timeout=5)
+
+    def provider(session_id: str, runner_type: RunnerType, activity: str):
+        def list_sessions(directory=None, limit=50, query=None):
+            barrier.wait()
+            return [_make_summary(session_id, runner_type, activity)]
+
+        return list_sessions
+
+    with (
+        patch(
+            "agent_sessions.list_claude_sessions",
+            provider("c1", RunnerType.CLAUDE_CODE, "2026-01-01T00:00:00Z"),
+        ),
+        patch(
+            "agent_sessions.list_codex_sessions",
+            provider("x1", RunnerType.CODEX, "2026-01-04T00:00:00Z"),
+        ),
+        patch(
+            "agent_sessions.list_opencode_sessions",
+            provider("o1", RunnerType.OPENCODE, "2026-01-02T00:00:00Z"),
+        ),
+        patch(
+            "agent_sessions.list_pi_sessions",
+            provider("p1", RunnerType.PI, "2026-01-03T00:00:00Z"),
+        ),
+    ):
+        sessions = discover_sessions(limit=3)
+
+    assert [s.id for s in sessions] == ["x1", "p1", "o1"]
+
+
+def _streaming_provider(runner_type: RunnerType, mtimes: list[int], gate=None):
+    """A list function that emits its summaries one by one, newest first."""
+
+    def list_sessions(directory=None, limit=50, query=None):
+        sessions = []
+        for mtime in mtimes:
+            if gate is not None:
+                gate.wait(5)
+            summary = _make_summary(
+                f"{runner_type.value}-{mtime}", runner_type, f"2026-01-01T00:00:{mtime:02d}Z"
+            )
+            emit_summary(summary, mtime)
+            sessions.append(summary)
+        return sessions
+
+    return list_sessions
+
+
+def test_discover_sessions_iter_yields_before_providers_finish():
+    gate = threading.Event()
+    with (
+        patch(
+            "agent_sessions.list_claude_sessions",
+            _streaming_provider(RunnerType.CLAUDE_CODE, [30, 10]),
+        ),
+        patch(
+            "agent_sessions.list_codex_sessions",
+            _streaming_provider(RunnerType.CODEX, [20], gate=gate),
+        ),
+        patch("agent_sessions.list_opencode_sessions", side_effect=RuntimeError("boom")),
+        patch("agent_sessions.list_pi_sessions", return_value=[]),
+    ):
+        stream = discover_sessions_iter(limit=2)
+        # Claude's sessions arrive while Codex is still blocked.
+        assert {next(stream).id, next(stream).id} == {"claude_code-30", "claude_code-10"}
+        gate.set()
+        rest = list(stream)
+
+    assert [s.id for s in rest[:-1]] == ["codex-20"]
+    complete = rest[-1]
+    assert isinstance(complete, DiscoveryComplete)
+    assert [s.id for s in complete.sessions] == ["claude_code-30", "codex-20"]
+    assert complete.failed == [RunnerType.OPENCODE]
+
+
+def test_discover_sessions_iter_ordered():
+    with (
+        patch(
+            "agent_sessions.list_claude_sessions",
+            _streaming_provider(RunnerType.CLAUDE_CODE, [50, 20, 5]),
+        ),
+        patch(
+            "agent_sessions.list_codex_sessions",
+            _streaming_provider(RunnerType.CODEX, [40, 30, 10]),
+        ),
+        patch("agent_sessions.list_opencode_sessions", return_value=[]),
+        patch("agent_sessions.list_pi_sessions", _streaming_provider(RunnerType.PI, [45])),
+    ):
+        items = list(discover_sessions_iter(limit=4, ordered=True))
+
+    assert [s.id for s in items[:-1]] == ["claude_code-50", "pi-45", "codex-40", "codex-30"]
+    assert [s.id for s in items[-1].sessions] == [s.id for s in items[:-1]]
+
+
+def test_discover_sessions_iter_matches_discover_sessions(monkeypatch, tmp_path: Path):
+    corpus = generate_corpus(tmp_path / "corpus", CorpusSpec(sessions=6, messages=4, seed=5))
+    for name, value in corpus.env.items():
+        monkeypatch.setenv(name, value)
+
+    items = list(discover_sessions_iter(limit=10))
+    streamed, complete = items[:-1], items[-1]
+    assert complete.sessions == discover_sessions(limit=10)
+    assert {s.id for s in complete.sessions} <= {s.id for s in streamed}
@@ -0,0 +1,223 @@
+"""Tests for incremental JSONL reading."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+from agent_sessions import jsonl
+from agent_sessions.jsonl import (
+    loads,
+    parse_incremental,
+    parse_tail,
+    peek_payload_type,
+    peek_type,
+)
+
+
+@dataclass
+class _Collect:
+    ids: list[int] = field(default_factory=list)
+
+    def __copy__(self) -> _Collect:
+        return _Collect(ids=list(self.ids))
+
+    def feed(self, record: dict) -> None:
+        self.ids.append(record["n"])
+
+
+def _line(n: int) -> bytes:
+    return (json.dumps({"n": n}) + "\n").encode()
+
+
+def test_resume_parses_only_appended_records(tmp_path: Path) -> None:
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(_line(1) + _line(2))
+
+    checkpoint, state, result = parse_incremental(path, _Collect)
+    assert result.ids == [1, 2]
+    assert checkpoint.offset == path.stat().st_size
+
+    with path.open("ab") as f:
+        f.write(_line(3))
+
+    # Resume from a state that deliberately lacks the earlier records: if
+    # the file were re-read from the start they would reappear.
+    checkpoint, state, result = parse_incremental(path, _Collect, (checkpoint, _Collect()))
+    assert result.ids == [3]
+
+
+def test_partial_final_line_is_not_consumed(tmp_path: Path) -> None:
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(_line(1) + b'{"n": 2')
+
+    checkpoint, state, result = parse_incremental(path, _Collect)
+    assert result.ids == [1]
+    assert checkpoint.offset == len(_line(1))
+
+    with path.open("ab") as f:
+        f.write(b"}\n")
+
+    checkpoint, state, result = parse_incremental(path, _Collect, (checkpoint, state))
+    assert result.ids == [1, 2]
+    assert checkpoint.offset == path.stat().st_size
+
+
+def test_complete_unterminated_line_is_reported_but_not_checkpointed(tmp_path: Path) -> None:
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(_line(1) + b'{"n": 2}')
+
+    checkpoint, state, result = parse_incremental(path, _Collect)
+    assert result.ids == [1, 2]
+    assert state.ids == [1]
+
+    with path.open("ab") as f:
+        f.write(b"\n")
+
+    _, _, result = parse_incremental(path, _Collect, (checkpoint, state))
+    assert result.ids == [1, 2]
+
+
+def test_rewritten_file_is_parsed_from_start(tmp_path: Path) -> None:
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(_line(1) + _line(2))
+    checkpoint, state, _ = parse_incremental(path, _Collect)
+
+    # Same inode, same length prefix, different content.
+    with path.open("r+b") as f:
+        f.write(_line(7) + _line(8) + _line(9))
+
+    _, _, result = parse_incremental(path, _Collect, (checkpoint, state))
+    assert result.ids == [7, 8, 9]
+
+
+def test_truncated_file_is_parsed_from_start(tmp_path: Path) -> None:
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(_line(1) + _line(2))
+    checkpoint, state, _ = parse_incremental(path, _Collect)
+
+    with path.open("r+b") as f:
+        f.truncate(0)
+        f.write(_line(5))
+
+    _, _, result = parse_incremental(path, _Collect, (checkpoint, state))
+    assert result.ids == [5]
+
+
+def test_peek_type_only_trusts_top_level_keys() -> None:
+    assert peek_type(b'{"cwd": "/a \\"b\\"", "n": 1, "type": "user", "message": {}}\n') == "user"
+    # A nested value before "type" could hide another "type" key.
+    assert peek_type(b'{"data": {"type": "inner"}, "type": "progress"}\n') is None
+    # Escaped values need real decoding.
+    assert peek_type(b'{"type": "us\\u0065r"}\n') is None
+    assert peek_type(b'{"n": 1}\n') is None
+    assert peek_type(b"not json\n") is None
+
+
+def test_peek_payload_type() -> None:
+    line = b'{"timestamp": "t", "type": "response_item", "payload": {"type": "reasoning"}}\n'
+    assert peek_payload_type(line) == ("response_item", "reasoning")
+    assert peek_payload_type(b'{"type": "event_msg", "payload": {"msg": {"type": "x"}}}') is None
+
+
+@dataclass
+class _Typed:
+    seen: list[str] = field(default_factory=list)
+    last_activity: str | None = None
+
+    def __copy__(self) -> _Typed:
+        return _Typed(seen=list(self.seen), last_activity=self.last_activity)
+
+    def accepts(self, line: bytes) -> bool:
+        return peek_type(line) != "noise"
+
+    def feed(self, record: dict) -> None:
+        if record.get("timestamp"):
+            self.last_activity = record["timestamp"]
+        if "type" in record:
+            self.seen.append(record["type"])
+
+
+def test_rejected_lines_are_not_decoded_but_keep_their_timestamp(tmp_path: Path) -> None:
+    path = tmp_path / "s.jsonl"
+    records = [
+        {"type": "keep", "timestamp": "t1"},
+        {"type": "noise", "timestamp": "t2"},
+        {"type": "noise", "timestamp": "t3"},
+        {"type": "noise"},
+        {"type": "keep"},
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    _, _, result = parse_incremental(path, _Typed)
+    assert result.seen == ["keep", "keep"]
+    assert result.last_activity == "t3"
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        b'{"a": [1, 2.5, "x\\u00e9"], "b": null}',
+        b'{"big": 123456789012345678901234567890}',
+        b'{"nan": NaN, "inf": -Infinity}',
+        b'{"dup": 1, "dup": 2}',
+    ],
+)
+def test_loads_matches_stdlib(document: bytes) -> None:
+    expected = json.loads(document)
+    result = loads(document)
+    assert repr(result) == repr(expected)
+    assert repr(loads(document.decode())) == repr(expected)
+
+
+def test_loads_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        loads(b'{"a": ')
+
+
+def test_backend_can_be_forced(monkeypatch) -> None:
+    monkeypatch.setenv("AGENT_SESSIONS_JSON", "json")
+    assert jsonl._select_backend() == ("json", None)
+
+
+@dataclass
+class _Detail:
+    first_prompt: str | None = None
+    last_prompt: str | None = None
+    last_activity: str | None = None
+    directory: str | None = None
+    messages: list = field(default_factory=list)
+
+    def __copy__(self) -> _Detail:
+        return _Detail(**{**self.__dict__, "messages": list(self.messages)})
+
+    def feed(self, record: dict) -> None:
+        self.directory = self.directory or record.get("cwd")
+        if "prompt" in record:
+            self.first_prompt = self.first_prompt or record["prompt"]
+            self.last_prompt = record["prompt"]
+            self.messages.append(record["prompt"])
+
+
+def test_parse_tail_reads_backwards_across_blocks(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(jsonl, "TAIL_MIN_BYTES", 0)
+    monkeypatch.setattr(jsonl, "TAIL_BLOCK_BYTES", 7)
+    path = tmp_path / "s.jsonl"
+    lines = [{"cwd": "/x", "prompt": "p0"}] + [{"prompt": f"p{i}"} for i in range(1, 20)]
+    path.write_text("".join(json.dumps(r) + "\n\n" for r in lines))
+
+    result = parse_tail(path, _Detail, 3)
+    assert result.messages == ["p17", "p18", "p19"]
+    assert (result.first_prompt, result.last_prompt, result.directory) == ("p0", "p19", "/x")
+    assert parse_tail(path, _Detail, 100).messages == [f"p{i}" for i in range(20)]
+
+
+def test_parse_tail_gives_up_without_a_head(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(jsonl, "TAIL_MIN_BYTES", 0)
+    monkeypatch.setattr(jsonl, "HEAD_MAX_BYTES", 100)
+    path = tmp_path / "s.jsonl"
+    path.write_text("".join(json.dumps({"n": i}) + "\n" for i in range(50)))
+    assert parse_tail(path, _Detail, 3) is None
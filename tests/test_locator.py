@@ -0,0 +1,169 @@
+"""Tests for the session location index."""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+from agent_sessions.locator import locate_session_file, subdirectories
+from agent_sessions.providers.codex import _find_session_file as find_codex_file
+from agent_sessions.providers.pi import _find_session_file as find_pi_file
+
+
+def _identify_by_stem(counter: list[Path]):
+    def identify(path: Path) -> str:
+        counter.append(path)
+        return path.stem
+
+    return identify
+
+
+def _locate(root: Path, session_id: str, identified: list[Path]) -> Path | None:
+    return locate_session_file(
+        "test",
+        session_id,
+        lambda: subdirectories(root),
+        lambda name: name.endswith(".jsonl"),
+        _identify_by_stem(identified),
+    )
+
+
+def _bump_mtime(directory: Path) -> None:
+    st = directory.stat()
+    os.utime(directory, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _age(*directories: Path) -> None:
+    """Move mtimes out of the window in which directories are re-listed anyway."""
+    for directory in directories:
+        os.utime(directory, (time.time() - 60, time.time() - 60))
+
+
+def test_hit_does_not_rescan(tmp_path):
+    for project in ("a", "b"):
+        (tmp_path / project).mkdir()
+        for i in range(3):
+            (tmp_path / project / f"{project}{i}.jsonl").write_text("{}\n")
+
+    identified: list[Path] = []
+    assert _locate(tmp_path, "b1", identified) == tmp_path / "b" / "b1.jsonl"
+    assert len(identified) == 6 + 1  # indexed everything, then verified the hit
+
+    identified.clear()
+    assert _locate(tmp_path, "a2", identified) == tmp_path / "a" / "a2.jsonl"
+    assert identified == [tmp_path / "a" / "a2.jsonl"]
+
+
+def test_miss_relists_only_changed_directories(tmp_path):
+    for project in ("a", "b"):
+        (tmp_path / project).mkdir()
+        (tmp_path / project / f"{project}0.jsonl").write_text("{}\n")
+    _age(tmp_path / "a", tmp_path / "b")
+
+    identified: list[Path] = []
+    assert _locate(tmp_path, "a0", identified) is not None
+
+    new_file = tmp_path / "b" / "new.jsonl"
+    new_file.write_text("{}\n")
+    _bump_mtime(tmp_path / "b")
+
+    identified.clear()
+    assert _locate(tmp_path, "new", identified) == new_file
+    assert tmp_path / "a" / "a0.jsonl" not in identified
+
+
+def test_stale_entry_after_delete(tmp_path):
+    (tmp_path / "a").mkdir()
+    session_file = tmp_path / "a" / "gone.jsonl"
+    session_file.write_text("{}\n")
+
+    assert _locate(tmp_path, "gone", []) == session_file
+    session_file.unlink()
+    assert _locate(tmp_path, "gone", []) is None
+
+
+def test_moved_file_is_found_again(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    session_file = tmp_path / "a" / "moving.jsonl"
+    session_file.write_text("{}\n")
+    assert _locate(tmp_path, "moving", []) == session_file
+
+    moved = tmp_path / "b" / "moving.jsonl"
+    session_file.rename(moved)
+    assert _locate(tmp_path, "moving", []) == moved
+
+
+def test_unidentified_files_are_retried(tmp_path):
+    (tmp_path / "a").mkdir()
+    session_file = tmp_path / "a" / "pending.jsonl"
+    session_file.write_text("")
+
+    def identify(path: Path) -> str | None:
+        text = path.read_text().strip()
+        return json.loads(text)["id"] if text else None
+
+    def locate(session_id):
+        return locate_session_file(
+            "test",
+            session_id,
+            lambda: subdirectories(tmp_path),
+            lambda name: name.endswith(".jsonl"),
+            identify,
+        )
+
+    assert locate("late") is None
+    # Written without changing the directory mtime.
+    session_file.write_text(json.dumps({"id": "late"}) + "\n")
+    assert locate("late") == session_file
+
+
+def test_file_created_in_the_same_mtime_tick_is_found(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "first.jsonl").write_text("{}\n")
+    assert _locate(tmp_path, "first", []) is not None
+
+    # On a filesystem with coarse timestamps the directory mtime stays put.
+    st = (tmp_path / "a").stat()
+    second = tmp_path / "a" / "second.jsonl"
+    second.write_text("{}\n")
+    os.utime(tmp_path / "a", ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert _locate(tmp_path, "second", []) == second
+
+
+def test_works_without_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGENT_SESSIONS_NO_CACHE", "1")
+    (tmp_path / "a").mkdir()
+    session_file = tmp_path / "a" / "plain.jsonl"
+    session_file.write_text("{}\n")
+    assert _locate(tmp_path, "plain", []) == session_file
+    assert _locate(tmp_path, "missing", []) is None
+
+
+def test_codex_session_meta_id(tmp_path, monkeypatch):
+    monkeypatch.setenv("CODEX_HOME", str(tmp_path))
+    day_dir = tmp_path / "sessions" / "2026" / "01" / "02"
+    day_dir.mkdir(parents=True)
+    rollout = day_dir / "rollout-custom.jsonl"
+    rollout.write_text(
+        json.dumps({"type": "session_meta", "payload": {"id": "meta-id", "cwd": "/x"}}) + "\n"
+    )
+
+    assert find_codex_file("meta-id") == rollout
+    assert find_codex_file("other") is None
+
+
+def test_pi_header_id(tmp_path, monkeypatch):
+    monkeypatch.setenv("PI_SESSIONS_DIR", str(tmp_path))
+    project = tmp_path / "--home-lars-project--"
+    project.mkdir()
+    named = project / "2026-02-11T08-00-00-000Z_abc-123.jsonl"
+    named.write_text(json.dumps({"type": "session", "id": "abc-123"}) + "\n")
+    headered = project / "legacy.jsonl"
+    headered.write_text(json.dumps({"type": "session", "id": "from-header"}) + "\n")
+
+    assert find_pi_file("abc-123") == named
+    assert find_pi_file("from-header") == headered
@@ -0,0 +1,118 @@
+"""Tests for paging through JSONL session messages."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from agent_sessions import get_session_messages, message_index
+from agent_sessions.models import RunnerType
+from agent_sessions.providers.claude_code import get_claude_session_detail
+from agent_sessions.providers.pi import get_pi_session_messages
+
+SESSION_ID = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+
+
+def _claude_record(i: int) -> dict:
+    if i % 3 == 2:
+        return {"type": "progress", "data": {"type": "hook"}}
+    role = "user" if i % 3 == 0 else "assistant"
+    return {
+        "cwd": "/home/lars/paged",
+        "type": role,
+        "message": {"role": role, "content": [{"type": "text", "text": f"M{i}"}]},
+        "timestamp": f"2026-02-10T12:00:{i % 60:02d}.000Z",
+    }
+
+
+def _claude_session(monkeypatch, tmp_path: Path, count: int) -> Path:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    monkeypatch.setattr(
+        "agent_sessions.providers.claude_code.find_running_claude_sessions", lambda: set()
+    )
+    path = claude_home / "projects" / "-home-lars-paged" / f"{SESSION_ID}.jsonl"
+    path.parent.mkdir(parents=True)
+    path.write_text("".join(json.dumps(_claude_record(i)) + "\n" for i in range(count)))
+    return path
+
+
+def test_pages_match_full_history(monkeypatch, tmp_path: Path) -> None:
+    _claude_session(monkeypatch, tmp_path, 60)
+    full = get_claude_session_detail(SESSION_ID, limit=0).messages
+    assert len(full) == 40
+
+    pages = []
+    offset = 0
+    while True:
+        page = get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE, offset=offset, limit=7)
+        pages.extend(page.messages)
+        assert page.total == 40
+        if not page.has_next:
+            break
+        offset = page.offset + len(page.messages)
+    assert pages == full
+
+    last = get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE, offset=-3, limit=3)
+    assert last.offset == 37
+    assert last.messages == full[-3:]
+
+
+def test_index_is_extended_not_rebuilt(monkeypatch, tmp_path: Path) -> None:
+    path = _claude_session(monkeypatch, tmp_path, 30)
+    get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE)
+
+    with path.open("a") as f:
+        f.write(json.dumps(_claude_record(30)) + "\n")
+
+    decoded: list[bytes] = []
+    original = message_index.decode_line
+    monkeypatch.setattr(
+        message_index, "decode_line", lambda line: decoded.append(line) or original(line)
+    )
+    page = get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE, offset=-1, limit=1)
+
+    assert page.total == 21
+    assert page.messages[0].content == "M30"
+    # One line to extend the index, one to read the page.
+    assert len(decoded) == 2
+
+
+def test_partial_line_is_visible_but_not_indexed(monkeypatch, tmp_path: Path) -> None:
+    path = _claude_session(monkeypatch, tmp_path, 3)
+    with path.open("a") as f:
+        f.write(json.dumps(_claude_record(3)))
+
+    page = get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE)
+    assert [m.content for m in page.messages] == ["M0", "M1", "M3"]
+
+    with path.open("a") as f:
+        f.write("\n" + json.dumps(_claude_record(4)) + "\n")
+    page = get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE)
+    assert [m.content for m in page.messages] == ["M0", "M1", "M3", "M4"]
+
+
+def test_pi_pages(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("PI_SESSIONS_DIR", str(tmp_path))
+    path = tmp_path / "--home-lars-pi--" / f"2026-02-11T08-00-00-000Z_{SESSION_ID}.jsonl"
+    path.parent.mkdir()
+    records = [{"type": "session", "id": SESSION_ID, "cwd": "/home/lars/pi"}] + [
+        {
+            "type": "message",
+            "message": {"role": "user", "content": [{"type": "text", "text": f"P{i}"}]},
+        }
+        for i in range(5)
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    page = get_pi_session_messages(SESSION_ID, offset=1, limit=2)
+    assert [m.content for m in page.messages] == ["P1", "P2"]
+    assert page.total == 5
+    assert get_pi_session_messages("missing") is None
+
+
+def test_works_without_cache(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("AGENT_SESSIONS_NO_CACHE", "1")
+    _claude_session(monkeypatch, tmp_path, 9)
+    page = get_session_messages(SESSION_ID, RunnerType.CLAUDE_CODE, offset=1, limit=2)
+    assert [m.content for m in page.messages] == ["M1", "M3"]
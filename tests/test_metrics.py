@@ -0,0 +1,90 @@
+"""Tests for discovery instrumentation."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from agent_sessions import collect_stats, discover_sessions, get_session_detail
+from agent_sessions.metrics import Counters
+from agent_sessions.models import RunnerType
+from agent_sessions.providers.claude_code import list_claude_sessions
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+
+@pytest.fixture
+def corpus(monkeypatch, tmp_path: Path):
+    corpus = generate_corpus(tmp_path / "corpus", CorpusSpec(sessions=2, messages=8))
+    for name, value in corpus.env.items():
+        monkeypatch.setenv(name, value)
+    return corpus
+
+
+def test_discovery_is_attributed_per_provider(corpus) -> None:
+    with collect_stats() as stats:
+        discover_sessions()
+
+    assert set(stats.providers) == {t.value for t in RunnerType}
+    assert stats.wall_seconds > 0
+    assert stats.process_scan_seconds > 0
+
+    claude = stats.providers["claude_code"]
+    claude_bytes = sum(f.stat().st_size for f in (corpus.root / "claude").rglob("*.jsonl"))
+    assert claude.files_stat == 2
+    assert claude.files_opened == 2
+    assert claude.bytes_read == claude_bytes
+    assert claude.cache_misses == 2
+    assert claude.lines_skipped > 0  # progress and assistant records
+    assert claude.lines_decoded > 0
+    assert claude.malformed_lines == 0
+    assert claude.sql_queries > 0  # the summary cache
+    assert stats.providers["opencode"].sql_queries > 0
+    assert stats.total.files_opened == sum(c.files_opened for c in stats.providers.values())
+
+
+def test_warm_discovery_is_served_from_cache(corpus) -> None:
+    discover_sessions()
+
+    with collect_stats() as stats:
+        discover_sessions()
+
+    for provider in ("claude_code", "codex", "pi"):
+        counters = stats.providers[provider]
+        assert counters.cache_hits == 2
+        assert counters.files_opened == 0
+        assert counters.bytes_read == 0
+    assert stats.process_scan_seconds == 0  # the snapshot was reused
+
+
+def test_detail_is_recorded(corpus) -> None:
+    session_id = corpus.session_ids[RunnerType.CODEX][0]
+    with collect_stats() as stats:
+        get_session_detail(session_id, RunnerType.CODEX)
+
+    codex = stats.providers["codex"]
+    assert codex.files_opened >= 1
+    assert codex.bytes_read > 0
+    assert codex.lines_skipped > 0  # function calls and events
+
+
+def test_malformed_lines_are_counted(corpus) -> None:
+    session_file = next((corpus.root / "claude").rglob("*.jsonl"))
+    with session_file.open("a") as f:
+        f.write('{"type": "user", "message": \n')
+
+    with collect_stats() as stats:
+        list_claude_sessions()
+
+    # Called directly, not through a dispatcher: not attributed to a provider.
+    assert stats.providers == {}
+    assert stats.other.malformed_lines == 1
+
+
+def test_nothing_is_recorded_outside_the_block(corpus) -> None:
+    with collect_stats() as stats:
+        pass
+    discover_sessions()
+
+    assert stats.providers == {}
+    assert stats.other == Counters()
@@ -1,6 +1,12 @@
 """Tests for session models."""
 
-from agent_sessions.models import RunnerType, SessionSummary, SessionDetail, SessionMessage
+from agent_sessions.models import (
+    MessageRecord,
+    RunnerType,
+    SessionDetail,
+    SessionMessage,
+    SessionSummary,
+)
 
 
 def test_runner_type_values():
@@ -47,3 +53,17 @@ def test_session_message_with_thinking():
         timestamp="2026-01-01T00:00:00Z",
     )
     assert m.thinking == "User greeted me"
+
+
+def test_message_record_to_model():
+    record = MessageRecord("assistant", "answer", "hmm", "2026-01-01T00:00:00Z")
+    assert record.to_model() == SessionMessage(
+        role="assistant",
+        content="answer",
+        thinking="hmm",
+        timestamp="2026-01-01T00:00:00Z",
+    )
+
+
+def test_message_record_drops_non_string_timestamp():
+    assert MessageRecord("user", "hi", timestamp=1700000000).to_model().timestamp is None
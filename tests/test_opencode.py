@@ -9,7 +9,8 @@ from pathlib import Path
 from agent_sessions.providers.opencode import (
     list_opencode_sessions,
     get_opencode_session_detail,
-    _extract_text_from_parts,
+    get_opencode_session_messages,
+    _text_from_part,
     _millis_to_iso,
 )
 from agent_sessions.models import RunnerType
@@ -136,29 +137,11 @@ def test_millis_to_iso():
     assert _millis_to_iso(None) is None
 
 
-def test_extract_text_from_parts(tmp_path: Path):
-    db_path = tmp_path / "opencode.db"
-    _create_opencode_db(db_path)
-
-    # Insert a message with parts
-    _insert_message(
-        db_path,
-        "msg1",
-        "ses1",
-        "user",
-        [
-            {"type": "text", "text": "Hello world"},
-            {"type": "step-start", "snapshot": "abc123"},
-        ],
-        time_created=1700000000000,
-    )
-
-    conn = sqlite3.connect(str(db_path))
-    text, thinking = _extract_text_from_parts(conn, "msg1")
-    conn.close()
-
-    assert text == "Hello world"
-    assert thinking is None
+def test_text_from_part():
+    assert _text_from_part(json.dumps({"type": "text", "text": "Hello world"})) == "Hello world"
+    assert _text_from_part(json.dumps({"type": "step-start", "snapshot": "abc123"})) is None
+    assert _text_from_part(json.dumps({"type": "text", "text": ""})) is None
+    assert _text_from_part("{not json") is None
 
 
 # --- list_opencode_sessions ---
@@ -166,7 +149,7 @@ def test_extract_text_from_parts(tmp_path: Path):
 
 def test_list_opencode_sessions(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     monkeypatch.setattr(
         "agent_sessions.providers.opencode.find_running_opencode_sessions",
         lambda: set(),
@@ -214,7 +197,7 @@ def test_list_opencode_sessions(monkeypatch, tmp_path: Path):
 
 def test_list_opencode_sessions_directory_filter(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     monkeypatch.setattr(
         "agent_sessions.providers.opencode.find_running_opencode_sessions",
         lambda: set(),
@@ -245,7 +228,7 @@ def test_list_opencode_sessions_directory_filter(monkeypatch, tmp_path: Path):
 
 def test_list_opencode_sessions_excludes_child_sessions(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     monkeypatch.setattr(
         "agent_sessions.providers.opencode.find_running_opencode_sessions",
         lambda: set(),
@@ -269,7 +252,7 @@ def test_list_opencode_sessions_excludes_child_sessions(monkeypatch, tmp_path: P
 
 def test_list_opencode_sessions_empty(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "nonexistent" / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     sessions = list_opencode_sessions()
     assert sessions == []
 
@@ -277,7 +260,7 @@ def test_list_opencode_sessions_empty(monkeypatch, tmp_path: Path):
 def test_list_opencode_sessions_title_fallback(monkeypatch, tmp_path: Path):
     """When there are no user messages, title is used as first_prompt."""
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     monkeypatch.setattr(
         "agent_sessions.providers.opencode.find_running_opencode_sessions",
         lambda: set(),
@@ -291,12 +274,72 @@ def test_list_opencode_sessions_title_fallback(monkeypatch, tmp_path: Path):
     assert sessions[0].first_prompt == "My Title"
 
 
+def _count_queries(monkeypatch) -> list[str]:
+    """Record every statement executed on connections opened by the provider."""
+    statements: list[str] = []
+    connect = sqlite3.connect
+
+    def tracing_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr("agent_sessions.providers.opencode.sqlite3.connect", tracing_connect)
+    return statements
+
+
+def test_list_opencode_sessions_uses_fixed_number_of_queries(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "opencode.db"
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
+    monkeypatch.setattr(
+        "agent_sessions.providers.opencode.find_running_opencode_sessions",
+        lambda: set(),
+    )
+    _create_opencode_db(db_path)
+
+    for s in range(12):
+        session_id = f"s{s:02d}"
+        _insert_session(db_path, session_id, directory="/tmp", time_updated=1700000000000 + s)
+        # A user message without text is not a prompt.
+        _insert_message(
+            db_path,
+            f"{session_id}-m0",
+            session_id,
+            "user",
+            [{"type": "step-start"}],
+            time_created=1700000000000,
+        )
+        for m in range(1, 6):
+            role = "user" if m % 2 else "assistant"
+            _insert_message(
+                db_path,
+                f"{session_id}-m{m}",
+                session_id,
+                role,
+                [
+                    {"type": "text", "text": f"{session_id} {role} {m}"},
+                    {"type": "text", "text": "!"},
+                ],
+                time_created=1700000000000 + m,
+            )
+
+    statements = _count_queries(monkeypatch)
+    sessions = list_opencode_sessions(limit=10)
+
+    assert len(statements) <= 3
+    assert [s.id for s in sessions] == [f"s{s:02d}" for s in range(11, 1, -1)]
+    for summary in sessions:
+        assert summary.message_count == 6
+        assert summary.first_prompt == f"{summary.id} user 1\n!"
+        assert summary.last_prompt == f"{summary.id} user 5\n!"
+
+
 # --- get_opencode_session_detail ---
 
 
 def test_get_opencode_session_detail(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     monkeypatch.setattr(
         "agent_sessions.providers.opencode.find_running_opencode_sessions",
         lambda: set(),
@@ -350,7 +393,7 @@ def test_get_opencode_session_detail(monkeypatch, tmp_path: Path):
 
 def test_get_opencode_session_detail_not_found(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
 
     _create_opencode_db(db_path)
     assert get_opencode_session_detail("nonexistent") is None
@@ -358,7 +401,7 @@ def test_get_opencode_session_detail_not_found(monkeypatch, tmp_path: Path):
 
 def test_get_opencode_session_detail_message_limit(monkeypatch, tmp_path: Path):
     db_path = tmp_path / "opencode.db"
-    monkeypatch.setattr("agent_sessions.providers.opencode._opencode_db_path", lambda: db_path)
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
     monkeypatch.setattr(
         "agent_sessions.providers.opencode.find_running_opencode_sessions",
         lambda: set(),
@@ -385,3 +428,104 @@ def test_get_opencode_session_detail_message_limit(monkeypatch, tmp_path: Path):
     # Should be the last 3 messages
     assert detail.messages[0].content == "Message 7"
     assert detail.messages[2].content == "Message 9"
+
+
+def test_get_opencode_session_detail_batches_part_loading(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "opencode.db"
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
+    monkeypatch.setattr(
+        "agent_sessions.providers.opencode.find_running_opencode_sessions",
+        lambda: set(),
+    )
+    _create_opencode_db(db_path)
+
+    session_id = "batch-test"
+    _insert_session(db_path, session_id, directory="/tmp", title="Batch test")
+    for i in range(50):
+        role = "user" if i % 2 == 0 else "assistant"
+        _insert_message(
+            db_path,
+            f"m{i:02d}",
+            session_id,
+            role,
+            [
+                {"type": "step-start"},
+                {"type": "text", "text": f"Message {i}"},
+                {"type": "tool", "state": {"output": "x" * 100}},
+            ],
+            time_created=1700000000000 + i,
+        )
+
+    statements = _count_queries(monkeypatch)
+    detail = get_opencode_session_detail(session_id, limit=5)
+
+    assert detail is not None
+    assert [m.content for m in detail.messages] == [f"Message {i}" for i in range(45, 50)]
+    assert detail.first_prompt == "Message 0"
+    assert detail.last_prompt == "Message 48"
+    assert len(statements) <= 4
+
+
+def test_get_opencode_session_messages_pages(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "opencode.db"
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
+    _create_opencode_db(db_path)
+    session_id = "page-test"
+    _insert_session(db_path, session_id, directory="/tmp")
+
+    for i in range(10):
+        _insert_message(
+            db_path,
+            f"m{i}",
+            session_id,
+            "user" if i % 2 == 0 else "assistant",
+            [{"type": "text", "text": f"Message {i}"}],
+            time_created=1700000000000 + i * 10,
+        )
+    # Messages without text are not part of the history.
+    _insert_message(db_path, "tool", session_id, "assistant", [{"type": "tool"}], 1700000000015)
+
+    page = get_opencode_session_messages(session_id, offset=2, limit=3)
+    assert (page.offset, page.total) == (2, 10)
+    assert [m.content for m in page.messages] == ["Message 2", "Message 3", "Message 4"]
+    assert [m.role for m in page.messages] == ["user", "assistant", "user"]
+    assert page.has_previous and page.has_next
+
+    last = get_opencode_session_messages(session_id, offset=-4, limit=4)
+    assert last.offset == 6
+    assert [m.content for m in last.messages] == [f"Message {i}" for i in range(6, 10)]
+    assert not last.has_next
+
+    assert get_opencode_session_messages("missing") is None
+
+
+def test_list_opencode_sessions_skips_malformed_messages(monkeypatch, tmp_path: Path):
+    """A corrupt message row only loses that message, not the page's prompts."""
+    db_path = tmp_path / "opencode.db"
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
+    monkeypatch.setattr(
+        "agent_sessions.providers.opencode.find_running_opencode_sessions",
+        lambda: set(),
+    )
+    _create_opencode_db(db_path)
+    for s in range(3):
+        session_id = f"s{s}"
+        _insert_session(db_path, session_id, directory="/tmp", time_updated=1700000000000 + s)
+        _insert_message(
+            db_path,
+            f"{session_id}-m0",
+            session_id,
+            "user",
+            [{"type": "text", "text": f"hello {s}"}],
+        )
+    _insert_message(db_path, "s1-m1", "s1", "user", [{"type": "text", "text": "lost"}])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE message SET data = '{not json' WHERE id = 's1-m1'")
+
+    sessions = list_opencode_sessions()
+
+    assert {s.id: (s.first_prompt, s.last_prompt) for s in sessions} == {
+        "s2": ("hello 2", "hello 2"),
+        "s1": ("hello 1", "hello 1"),
+        "s0": ("hello 0", "hello 0"),
+    }
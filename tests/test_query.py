@@ -0,0 +1,214 @@
+"""Tests for SessionQuery and its pushdown into the providers."""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from agent_sessions import SessionQuery, discover_sessions
+from agent_sessions.models import RunnerType, SessionSummary
+from agent_sessions.providers import claude_code
+from agent_sessions.providers.claude_code import encode_project_path, list_claude_sessions
+from agent_sessions.providers.opencode import list_opencode_sessions
+from agent_sessions.providers.pi import list_pi_sessions
+from tests.test_claude_code import _write_session
+from tests.test_opencode import _create_opencode_db, _insert_message, _insert_session
+from tests.test_pi import _write_pi_session
+
+
+def _summary(**fields) -> SessionSummary:
+    values = {
+        "id": "s1",
+        "runner_type": RunnerType.CLAUDE_CODE,
+        "directory": "/home/lars/project/api",
+        "first_prompt": "Fix the Login bug",
+        "last_prompt": "Thanks",
+        "last_activity": "2026-02-10T12:00:00+00:00",
+        "message_count": 4,
+        "is_running": False,
+    }
+    values.update(fields)
+    return SessionSummary(**values)
+
+
+def test_matches() -> None:
+    summary = _summary()
+
+    assert SessionQuery().matches(summary)
+    assert SessionQuery(directory="/home/lars/project").matches(summary)
+    assert SessionQuery(directory="/home/lars/project/api").matches(summary)
+    assert not SessionQuery(directory="/home/lars/proj").matches(summary)
+    assert not SessionQuery(directory="/home/lars/project/api2").matches(summary)
+    assert SessionQuery(runner_types=["claude_code", "pi"]).matches(summary)
+    assert not SessionQuery(runner_types={RunnerType.CODEX}).matches(summary)
+    assert SessionQuery(min_messages=4).matches(summary)
+    assert not SessionQuery(min_messages=5).matches(summary)
+    assert SessionQuery(prompt="login BUG").matches(summary)
+    assert SessionQuery(prompt="thanks").matches(summary)
+    assert not SessionQuery(prompt="logout").matches(summary)
+    assert not SessionQuery(running=True).matches(summary)
+    assert SessionQuery(running=True).matches(_summary(is_running=True))
+    assert SessionQuery(since=datetime(2026, 2, 10, 12)).matches(summary)
+    assert not SessionQuery(since=datetime(2026, 2, 10, 13)).matches(summary)
+    assert not SessionQuery(until=datetime(2026, 2, 10, 11, tzinfo=timezone.utc)).matches(summary)
+
+
+def test_bounded_keeps_the_narrower_range() -> None:
+    query = SessionQuery(since=datetime(2026, 2, 1), until=datetime(2026, 2, 20))
+
+    bounded = query.bounded(datetime(2026, 1, 1), datetime(2026, 2, 10))
+
+    assert bounded.since == datetime(2026, 2, 1)
+    assert bounded.until == datetime(2026, 2, 10)
+    assert query.until == datetime(2026, 2, 20)
+
+
+def test_may_contain_folder() -> None:
+    query = SessionQuery(directory="/home/lars/project")
+
+    assert query.may_contain_folder("-home-lars-project")
+    assert query.may_contain_folder("-home-lars-project-api")
+    assert query.may_contain_folder("--home-lars-project--")
+    assert query.may_contain_folder("--home-lars-project-api--")
+    assert not query.may_contain_folder("-home-lars-project2")
+    assert not query.may_contain_folder("--home-lars-other--")
+    assert SessionQuery(directory="/").may_contain_folder("-anything")
+
+
+def test_claude_query_lists_only_matching_folders(monkeypatch, tmp_path: Path) -> None:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    running = {"11111111-0000-0000-0000-000000000000"}
+    monkeypatch.setattr(claude_code, "find_running_claude_sessions", lambda: running)
+    projects_dir = claude_home / "projects"
+    for index, directory in enumerate(
+        ["/home/lars/project", "/home/lars/project/api", "/home/lars/project2"], start=1
+    ):
+        session_id = f"{index}" * 8 + "-0000-0000-0000-000000000000"
+        _write_session(projects_dir / encode_project_path(directory) / f"{session_id}.jsonl", "x")
+
+    scanned: list[str] = []
+    scan_files = claude_code.scan_files
+
+    def recording_scan_files(directory, accept, recursive=False):
+        scanned.append(directory.name)
+        return scan_files(directory, accept, recursive)
+
+    monkeypatch.setattr(claude_code, "scan_files", recording_scan_files)
+
+    sessions = list_claude_sessions(query=SessionQuery(directory="/home/lars/project"))
+
+    assert sorted(s.directory for s in sessions) == [
+        "/home/lars/project",
+        "/home/lars/project/api",
+    ]
+    assert sorted(scanned) == ["-home-lars-project", "-home-lars-project-api"]
+
+    sessions = list_claude_sessions(query=SessionQuery(running=True))
+    assert [s.id for s in sessions] == sorted(running)
+    assert sessions[0].is_running
+
+
+def test_pi_query(monkeypatch, tmp_path: Path) -> None:
+    sessions_dir = tmp_path / ".pi" / "agent" / "sessions"
+    monkeypatch.setenv("PI_SESSIONS_DIR", str(sessions_dir))
+    monkeypatch.setattr("agent_sessions.providers.pi.find_running_pi_sessions", lambda: set())
+    session_id = "aaaaaaaa-bbbb-cccc-dddd-eeeeeeeeeeee"
+    _write_pi_session(
+        sessions_dir
+        / "--home-lars-project-web--"
+        / f"2026-02-11T08-00-00-000Z_{session_id}.jsonl",
+        session_id,
+        cwd="/home/lars/project/web",
+    )
+
+    assert len(list_pi_sessions(query=SessionQuery(directory="/home/lars/project"))) == 1
+    assert len(list_pi_sessions(query=SessionQuery(prompt="FILES ARE"))) == 1
+    assert list_pi_sessions(query=SessionQuery(prompt="nothing like it")) == []
+    assert list_pi_sessions(query=SessionQuery(min_messages=4)) == []
+    assert list_pi_sessions(query=SessionQuery(since=datetime(2026, 3, 1))) == []
+
+
+def _opencode_db(monkeypatch, tmp_path: Path) -> Path:
+    db_path = tmp_path / "opencode.db"
+    monkeypatch.setattr("agent_sessions.providers.opencode.opencode_db_path", lambda: db_path)
+    monkeypatch.setattr(
+        "agent_sessions.providers.opencode.find_running_opencode_sessions", lambda: {"ses_c"}
+    )
+    _create_opencode_db(db_path)
+    # Newest first: ses_a mentions "needle" only between its first and last prompts.
+    sessions = [
+        ("ses_a", "/home/user/project", ["alpha", "a needle in the middle", "omega"]),
+        ("ses_b", "/home/user/project/api", ["Needle first", "then more"]),
+        ("ses_c", "/home/user/project2", ["running"]),
+    ]
+    for index, (session_id, directory, prompts) in enumerate(sessions):
+        updated = 1700000900000 - index * 100000
+        _insert_session(db_path, session_id, directory, time_updated=updated)
+        for position, prompt in enumerate(prompts):
+            _insert_message(
+                db_path,
+                f"{session_id}_m{position}",
+                session_id,
+                "user",
+                [{"type": "text", "text": prompt}],
+                time_created=1700000000000 + position,
+            )
+    return db_path
+
+
+def test_opencode_query_is_evaluated_in_sql(monkeypatch, tmp_path: Path) -> None:
+    _opencode_db(monkeypatch, tmp_path)
+    # Only SQLite filters from here on.
+    monkeypatch.setattr(SessionQuery, "matches", lambda self, summary: True)
+
+    def ids(**fields) -> list[str]:
+        return [s.id for s in list_opencode_sessions(query=SessionQuery(**fields))]
+
+    assert ids(directory="/home/user/project") == ["ses_a", "ses_b"]
+    assert ids(directory="/home/user/project/api") == ["ses_b"]
+    assert ids(min_messages=3) == ["ses_a"]
+    assert ids(running=True) == ["ses_c"]
+    assert ids(since=datetime.fromtimestamp(1700000800, timezone.utc)) == ["ses_a", "ses_b"]
+    assert ids(until=datetime.fromtimestamp(1700000800, timezone.utc)) == ["ses_b", "ses_c"]
+    assert ids(prompt="100% 'needle'_") == []
+
+
+def test_opencode_prompt_filter_skips_malformed_messages(monkeypatch, tmp_path: Path) -> None:
+    db_path = _opencode_db(monkeypatch, tmp_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE message SET data = '{not json' WHERE id = 'ses_a_m1'")
+
+    sessions = list_opencode_sessions(query=SessionQuery(prompt="needle"))
+
+    assert [s.id for s in sessions] == ["ses_b"]
+
+
+def test_opencode_prompt_filter_pages_past_near_misses(monkeypatch, tmp_path: Path) -> None:
+    _opencode_db(monkeypatch, tmp_path)
+
+    sessions = list_opencode_sessions(limit=1, query=SessionQuery(prompt="NEEDLE"))
+
+    assert [s.id for s in sessions] == ["ses_b"]
+
+
+def test_discover_sessions_skips_excluded_providers() -> None:
+    query = SessionQuery(runner_types=[RunnerType.PI], min_messages=2)
+    with (
+        patch("agent_sessions.list_claude_sessions", return_value=[]) as mock_claude,
+        patch("agent_sessions.list_codex_sessions", return_value=[]) as mock_codex,
+        patch("agent_sessions.list_opencode_sessions", return_value=[]) as mock_opencode,
+        patch(
+            "agent_sessions.list_pi_sessions",
+            return_value=[_summary(runner_type=RunnerType.PI)],
+        ) as mock_pi,
+    ):
+        sessions = discover_sessions(query=query)
+
+    assert [s.id for s in sessions] == ["s1"]
+    mock_claude.assert_not_called()
+    mock_codex.assert_not_called()
+    mock_opencode.assert_not_called()
+    assert mock_pi.call_args.kwargs["query"] is query
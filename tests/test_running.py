@@ -2,23 +2,47 @@
 
 from __future__ import annotations
 
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
 from unittest.mock import patch
 import subprocess
 
+from agent_sessions import deadline, running
 from agent_sessions.running import (
+    clear_process_snapshot,
     find_running_claude_sessions,
     find_running_codex_sessions,
     find_running_pi_sessions,
     is_claude_session_running,
     is_codex_session_running,
+    get_process_snapshot,
     is_pi_session_running,
 )
 
 
+@contextmanager
 def _mock_ps(stdout: str):
-    """Return a mock for subprocess.run that returns the given ps output."""
+    """Pretend /proc is missing and ``ps aux`` returns the given output."""
     result = subprocess.CompletedProcess(["ps", "aux"], 0, stdout=stdout, stderr="")
-    return patch("agent_sessions.running.subprocess.run", return_value=result)
+    clear_process_snapshot()
+    with (
+        patch("agent_sessions.running._PROC_DIR", Path("/nonexistent-proc")),
+        patch("agent_sessions.running.subprocess.run", return_value=result) as mock,
+    ):
+        yield mock
+    clear_process_snapshot()
+
+
+def _fake_proc(root: Path, processes: dict[int, list[str]]) -> Path:
+    for pid, argv in processes.items():
+        proc = root / str(pid)
+        proc.mkdir(parents=True)
+        (proc / "cmdline").write_bytes(b"\0".join(a.encode() for a in argv) + b"\0")
+    (root / "self").mkdir(exist_ok=True)
+    return root
 
 
 def test_find_running_claude_sessions():
@@ -65,10 +89,130 @@ def test_is_claude_session_running():
 
 
 def test_subprocess_timeout_returns_empty():
-    with patch(
-        "agent_sessions.running.subprocess.run",
-        side_effect=subprocess.TimeoutExpired(cmd="ps", timeout=5),
+    with (
+        patch("agent_sessions.running._PROC_DIR", Path("/nonexistent-proc")),
+        patch(
+            "agent_sessions.running.subprocess.run",
+            side_effect=subprocess.TimeoutExpired(cmd="ps", timeout=5),
+        ),
     ):
         assert find_running_claude_sessions() == set()
         assert find_running_codex_sessions() == set()
         assert find_running_pi_sessions() == set()
+
+
+def test_detectors_read_proc_without_subprocess(tmp_path: Path):
+    proc = _fake_proc(
+        tmp_path / "proc",
+        {
+            100: ["claude", "--resume", "a1b2c3d4-e5f6-7890-abcd-ef1234567890"],
+            101: ["node", "/usr/bin/codex", "resume", "019b2182-8e89-77a1-a675-72857fca4fb1"],
+            102: ["/usr/bin/pi", "d6660987-06ac-427d-b751-1232e8b88ca2"],
+            103: ["vim", "test.py"],
+        },
+    )
+    (proc / "104").mkdir()
+    (proc / "104" / "cmdline").write_bytes(b"")  # kernel thread
+
+    with (
+        patch("agent_sessions.running._PROC_DIR", proc),
+        patch("agent_sessions.running.subprocess.run") as mock_run,
+    ):
+        assert find_running_claude_sessions() == {"a1b2c3d4-e5f6-7890-abcd-ef1234567890"}
+        assert find_running_codex_sessions() == {"019b2182-8e89-77a1-a675-72857fca4fb1"}
+        assert find_running_pi_sessions() == {"d6660987-06ac-427d-b751-1232e8b88ca2"}
+    mock_run.assert_not_called()
+
+
+def test_snapshot_is_shared_within_ttl(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("AGENT_SESSIONS_PROCESS_TTL", "60")
+    with _mock_ps("lars 1 0 0 0 0 ? S 10:00 0:05 vim\n") as mock_run:
+        find_running_claude_sessions()
+        find_running_codex_sessions()
+        find_running_pi_sessions()
+    assert mock_run.call_count == 1
+
+
+def test_snapshot_max_age_zero_forces_rescan(tmp_path: Path):
+    proc = _fake_proc(tmp_path / "proc", {100: ["vim"]})
+    with patch("agent_sessions.running._PROC_DIR", proc):
+        first = get_process_snapshot()
+        assert get_process_snapshot() is first
+        _fake_proc(proc, {200: ["claude", "--resume", "a1b2c3d4-e5f6-7890-abcd-ef1234567890"]})
+        second = get_process_snapshot(max_age=0)
+    assert second is not first
+    assert find_running_claude_sessions(second) == {"a1b2c3d4-e5f6-7890-abcd-ef1234567890"}
+
+
+def _write_stat(proc: Path, pid: int, start_time: int) -> None:
+    fields = ["S"] + ["0"] * 18 + [str(start_time)] + ["0"] * 5
+    (proc / str(pid) / "stat").write_text(f"{pid} (claude (x)) " + " ".join(fields) + "\n")
+
+
+def test_registry_answers_from_liveness_check(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("AGENT_SESSIONS_PROCESS_TTL", "0")
+    monkeypatch.setenv("AGENT_SESSIONS_REGISTRY_TTL", "60")
+    session_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+    pid = os.getpid()
+    proc = _fake_proc(tmp_path / "proc", {pid: ["claude", "--resume", session_id]})
+    _write_stat(proc, pid, 111)
+
+    with patch("agent_sessions.running._PROC_DIR", proc):
+        assert is_claude_session_running(session_id) is True
+
+        with patch("agent_sessions.running.read_proc", side_effect=AssertionError("rescan")):
+            # Known session: confirmed by signal 0 and start time, no rescan.
+            assert is_claude_session_running(session_id) is True
+            # Unknown session while the registry is fresh: no rescan either.
+            assert is_claude_session_running("other-session") is False
+
+            # The PID now belongs to a different process.
+            _write_stat(proc, pid, 222)
+            assert is_claude_session_running(session_id) is False
+
+
+def test_registry_rescans_when_stale(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("AGENT_SESSIONS_PROCESS_TTL", "0")
+    monkeypatch.setenv("AGENT_SESSIONS_REGISTRY_TTL", "0")
+    session_id = "d6660987-06ac-427d-b751-1232e8b88ca2"
+    proc = _fake_proc(tmp_path / "proc", {100: ["vim"]})
+
+    with patch("agent_sessions.running._PROC_DIR", proc):
+        assert is_pi_session_running(session_id) is False
+        _fake_proc(proc, {101: ["/usr/bin/pi", session_id]})
+        assert is_pi_session_running(session_id) is True
+
+
+def test_budget_is_not_spent_waiting_for_another_scan(tmp_path: Path):
+    proc = _fake_proc(tmp_path / "proc", {100: ["vim"]})
+    read_proc = running.read_proc
+    scanning = threading.Event()
+    release = threading.Event()
+
+    def slow_read_proc():
+        if threading.current_thread() is not threading.main_thread():
+            scanning.set()
+            release.wait(5)
+        return read_proc()
+
+    clear_process_snapshot()
+    with (
+        patch("agent_sessions.running._PROC_DIR", proc),
+        patch("agent_sessions.running.read_proc", side_effect=slow_read_proc),
+    ):
+        other = threading.Thread(target=get_process_snapshot, args=(0,))
+        other.start()
+        try:
+            assert scanning.wait(5)
+            start = time.monotonic()
+            incomplete: list[str] = []
+            with deadline.budget(time.monotonic() + 0.05, incomplete):
+                snapshot = get_process_snapshot(0)
+                # Readers of the current snapshot do not wait for the scan either.
+                running.cached_snapshot(None)
+            assert time.monotonic() - start < 1
+            assert [p.pid for p in snapshot.processes] == [100]
+        finally:
+            release.set()
+            other.join()
+    clear_process_snapshot()
@@ -0,0 +1,128 @@
+"""Tests for limit-aware session discovery."""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from agent_sessions import cache as cache_module
+from agent_sessions.models import RunnerType, SessionSummary
+from agent_sessions.providers.claude_code import encode_project_path, list_claude_sessions
+from agent_sessions.scanning import parse_timestamp, scan_files, select_recent
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat()
+
+
+def _touch(path: Path, epoch: float) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("{}\n")
+    os.utime(path, (epoch, epoch))
+
+
+def _summary(path: Path, activity: float) -> SessionSummary:
+    return SessionSummary(
+        id=path.stem,
+        runner_type=RunnerType.PI,
+        directory="/tmp",
+        last_activity=_iso(activity),
+        message_count=1,
+        is_running=False,
+    )
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("2026-02-10T12:00:00.000Z") == parse_timestamp(
+        "2026-02-10T12:00:00+00:00"
+    )
+    assert parse_timestamp("not a timestamp") is None
+    assert parse_timestamp(None) is None
+
+
+def test_select_recent_stops_after_limit(tmp_path: Path) -> None:
+    base = 1_770_000_000.0
+    for i in range(20):
+        _touch(tmp_path / f"s{i:02d}.jsonl", base + i * 60)
+    parsed: list[str] = []
+
+    def summarize(candidate):
+        parsed.append(candidate.path.stem)
+        return _summary(candidate.path, candidate.mtime)
+
+    candidates = scan_files(tmp_path, lambda name: name.endswith(".jsonl"))
+    sessions = select_recent(candidates, summarize, limit=3)
+
+    assert [s.id for s in sessions] == ["s19", "s18", "s17"]
+    assert parsed == ["s19", "s18", "s17"]
+
+
+def test_select_recent_keeps_scanning_while_older_files_may_win(tmp_path: Path) -> None:
+    base = 1_770_000_000.0
+    for i in range(5):
+        _touch(tmp_path / f"s{i}.jsonl", base + i * 60)
+    parsed: list[str] = []
+
+    def summarize(candidate):
+        parsed.append(candidate.path.stem)
+        # The newest file's content is much older than its mtime.
+        activity = base - 3600 if candidate.path.stem == "s4" else candidate.mtime
+        return _summary(candidate.path, activity)
+
+    candidates = scan_files(tmp_path, lambda name: name.endswith(".jsonl"))
+    sessions = select_recent(candidates, summarize, limit=1)
+
+    assert [s.id for s in sessions] == ["s3"]
+    assert parsed == ["s4", "s3"]
+
+
+def test_select_recent_skips_filtered_sessions(tmp_path: Path) -> None:
+    base = 1_770_000_000.0
+    for i in range(5):
+        _touch(tmp_path / f"s{i}.jsonl", base + i * 60)
+
+    def summarize(candidate):
+        if candidate.path.stem in ("s4", "s3"):
+            return None
+        return _summary(candidate.path, candidate.mtime)
+
+    candidates = scan_files(tmp_path, lambda name: name.endswith(".jsonl"))
+    sessions = select_recent(candidates, summarize, limit=2)
+    assert [s.id for s in sessions] == ["s2", "s1"]
+
+
+def test_list_claude_sessions_parses_only_recent_files(monkeypatch, tmp_path: Path) -> None:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    monkeypatch.setattr(
+        "agent_sessions.providers.claude_code.find_running_claude_sessions", lambda: set()
+    )
+    project_dir = claude_home / "projects" / encode_project_path("/home/lars/myproject")
+    project_dir.mkdir(parents=True)
+
+    base = 1_770_000_000.0
+    for i in range(30):
+        session_file = project_dir / f"a1b2c3d4-e5f6-7890-abcd-ef12345678{i:02d}.jsonl"
+        record = {
+            "type": "user",
+            "message": {"role": "user", "content": f"prompt {i}"},
+            "timestamp": _iso(base + i * 60),
+        }
+        session_file.write_text(json.dumps(record) + "\n")
+        os.utime(session_file, (base + i * 60, base + i * 60))
+
+    parsed: list[Path] = []
+    original = cache_module.parse_incremental
+
+    def parse(session_file, new_state, resume=None):
+        parsed.append(session_file)
+        return original(session_file, new_state, resume)
+
+    monkeypatch.setattr(cache_module, "parse_incremental", parse)
+
+    sessions = list_claude_sessions(limit=5)
+
+    assert [s.first_prompt for s in sessions] == [f"prompt {i}" for i in range(29, 24, -1)]
+    assert len(parsed) == 5
@@ -0,0 +1,152 @@
+"""Tests for full-text session search."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from agent_sessions import collect_stats, discover_sessions, get_session_messages
+from agent_sessions.models import RunnerType
+from agent_sessions.providers.claude_code import encode_project_path
+from agent_sessions import search
+from agent_sessions.cache import cache_db_path
+from agent_sessions.search import search_sessions
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+_SESSION_ID = "5a1c7e52-0000-4000-8000-000000000001"
+
+
+def _user(text: str, cwd: str = "/home/lars/project") -> dict:
+    return {
+        "type": "user",
+        "cwd": cwd,
+        "message": {"role": "user", "content": text},
+        "timestamp": "2026-02-10T12:00:00.000Z",
+    }
+
+
+def _assistant(text: str) -> dict:
+    return {
+        "type": "assistant",
+        "message": {"role": "assistant", "content": [{"type": "text", "text": text}]},
+        "timestamp": "2026-02-10T12:00:05.000Z",
+    }
+
+
+def _append(path: Path, *records: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+@pytest.fixture
+def claude_file(monkeypatch, tmp_path: Path) -> Path:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    for name in ("CODEX_HOME", "PI_SESSIONS_DIR", "XDG_DATA_HOME"):
+        monkeypatch.setenv(name, str(tmp_path / "empty"))
+    path = claude_home / "projects" / encode_project_path("/home/lars/project")
+    return path / f"{_SESSION_ID}.jsonl"
+
+
+def test_hits_point_at_messages_in_every_provider(monkeypatch, tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "corpus", CorpusSpec(sessions=3, messages=8, seed=3))
+    for name, value in corpus.env.items():
+        monkeypatch.setenv(name, value)
+
+    for runner_type in RunnerType:
+        session = discover_sessions(runner_type=runner_type, limit=1)[0]
+        hits = search_sessions(session.first_prompt, runner_type=runner_type)
+        assert hits, runner_type
+        hit = next(h for h in hits if h.id == session.id)
+        assert hit.runner_type == runner_type
+        assert "[" in hit.snippet and "]" in hit.snippet
+
+        page = get_session_messages(hit.id, hit.runner_type, offset=hit.position, limit=1)
+        assert page.messages[0].content == session.first_prompt
+
+
+def test_appended_messages_are_indexed_incrementally(claude_file: Path) -> None:
+    _append(claude_file, _user("set up the database"), _assistant("Done."))
+    assert search_sessions("flaky migration") == []
+
+    size = claude_file.stat().st_size
+    _append(claude_file, _user("why is the flaky migration failing?"))
+    with collect_stats() as stats:
+        hits = search_sessions("flaky migration")
+
+    assert [(h.id, h.position, h.role) for h in hits] == [(_SESSION_ID, 2, "user")]
+    assert hits[0].directory == "/home/lars/project"
+    assert stats.total.bytes_read == claude_file.stat().st_size - size
+    # Earlier messages are still found.
+    assert [h.position for h in search_sessions("database")] == [0]
+
+
+def test_rewritten_and_deleted_files(claude_file: Path) -> None:
+    _append(claude_file, _user("original words here"))
+    assert len(search_sessions("original")) == 1
+
+    claude_file.write_text(json.dumps(_user("replacement text, longer than before")) + "\n")
+    assert search_sessions("original") == []
+    assert [h.position for h in search_sessions("replacement")] == [0]
+
+    claude_file.unlink()
+    assert search_sessions("replacement") == []
+
+
+def test_cache_is_not_locked_while_files_are_parsed(monkeypatch, claude_file: Path) -> None:
+    for index in range(3):
+        path = claude_file.with_name(f"6b2d8f63-0000-4000-8000-00000000000{index}.jsonl")
+        _append(path, _user(f"indexed message {index}"))
+    search_sessions("warm up the cache")
+    for path in claude_file.parent.iterdir():
+        _append(path, _user("appended later"))
+
+    index_file = search._index_file
+    writes = []
+
+    def index_file_and_write(*args):
+        # Another process writing to the cache must not wait for the index.
+        other = sqlite3.connect(cache_db_path(), timeout=0, isolation_level=None)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("ROLLBACK")
+            writes.append(args[1].path)
+        finally:
+            other.close()
+        return index_file(*args)
+
+    monkeypatch.setattr(search, "_index_file", index_file_and_write)
+    monkeypatch.setattr(search, "_BATCH_MESSAGES", 1)
+
+    assert len(search_sessions("appended later")) == 3
+    assert len(writes) == 3
+
+
+def test_filters(claude_file: Path) -> None:
+    _append(claude_file, _user("shared keyword"))
+    other = claude_file.parent.parent / encode_project_path("/home/lars/other") / "o.jsonl"
+    other = other.with_name("6b2d8f63-0000-4000-8000-000000000002.jsonl")
+    _append(other, _user("shared keyword", cwd="/home/lars/other"))
+
+    assert len(search_sessions("shared keyword")) == 2
+    hits = search_sessions("shared keyword", directory="/home/lars/other")
+    assert [h.id for h in hits] == ["6b2d8f63-0000-4000-8000-000000000002"]
+    assert search_sessions("shared keyword", runner_type=RunnerType.CODEX) == []
+    assert len(search_sessions("shared keyword", limit=1)) == 1
+
+
+def test_query_syntax_is_not_interpreted(claude_file: Path) -> None:
+    _append(claude_file, _user('the "flaky-migration" AND NOT (retry*) test'))
+    assert len(search_sessions('flaky-migration "AND" NOT (retry*')) == 1
+    assert search_sessions("   ") == []
+
+
+def test_works_without_cache(monkeypatch, claude_file: Path) -> None:
+    monkeypatch.setenv("AGENT_SESSIONS_NO_CACHE", "1")
+    _append(claude_file, _user("uncached search"))
+    assert [h.id for h in search_sessions("uncached")] == [_SESSION_ID]
@@ -0,0 +1,289 @@
+"""Tests for the session change feed."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from agent_sessions import awatch_sessions, follow_session, watch
+from agent_sessions.models import ChangeKind, RunnerType, SessionChange
+from agent_sessions.providers.claude_code import encode_project_path
+from agent_sessions.watch import SessionWatcher, open_session_follower
+from tests.test_opencode import _create_opencode_db, _insert_message, _insert_session
+
+_SESSION_ID = "5a1c7e52-0000-4000-8000-000000000001"
+_OTHER_ID = "6b2d8f63-0000-4000-8000-000000000002"
+
+
+def _user(text: str, cwd: str = "/home/lars/project") -> dict:
+    return {
+        "type": "user",
+        "cwd": cwd,
+        "message": {"role": "user", "content": text},
+        "timestamp": "2026-02-10T12:00:00.000Z",
+    }
+
+
+def _append(path: Path, *records: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+@pytest.fixture
+def projects(monkeypatch, tmp_path: Path) -> Path:
+    claude_home = tmp_path / ".claude"
+    monkeypatch.setenv("CLAUDE_HOME", str(claude_home))
+    monkeypatch.setenv("CODEX_HOME", str(tmp_path / "codex"))
+    monkeypatch.setenv("PI_SESSIONS_DIR", str(tmp_path / "pi"))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    path = claude_home / "projects"
+    path.mkdir(parents=True)
+    return path
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def make_watcher(request):
+    watchers = []
+
+    def make(**kwargs) -> SessionWatcher:
+        watcher = SessionWatcher(
+            kwargs.get("directory"),
+            kwargs.get("runner_type"),
+            interval=0.05,
+            debounce=0.05,
+            use_inotify=request.param,
+        )
+        if request.param and not isinstance(watcher._backend, watch._Inotify):
+            pytest.skip("inotify is not available")
+        watchers.append(watcher)
+        return watcher
+
+    yield make
+    for watcher in watchers:
+        watcher.close()
+
+
+def _changes(watcher: SessionWatcher, count: int = 1) -> list[SessionChange]:
+    changes: list[SessionChange] = []
+    for _ in range(40):
+        changes += watcher.poll(0.1)
+        if len(changes) >= count:
+            break
+    return changes
+
+
+def test_created_updated_removed(projects: Path, make_watcher) -> None:
+    existing = projects / encode_project_path("/home/lars/project") / f"{_OTHER_ID}.jsonl"
+    _append(existing, _user("already here"))
+    watcher = make_watcher()
+
+    session_file = projects / encode_project_path("/home/lars/project") / f"{_SESSION_ID}.jsonl"
+    _append(session_file, _user("first"))
+    [created] = _changes(watcher)
+    assert (created.kind, created.id, created.runner_type) == (
+        ChangeKind.CREATED,
+        _SESSION_ID,
+        RunnerType.CLAUDE_CODE,
+    )
+    assert created.summary.message_count == 1
+
+    _append(session_file, _user("second"), _user("third"))
+    [updated] = _changes(watcher)
+    assert updated.kind == ChangeKind.UPDATED
+    assert (updated.summary.message_count, updated.summary.last_prompt) == (3, "third")
+
+    session_file.unlink()
+    [removed] = _changes(watcher)
+    assert (removed.kind, removed.id, removed.summary) == (ChangeKind.REMOVED, _SESSION_ID, None)
+
+
+def test_new_project_directory_and_filter(projects: Path, make_watcher) -> None:
+    watcher = make_watcher(directory="/home/lars/other")
+
+    _append(
+        projects / encode_project_path("/home/lars/project") / f"{_SESSION_ID}.jsonl", _user("x")
+    )
+    other = projects / encode_project_path("/home/lars/other") / f"{_OTHER_ID}.jsonl"
+    _append(other, _user("y", cwd="/home/lars/other"))
+
+    changes = _changes(watcher, count=2)
+    assert [(c.kind, c.id) for c in changes] == [(ChangeKind.CREATED, _OTHER_ID)]
+
+
+def test_missing_roots_are_picked_up(monkeypatch, tmp_path: Path, make_watcher) -> None:
+    codex_home = tmp_path / "codex"
+    monkeypatch.setenv("CODEX_HOME", str(codex_home))
+    watcher = make_watcher(runner_type=RunnerType.CODEX)
+
+    rollout = (
+        codex_home
+        / "sessions"
+        / "2026"
+        / "02"
+        / "10"
+        / f"rollout-2026-02-10T12-00-00-{_SESSION_ID}.jsonl"
+    )
+    _append(
+        rollout,
+        {"type": "session_meta", "payload": {"id": _SESSION_ID, "cwd": "/home/lars/project"}},
+        {
+            "type": "response_item",
+            "payload": {
+                "type": "message",
+                "role": "user",
+                "content": [{"type": "input_text", "text": "hello"}],
+            },
+        },
+    )
+    [created] = _changes(watcher)
+    assert (created.kind, created.id, created.runner_type) == (
+        ChangeKind.CREATED,
+        _SESSION_ID,
+        RunnerType.CODEX,
+    )
+
+
+def test_opencode_changes(projects: Path, tmp_path: Path, make_watcher) -> None:
+    db_path = tmp_path / "data" / "opencode" / "opencode.db"
+    _create_opencode_db(db_path)
+    _insert_session(db_path, "ses_old", "/home/lars/project")
+    watcher = make_watcher(runner_type=RunnerType.OPENCODE)
+
+    _insert_session(
+        db_path, "ses_new", "/home/lars/project", title="New", time_updated=1700000200000
+    )
+    [created] = _changes(watcher)
+    assert (created.kind, created.id, created.summary.first_prompt) == (
+        ChangeKind.CREATED,
+        "ses_new",
+        "New",
+    )
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM session WHERE id = 'ses_old'")
+    conn.commit()
+    conn.close()
+    [removed] = _changes(watcher)
+    assert (removed.kind, removed.id) == (ChangeKind.REMOVED, "ses_old")
+
+
+def test_awatch_sessions(projects: Path) -> None:
+    session_file = projects / encode_project_path("/home/lars/project") / f"{_SESSION_ID}.jsonl"
+
+    async def first_change() -> SessionChange:
+        changes = awatch_sessions(interval=0.05, debounce=0.05)
+        try:
+            task = asyncio.ensure_future(anext(changes))
+            await asyncio.sleep(0.2)
+            _append(session_file, _user("hello"))
+            return await asyncio.wait_for(task, 5)
+        finally:
+            await changes.aclose()
+
+    change = asyncio.run(first_change())
+    assert (change.kind, change.id) == (ChangeKind.CREATED, _SESSION_ID)
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def open_follower(request):
+    followers = []
+
+    def open_(session_id: str, runner_type: RunnerType, start: int | None = None):
+        follower = open_session_follower(
+            session_id, runner_type, start, 0.05, use_inotify=request.param
+        )
+        if follower is not None:
+            followers.append(follower)
+        return follower
+
+    yield open_
+    for follower in followers:
+        follower.close()
+
+
+def _follow(follower, count: int = 1) -> list[str] | None:
+    contents: list[str] = []
+    for _ in range(40):
+        messages = follower.poll(0.1)
+        if messages is None:
+            return None
+        contents += [m.content for m in messages]
+        if len(contents) >= count:
+            break
+    return contents
+
+
+def test_follow_session_file(projects: Path, open_follower) -> None:
+    session_file = projects / encode_project_path("/home/lars/project") / f"{_SESSION_ID}.jsonl"
+    _append(session_file, _user("before"))
+    follower = open_follower(_SESSION_ID, RunnerType.CLAUDE_CODE)
+
+    _append(session_file, _user("one"), _user("two"))
+    assert _follow(follower, count=2) == ["one", "two"]
+
+    # A line still being written is returned once it is complete.
+    line = json.dumps(_user("three")) + "\n"
+    with session_file.open("a") as f:
+        f.write(line[:20])
+    assert follower.poll(0.3) == []
+    with session_file.open("a") as f:
+        f.write(line[20:])
+    assert _follow(follower) == ["three"]
+
+    session_file.unlink()
+    assert _follow(follower) is None
+
+
+def test_follow_session_from_start(projects: Path, open_follower) -> None:
+    session_file = projects / encode_project_path("/home/lars/project") / f"{_SESSION_ID}.jsonl"
+    _append(session_file, _user("a"), _user("b"), _user("c"))
+
+    assert _follow(open_follower(_SESSION_ID, RunnerType.CLAUDE_CODE, start=1), 2) == ["b", "c"]
+    assert _follow(open_follower(_SESSION_ID, RunnerType.CLAUDE_CODE, start=-1)) == ["c"]
+    assert open_follower("missing", RunnerType.CLAUDE_CODE) is None
+    assert list(follow_session("missing", RunnerType.PI)) == []
+
+
+def test_follow_opencode_session(projects: Path, tmp_path: Path, open_follower) -> None:
+    db_path = tmp_path / "data" / "opencode" / "opencode.db"
+    _create_opencode_db(db_path)
+    _insert_session(db_path, "ses_1", "/home/lars/project")
+    _insert_message(db_path, "msg_1", "ses_1", "user", [{"type": "text", "text": "before"}], 1)
+    follower = open_follower("ses_1", RunnerType.OPENCODE)
+
+    _insert_message(db_path, "msg_2", "ses_1", "user", [{"type": "text", "text": "hello"}], 2)
+    assert _follow(follower) == ["hello"]
+
+    # An assistant message is held back until OpenCode completes it.
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO message (id, session_id, time_created, time_updated, data) "
+        "VALUES ('msg_3', 'ses_1', 3, 3, ?)",
+        (json.dumps({"role": "assistant", "time": {"created": 3}}),),
+    )
+    conn.execute(
+        "INSERT INTO part (id, message_id, session_id, time_created, time_updated, data) "
+        "VALUES ('prt_3', 'msg_3', 'ses_1', 3, 3, ?)",
+        (json.dumps({"type": "text", "text": "hi"}),),
+    )
+    conn.commit()
+    assert follower.poll(0.3) == []
+    conn.execute(
+        "UPDATE message SET data = ? WHERE id = 'msg_3'",
+        (json.dumps({"role": "assistant", "time": {"created": 3, "completed": 4}}),),
+    )
+    conn.commit()
+    conn.close()
+    assert _follow(follower) == ["hi"]
+
+    assert _follow(open_follower("ses_1", RunnerType.OPENCODE, start=0), 3) == [
+        "before",
+        "hello",
+        "hi",
+    ]